@@ -0,0 +1,52 @@
+"""Compares building footprints through the fast path against always running
+``antimeridian.fix_polygon``, on the posLists of the fixtures, netCDF4 and JSON.
+
+Usage: python benchmarks/antimeridian_fast_path.py [repeat]
+"""
+
+import sys
+import timeit
+from collections import Counter
+from pathlib import Path
+
+import antimeridian
+
+from stactools.sentinel5p.extraction import FOOTPRINT
+from stactools.sentinel5p.footprint import pos_list_footprint, pos_list_polygon
+from stactools.sentinel5p.granule import GranuleReader
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+
+def fixed_polygon(pos_list: str):
+    return antimeridian.fix_polygon(pos_list_polygon(pos_list), fix_winding=False)
+
+
+def main(repeat: int) -> None:
+    pos_lists = {}
+    for path in sorted(DATA_FILES.glob("S5P_*")):
+        if "O3_TCL" in path.name or path.name[4:24] in pos_lists:
+            continue
+        with GranuleReader(str(path)) as granule:
+            pos_lists[path.name[4:24]] = granule.attr(FOOTPRINT, "gml:posList")
+
+    print(
+        f"{'posList':<24} {'path':<24} {'fix us':>10} {'footprint us':>13} {'speedup':>8}"
+    )
+    totals = Counter()
+    for name, pos_list in pos_lists.items():
+        stats = Counter()
+        footprint = pos_list_footprint(pos_list, stats)
+        assert footprint.equals_exact(fixed_polygon(pos_list), 0)
+        fix = timeit.timeit(lambda: fixed_polygon(pos_list), number=repeat)
+        fast = timeit.timeit(lambda: pos_list_footprint(pos_list), number=repeat)
+        totals.update(fix=fix, fast=fast)
+        print(
+            f"{name:<24} {next(iter(stats)):<24} {1e6 * fix / repeat:>10.1f} "
+            f"{1e6 * fast / repeat:>13.1f} {fix / fast:>7.1f}x"
+        )
+    print(f"{'total':<49} {totals['fix'] / totals['fast']:>30.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
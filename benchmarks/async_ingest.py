@@ -0,0 +1,112 @@
+"""Measures the throughput of creating the items of netCDF4 granules at URLs
+as object storage would serve them, with a latency added to every request,
+with the process pool of ``create_items`` and with the asyncio pipeline of
+``create_items_async`` at growing concurrency.
+
+The fixtures are served over HTTP from a local server, each several times
+over to make a larger batch.
+
+Usage: python benchmarks/async_ingest.py [latency_ms] [copies] [jobs]
+"""
+
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from stactools.sentinel5p.aio import create_items_async
+from stactools.sentinel5p.batch import create_items
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+RANGE_EXPR = re.compile(r"bytes=(\d+)-(\d+)")
+
+
+class Handler(SimpleHTTPRequestHandler):
+    latency = 0.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=str(DATA_FILES), **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_head(self):
+        time.sleep(self.latency)
+        path = self.translate_path(self.path)
+        with open(path, "rb") as f:
+            data = f.read()
+        match = RANGE_EXPR.fullmatch(self.headers.get("Range", ""))
+        if match:
+            start, end = int(match.group(1)), int(match.group(2)) + 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(data)}")
+            data = data[start:end]
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        body = [data]
+
+        class Body:
+            def read(self, *args):
+                return body.pop() if body else b""
+
+            def close(self):
+                pass
+
+        return Body()
+
+
+def run_async(hrefs, concurrency, jobs):
+    async def collect():
+        return [
+            result
+            async for result in create_items_async(
+                hrefs, None, concurrency=concurrency, jobs=jobs
+            )
+        ]
+
+    return asyncio.run(collect())
+
+
+def main(latency_ms: float, copies: int, jobs: int) -> None:
+    Handler.latency = latency_ms / 1e3
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    names = sorted(path.name for path in DATA_FILES.glob("S5P_*.nc"))
+    hrefs = [f"{base}/{name}" for _ in range(copies) for name in names]
+
+    print(f"{len(hrefs)} granules, {latency_ms:g} ms per request, {jobs} workers")
+    print(f"{'pipeline':<24} {'items/s':>8}")
+    runs = [("create_items", lambda: list(create_items(hrefs, None, jobs=jobs)))]
+    for concurrency in (1, 4, 16, 64):
+        runs.append(
+            (
+                f"async, concurrency {concurrency}",
+                lambda c=concurrency: run_async(hrefs, c, jobs),
+            )
+        )
+    for name, run in runs:
+        start = time.perf_counter()
+        results = run()
+        elapsed = time.perf_counter() - start
+        errors = [result.error for result in results if result.error is not None]
+        assert not errors, errors[0]
+        print(f"{name:<24} {len(results) / elapsed:>8.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 20,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+        int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1,
+    )
@@ -0,0 +1,33 @@
+"""Measures dropping duplicate granules from a synthetic listing, ordered by
+start time, in which each granule is listed as both OFFL and NRTI, and the
+memory that takes.
+
+Usage: python benchmarks/dedup.py [names]
+"""
+
+import resource
+import sys
+import time
+from collections import Counter
+
+from granule_index import synthetic_names
+
+from stactools.sentinel5p.dedup import preferred_granules
+
+
+def main(count: int) -> None:
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    stats: Counter = Counter()
+    start = time.perf_counter()
+    kept = sum(1 for _ in preferred_granules(synthetic_names(count), stats=stats))
+    elapsed = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        f"kept {kept} of {count} names, dropped {stats['duplicates_dropped']}, "
+        f"in {elapsed:.1f} s ({count / elapsed:,.0f} names/s)"
+    )
+    print(f"peak memory grew by {(after - before) / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
@@ -0,0 +1,113 @@
+"""Compares NDJSON files of full items against dehydrated items and their
+base items: bytes written, write time, and load time, parsing every line and
+hydrating the dehydrated items.
+
+Items are copies of the netCDF4 fixture items, with footprints simplified as
+recommended for catalogs, and with their own ids, orbits and times.
+
+Usage: python benchmarks/dehydrated_items.py [items]
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from pystac.utils import datetime_to_str, str_to_datetime
+
+from stactools.sentinel5p.dehydration import BaseItems
+from stactools.sentinel5p.stac import create_item
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+ORBIT = timedelta(minutes=101)
+
+
+def fixture_items():
+    items = []
+    for path in sorted(DATA_FILES.glob("*.nc")):
+        item = create_item(str(path), simplify_tolerance=0.01, precision=4)
+        items.append(json.loads(json.dumps(item.to_dict(include_self_link=False))))
+    return items
+
+
+def synthetic_items(items, count: int):
+    """Yields copies of the items, orbit after orbit. Geometries are shared."""
+    times = [
+        {
+            name: str_to_datetime(value)
+            for name, value in item["properties"].items()
+            if name in ("datetime", "start_datetime", "end_datetime")
+        }
+        for item in items
+    ]
+    for i in range(count):
+        orbit, template = divmod(i, len(items))
+        item = dict(items[template])
+        # Names end with: orbit, collection, processor version, production time
+        parts = item["id"].split("_")
+        parts[-4] = f"{orbit % 100000:05d}"
+        item["id"] = "_".join(parts)
+        properties = item["properties"] = dict(item["properties"])
+        properties["sat:absolute_orbit"] = orbit
+        for name, value in times[template].items():
+            properties[name] = datetime_to_str(value + orbit * ORBIT)
+        item["assets"] = {
+            key: {**asset, "href": f"s3://archive/{item['id']}.nc"}
+            for key, asset in item["assets"].items()
+        }
+        yield item
+
+
+def write(items, path: str, bases=None) -> float:
+    start = time.perf_counter()
+    with open(path, "wb") as f:
+        for item in items:
+            if bases is not None:
+                item = bases.dehydrate(item)
+            f.write(json.dumps(item, separators=(",", ":")).encode("utf-8") + b"\n")
+    return time.perf_counter() - start
+
+
+def load(path: str, bases=None) -> float:
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        for line in f:
+            item = json.loads(line)
+            if bases is not None:
+                bases.hydrate(item)
+    return time.perf_counter() - start
+
+
+def main(count: int) -> None:
+    items = fixture_items()
+    print(f"{count} items")
+    print(f"{'output':<12} {'MiB':>8} {'bytes/item':>11} {'write s':>8} {'load s':>8}")
+    with TemporaryDirectory() as tmp_dir:
+        full_path = os.path.join(tmp_dir, "items.ndjson")
+        write_s = write(synthetic_items(items, count), full_path)
+        load_s = load(full_path)
+        size = os.path.getsize(full_path)
+        print(
+            f"{'full':<12} {size / 2**20:>8.1f} {size / count:>11.0f} "
+            f"{write_s:>8.1f} {load_s:>8.1f}"
+        )
+
+        dehydrated_path = os.path.join(tmp_dir, "dehydrated.ndjson")
+        bases_path = os.path.join(tmp_dir, "bases.json")
+        bases = BaseItems()
+        write_s = write(synthetic_items(items, count), dehydrated_path, bases)
+        bases.save(bases_path)
+        load_s = load(dehydrated_path, BaseItems.load(bases_path))
+        size = os.path.getsize(dehydrated_path) + os.path.getsize(bases_path)
+        print(
+            f"{'dehydrated':<12} {size / 2**20:>8.1f} {size / count:>11.0f} "
+            f"{write_s:>8.1f} {load_s:>8.1f}"
+        )
+    print("Write times include copying the fixture items")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
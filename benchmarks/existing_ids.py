@@ -0,0 +1,51 @@
+"""Compares holding the ids of existing items in a Python set, an ItemIdSet
+and a Bloom filter: memory, load time and lookups of new granules.
+
+Usage: python benchmarks/existing_ids.py [ids]
+"""
+
+import sys
+import time
+
+from granule_index import synthetic_names
+
+from stactools.sentinel5p.incremental import BloomFilter, ItemIdSet, item_id
+
+
+def main(count: int) -> None:
+    ids = [item_id(name) for name in synthetic_names(2 * count)]
+    existing, new = ids[:count], ids[count:]
+
+    start = time.perf_counter()
+    python_set = set(existing)
+    set_load = time.perf_counter() - start
+    set_bytes = sys.getsizeof(python_set) + sum(map(sys.getsizeof, existing))
+
+    start = time.perf_counter()
+    id_set = ItemIdSet(existing)
+    id_set_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bloom = BloomFilter(count)
+    for id in existing:
+        bloom.add(id)
+    bloom_load = time.perf_counter() - start
+
+    print(f"{count} ids")
+    print(f"{'':<10} {'MiB':>8} {'load s':>8} {'lookups/s':>11} {'false +':>8}")
+    for name, ids_, size, load in [
+        ("set", python_set, set_bytes, set_load),
+        ("ItemIdSet", id_set, id_set._hashes.nbytes, id_set_load),
+        ("Bloom", bloom, len(bloom._bits), bloom_load),
+    ]:
+        start = time.perf_counter()
+        false_positives = sum(id in ids_ for id in new)
+        lookup = time.perf_counter() - start
+        print(
+            f"{name:<10} {size / 2**20:>8.1f} {load:>8.1f} "
+            f"{len(new) / lookup:>11,.0f} {false_positives:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
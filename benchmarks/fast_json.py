@@ -0,0 +1,69 @@
+"""Compares the standard library json module against the fast JSON layer,
+orjson when it is installed, over the JSON sidecar fixtures: parsing the
+sidecars, dumping their items as compact JSON, and both together with
+building the items, as in sidecar-only NDJSON pipelines.
+
+Usage: python benchmarks/fast_json.py [repeat]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+from stactools.sentinel5p import fastjson
+from stactools.sentinel5p.stac import create_item_dict
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+
+def best_of(function, args, repeat: int) -> float:
+    # Best of 5 rounds, in microseconds per call
+    elapsed = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for arg in args:
+                function(arg)
+        elapsed.append(time.perf_counter() - start)
+    return 1e6 * min(elapsed) / (repeat * len(args))
+
+
+def main(repeat: int) -> None:
+    if fastjson.orjson is None:
+        print("orjson is not installed: the fast JSON layer is the json module")
+    paths = sorted(str(path) for path in DATA_FILES.glob("S5P_*.json"))
+    sidecars = [Path(path).read_bytes() for path in paths]
+    items = [create_item_dict(path) for path in paths]
+
+    def json_dumps(item):
+        return json.dumps(item, separators=(",", ":"))
+
+    def line(path):
+        return fastjson.dumpb(create_item_dict(path))
+
+    with mock.patch.object(fastjson, "orjson", None):
+        stdlib = [
+            best_of(json.loads, sidecars, repeat),
+            best_of(json_dumps, items, repeat),
+            best_of(line, paths, max(1, repeat // 10)),
+        ]
+    fast = [
+        best_of(fastjson.loads, sidecars, repeat),
+        best_of(fastjson.dumps, items, repeat),
+        best_of(line, paths, max(1, repeat // 10)),
+    ]
+    assert all(fastjson.dumps(item) == json_dumps(item) for item in items)
+
+    kib = sum(len(sidecar) for sidecar in sidecars) / len(sidecars) / 1024
+    print(f"{len(paths)} sidecars, {kib:.1f} KiB on average")
+    print(f"{'us per sidecar':<22} {'json':>8} {'fast':>8} {'speedup':>8}")
+    for name, slow, quick in zip(
+        ("parse sidecar", "dump item", "sidecar to NDJSON line"), stdlib, fast
+    ):
+        print(f"{name:<22} {slow:>8.0f} {quick:>8.0f} {slow / quick:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,63 @@
+"""Compares parsing ``gml:posList`` footprints with NumPy against the former
+pure Python parse, on the fixtures' posLists and synthetic long ones.
+
+Usage: python benchmarks/footprint_parsing.py [repeat]
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+from shapely.geometry import Polygon
+
+from stactools.sentinel5p.extraction import FOOTPRINT
+from stactools.sentinel5p.footprint import pos_list_polygon
+from stactools.sentinel5p.granule import GranuleReader
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+
+def python_polygon(pos_list: str) -> Polygon:
+    footprint_value = [float(coord) for coord in pos_list.replace(" ", ",").split(",")]
+    footprint_points = [
+        point[::-1] for point in list(zip(*[iter(footprint_value)] * 2))
+    ]
+    return Polygon(footprint_points)
+
+
+def synthetic_pos_list(vertices: int) -> str:
+    # A closed ring of a full-orbit like swath edge
+    angles = np.linspace(0, 2 * np.pi, vertices)
+    latitudes = 80 * np.sin(angles)
+    longitudes = 179 * np.cos(angles)
+    latitudes[-1], longitudes[-1] = latitudes[0], longitudes[0]
+    return " ".join(f"{lat:.6f} {lon:.6f}" for lat, lon in zip(latitudes, longitudes))
+
+
+def main(repeat: int) -> None:
+    pos_lists = {}
+    for path in sorted(DATA_FILES.glob("*.nc")):
+        if "O3_TCL" in path.name:
+            continue
+        with GranuleReader(str(path)) as granule:
+            pos_lists[path.name[4:24]] = granule.attr(FOOTPRINT, "gml:posList")
+    for vertices in (10_000, 100_000):
+        pos_lists[f"synthetic {vertices}"] = synthetic_pos_list(vertices)
+
+    print(
+        f"{'posList':<24} {'vertices':>9} {'python us':>10} {'numpy us':>10} {'speedup':>8}"
+    )
+    for name, pos_list in pos_lists.items():
+        assert python_polygon(pos_list).equals_exact(pos_list_polygon(pos_list), 0)
+        python = timeit.timeit(lambda: python_polygon(pos_list), number=repeat)
+        vectorized = timeit.timeit(lambda: pos_list_polygon(pos_list), number=repeat)
+        vertices = len(pos_list.split()) // 2
+        print(
+            f"{name:<24} {vertices:>9} {1e6 * python / repeat:>10.1f} "
+            f"{1e6 * vectorized / repeat:>10.1f} {python / vectorized:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
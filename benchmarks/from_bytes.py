@@ -0,0 +1,56 @@
+"""Compares creating the items of the fixtures, netCDF4 granules and JSON
+sidecars, from their bytes in memory with ``create_item_from_bytes``, with
+writing the bytes to a temporary file for ``create_item`` to read, as message
+queue consumers had to.
+
+Usage: python benchmarks/from_bytes.py [repeat]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from stactools.sentinel5p.stac import create_item, create_item_from_bytes
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+
+def from_temp_file(name: str, data: bytes) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        create_item(path)
+
+
+def from_bytes(name: str, data: bytes) -> None:
+    create_item_from_bytes(name, data)
+
+
+def best_time(create, files, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for name, data in files:
+            create(name, data)
+        times.append((time.perf_counter() - start) / len(files))
+    return min(times)
+
+
+def main(repeat: int) -> None:
+    print(f"best of {repeat}, temporary files in {tempfile.gettempdir()}")
+    print(f"{'files':<8} {'temp file ms':>13} {'bytes ms':>9}")
+    for suffix in (".nc", ".json"):
+        files = [
+            (path.name, path.read_bytes())
+            for path in sorted(DATA_FILES.glob(f"S5P_*{suffix}"))
+        ]
+        temp_file = best_time(from_temp_file, files, repeat)
+        in_memory = best_time(from_bytes, files, repeat)
+        print(f"{suffix:<8} {1e3 * temp_file:>13.2f} {1e3 * in_memory:>9.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
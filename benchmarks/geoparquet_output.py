@@ -0,0 +1,92 @@
+"""Compares a partitioned GeoParquet dataset of lite items against an NDJSON
+file of the same items: write throughput, size on disk, and reading back the
+items of a single product and day.
+
+Usage: python benchmarks/geoparquet_output.py [items]
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+from tempfile import TemporaryDirectory
+
+import pyarrow.parquet as pq
+from granule_index import synthetic_names
+
+from stactools.sentinel5p.geoparquet import GeoParquetWriter
+from stactools.sentinel5p.stac import create_item
+
+PRODUCT = "no2"
+DATE = "2018-05-02"
+
+
+def size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(directory, name))
+        for directory, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def write_ndjson(items, path: str) -> None:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wb") as f:
+        for item in items:
+            f.write(json.dumps(item, separators=(",", ":")).encode("utf-8") + b"\n")
+
+
+def write_geoparquet(items, path: str) -> None:
+    with GeoParquetWriter(path) as writer:
+        for item in items:
+            writer.write(item)
+
+
+def read_ndjson(path: str) -> int:
+    opener = gzip.open if path.endswith(".gz") else open
+    count = 0
+    with opener(path, "rb") as f:
+        for line in f:
+            properties = json.loads(line)["properties"]
+            if (
+                properties["s5p:product_name"] == PRODUCT
+                and properties["datetime"][:10] == DATE
+            ):
+                count += 1
+    return count
+
+
+def read_geoparquet(path: str) -> int:
+    return pq.read_table(
+        os.path.join(path, f"product={PRODUCT}", f"date={DATE}")
+    ).num_rows
+
+
+def main(count: int) -> None:
+    items = [create_item(name, lite=True).to_dict() for name in synthetic_names(count)]
+    print(f"{count} items, reading {PRODUCT} on {DATE}")
+    print(f"{'output':<16} {'write items/s':>14} {'MiB':>8} {'read ms':>9} {'rows':>6}")
+    with TemporaryDirectory() as tmp_dir:
+        for name, write, read in [
+            ("items.ndjson", write_ndjson, read_ndjson),
+            ("items.ndjson.gz", write_ndjson, read_ndjson),
+            ("geoparquet", write_geoparquet, read_geoparquet),
+        ]:
+            path = os.path.join(tmp_dir, name)
+            start = time.perf_counter()
+            write(items, path)
+            rate = count / (time.perf_counter() - start)
+            start = time.perf_counter()
+            rows = read(path)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name:<16} {rate:>14.0f} {size(path) / 2**20:>8.1f} "
+                f"{1000 * elapsed:>9.1f} {rows:>6}"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,105 @@
+"""Measures building the SQLite granule index from a synthetic archive
+listing, and querying it.
+
+Usage: python benchmarks/granule_index.py [names]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Iterator
+
+from stactools.sentinel5p.index import build_index, query_index
+
+PRODUCTS = [
+    "AER_AI",
+    "AER_LH",
+    "CH4___",
+    "CLOUD_",
+    "CO____",
+    "HCHO__",
+    "NO2___",
+    "NP_BD3",
+    "NP_BD6",
+    "NP_BD7",
+    "O3____",
+    "SO2___",
+]
+ORBIT = timedelta(minutes=101)
+FORMAT = "%Y%m%dT%H%M%S"
+EPOCH = datetime(2018, 5, 1)
+
+
+def synthetic_names(count: int) -> Iterator[str]:
+    """Yields OFFL and NRTI names of every product, orbit after orbit."""
+    orbit = 0
+    while True:
+        start = EPOCH + orbit * ORBIT
+        end = start + ORBIT
+        production = end + timedelta(days=3)
+        times = (
+            f"{start.strftime(FORMAT)}_{end.strftime(FORMAT)}_"
+            f"{orbit % 100000:05d}_01_010302_{production.strftime(FORMAT)}.nc"
+        )
+        for mode in ("OFFL", "NRTI"):
+            for product in PRODUCTS:
+                if count == 0:
+                    return
+                yield f"s3://archive/{mode}/S5P_{mode}_L2__{product}_{times}"
+                count -= 1
+        orbit += 1
+
+
+def main(count: int) -> None:
+    start = time.perf_counter()
+    for _ in synthetic_names(count):
+        pass
+    listing = time.perf_counter() - start
+    print(f"listed {count} synthetic names in {listing:.1f} s (included below)")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "index.sqlite")
+
+        start = time.perf_counter()
+        indexed, _ = build_index(synthetic_names(count), path)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+        print(
+            f"built index of {indexed} names in {elapsed:.1f} s "
+            f"({indexed / elapsed:,.0f} names/s, {size / 2**20:.0f} MiB)"
+        )
+
+        last = EPOCH + (count // (2 * len(PRODUCTS))) * ORBIT
+        queries = 0
+        rows = 0
+        start = time.perf_counter()
+        day = EPOCH
+        while day < last:
+            rows += sum(
+                1
+                for _ in query_index(
+                    path,
+                    product="NO2",
+                    mode="OFFL",
+                    start=day,
+                    end=day + timedelta(days=90),
+                )
+            )
+            queries += 1
+            day += timedelta(days=30)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{queries} queries for 90 days of OFFL NO2 in {elapsed:.2f} s "
+            f"({queries / elapsed:,.0f} queries/s, {rows / elapsed:,.0f} rows/s)"
+        )
+
+        start = time.perf_counter()
+        rows = sum(1 for _ in query_index(path))
+        elapsed = time.perf_counter() - start
+        print(f"read all {rows} rows in {elapsed:.1f} s ({rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
@@ -0,0 +1,45 @@
+"""Counts netCDF4 dataset opens and wall time per item for ``create_item``.
+
+Usage: python benchmarks/granule_open.py [repeat]
+"""
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+import netCDF4
+
+from stactools.sentinel5p.stac import create_item
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+
+def main(repeat: int) -> None:
+    opened = []
+    real_dataset = netCDF4.Dataset
+
+    def counting_dataset(*args, **kwargs):
+        dataset = real_dataset(*args, **kwargs)
+        opened.append(dataset)
+        return dataset
+
+    print(f"{'granule':<24} {'opens/item':>10} {'left open':>10} {'ms/item':>10}")
+    with mock.patch("netCDF4.Dataset", counting_dataset):
+        for path in sorted(DATA_FILES.glob("*.nc")):
+            opened.clear()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                create_item(str(path))
+            elapsed = time.perf_counter() - start
+            left_open = sum(1 for dataset in opened if dataset.isopen())
+            print(
+                f"{path.name[4:24]:<24} {len(opened) / repeat:>10.1f} "
+                f"{left_open / repeat:>10.1f} {1000 * elapsed / repeat:>10.2f}"
+            )
+            for dataset in opened:
+                if dataset.isopen():
+                    dataset.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,43 @@
+"""Counts netCDF4 group opens and attribute reads per item for ``create_item``.
+
+Usage: python benchmarks/group_attribute_reads.py [repeat]
+"""
+import sys
+import time
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+from stactools.sentinel5p import stac
+from stactools.sentinel5p.granule import GranuleReader
+from stactools.sentinel5p.stac import create_item
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+
+def main(repeat: int) -> None:
+    readers = []
+
+    class RecordingReader(GranuleReader):
+        def __init__(self, file_path: str, **kwargs: Any) -> None:
+            super().__init__(file_path, **kwargs)
+            readers.append(self)
+
+    print(f"{'granule':<24} {'group opens':>12} {'attr reads':>12} {'ms/item':>10}")
+    with mock.patch.object(stac, "GranuleReader", RecordingReader):
+        for path in sorted(DATA_FILES.glob("*.nc")):
+            readers.clear()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                create_item(str(path))
+            elapsed = time.perf_counter() - start
+            group_opens = sum(reader.stats["group_opens"] for reader in readers)
+            attr_reads = sum(reader.stats["attr_reads"] for reader in readers)
+            print(
+                f"{path.name[4:24]:<24} {group_opens / repeat:>12.1f} "
+                f"{attr_reads / repeat:>12.1f} {1000 * elapsed / repeat:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,63 @@
+"""Measures, with ``python -X importtime``, how long it takes to import the
+package and register its commands, as stactools does for every command
+it runs, and to import the modules that build items.
+
+Usage: python benchmarks/import_time.py [runs]
+"""
+
+import statistics
+import subprocess
+import sys
+
+REGISTER_PLUGIN = """
+import click
+import stactools.sentinel5p
+class Registry:
+    def register_subcommand(self, create_command):
+        create_command(click.Group())
+stactools.sentinel5p.register_plugin(Registry())
+"""
+
+CASES = {
+    "register plugin": REGISTER_PLUGIN,
+    "create_item": "from stactools.sentinel5p import create_item",
+}
+
+# Imported by stactools itself, whichever command is run
+HOST = "import click, stactools.core"
+
+
+def import_time(code: str) -> float:
+    """Returns the import time of the modules that ``code`` imports beyond
+    those of stactools, in milliseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"{HOST}\n{code}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0
+    host_done = False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if host_done and not name.startswith("  "):
+            # Top-level imports, whose cumulative times include their own
+            total += int(cumulative)
+        elif name.strip() == "stactools.core" and not name.startswith("  "):
+            host_done = True
+    return total / 1e3
+
+
+def main(runs: int) -> None:
+    print(
+        f"{'import':<16} {'ms':>8}  (median of {runs}, beyond click and stactools.core)"
+    )
+    for name, code in CASES.items():
+        times = [import_time(code) for _ in range(runs)]
+        print(f"{name:<16} {statistics.median(times):>8.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,100 @@
+"""Compares serializing items to compact JSON through ``pystac.Item`` objects,
+``create_item(...).to_dict()``, against ``create_item_dict``, for full items
+from compact sidecars of the netCDF4 fixtures and for lite items: time and
+memory allocated per item.
+
+Footprints are computed once up front and served from a cache, as fixing them
+for the antimeridian takes most of the time of full items otherwise and does
+not depend on how the rest of the item is built.
+
+Usage: python benchmarks/item_dicts.py [repeat]
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from stactools.sentinel5p.product_metadata import ProductMetadata
+from stactools.sentinel5p.sidecar import write_sidecar
+from stactools.sentinel5p.stac import create_item, create_item_dict
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+
+def through_item(href: str, lite: bool) -> str:
+    item = create_item(href, lite=lite)
+    return json.dumps(
+        item.to_dict(include_self_link=False, transform_hrefs=False),
+        separators=(",", ":"),
+    )
+
+
+def through_dict(href: str, lite: bool) -> str:
+    return json.dumps(create_item_dict(href, lite=lite), separators=(",", ":"))
+
+
+def measure(serialize, hrefs, repeat: int, lite: bool):
+    for href in hrefs:
+        serialize(href, lite)
+
+    # Best of 5 rounds
+    elapsed = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for href in hrefs:
+                serialize(href, lite)
+        elapsed.append(time.perf_counter() - start)
+    per_item = min(elapsed) / (repeat * len(hrefs))
+
+    peaks = []
+    tracemalloc.start()
+    for href in hrefs:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        serialize(href, lite)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return per_item, sum(peaks) / len(peaks)
+
+
+def main(repeat: int) -> None:
+    with TemporaryDirectory() as tmp_dir:
+        hrefs = [
+            write_sidecar(str(path), os.path.join(tmp_dir, f"{path.stem}.json"))
+            for path in sorted(DATA_FILES.glob("*.nc"))
+        ]
+        footprints = {}
+        for href in hrefs:
+            metadata = ProductMetadata(href)
+            footprints[href] = (metadata.get_geometry, metadata.get_bbox)
+
+        print(f"{'items':<6} {'path':<12} {'us/item':>8} {'peak KiB/item':>14}")
+        with mock.patch.object(
+            ProductMetadata,
+            "get_geometry",
+            property(lambda self: footprints[self.file_path][0]),
+        ), mock.patch.object(
+            ProductMetadata,
+            "get_bbox",
+            property(lambda self: list(footprints[self.file_path][1])),
+        ):
+            for name, lite in (("full", False), ("lite", True)):
+                for path, serialize in (
+                    ("pystac.Item", through_item),
+                    ("dict", through_dict),
+                ):
+                    per_item, peak = measure(serialize, hrefs, repeat, lite)
+                    print(
+                        f"{name:<6} {path:<12} {1e6 * per_item:>8.0f} "
+                        f"{peak / 1024:>14.1f}"
+                    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,55 @@
+"""Compares the size of items, and of their geometries, with footprints
+simplified and rounded against full ones, on the test fixtures.
+
+Usage: python benchmarks/item_size.py [tolerance] [precision]
+"""
+
+import json
+import sys
+from pathlib import Path
+
+from stactools.sentinel5p.stac import create_item
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+
+def size(value) -> int:
+    return len(json.dumps(value, separators=(",", ":")))
+
+
+def main(tolerance: float, precision: int) -> None:
+    print(f"tolerance {tolerance} degrees, precision {precision} decimal places")
+    print(
+        f"{'granule':<24} {'item':>7} {'simplified':>11} "
+        f"{'geometry':>9} {'simplified':>11}"
+    )
+    totals = [0, 0, 0, 0]
+    for path in sorted(DATA_FILES.glob("S5P_*")):
+        item = create_item(str(path)).to_dict()
+        simplified = create_item(
+            str(path), simplify_tolerance=tolerance, precision=precision
+        ).to_dict()
+        sizes = [
+            size(item),
+            size(simplified),
+            size(item["geometry"]),
+            size(simplified["geometry"]),
+        ]
+        totals = [total + s for total, s in zip(totals, sizes)]
+        print(
+            f"{path.name[4:24]:<24} {sizes[0]:>7} {sizes[1]:>11} {sizes[2]:>9} {sizes[3]:>11}"
+        )
+    print(
+        f"{'total':<24} {totals[0]:>7} {totals[1]:>11} {totals[2]:>9} {totals[3]:>11}"
+    )
+    print(
+        f"items {100 * (1 - totals[1] / totals[0]):.0f}% smaller, "
+        f"geometries {100 * (1 - totals[3] / totals[2]):.0f}% smaller"
+    )
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 0.01,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+    )
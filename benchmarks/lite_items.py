@@ -0,0 +1,35 @@
+"""Compares the rate of creating lite items, from the granule names alone,
+against full items read from the netCDF4 fixtures.
+
+Usage: python benchmarks/lite_items.py [repeat]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from stactools.sentinel5p.stac import create_item
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+
+def items_per_second(hrefs, repeat: int, lite: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for href in hrefs:
+            create_item(href, lite=lite).to_dict()
+    return repeat * len(hrefs) / (time.perf_counter() - start)
+
+
+def main(repeat: int) -> None:
+    hrefs = [str(path) for path in sorted(DATA_FILES.glob("*.nc"))]
+    full = items_per_second(hrefs, repeat, lite=False)
+    lite = items_per_second(hrefs, 10 * repeat, lite=True)
+    print(f"{'mode':<6} {'items/s':>10}")
+    print(f"{'full':<6} {full:>10.0f}")
+    print(f"{'lite':<6} {lite:>10.0f}")
+    print(f"lite is {lite / full:.0f}x faster")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
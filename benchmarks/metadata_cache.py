@@ -0,0 +1,55 @@
+"""Times rebuilding the items of the fixtures, netCDF4 granules and JSON
+sidecars, without the metadata cache, with a cold cache that is filled as
+items are built, and with the warm cache, as after a change to how items are
+laid out. Also reports the size of the cache entries.
+
+Usage: python benchmarks/metadata_cache.py [repeat]
+"""
+
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from stactools.sentinel5p.cache import MetadataCache
+from stactools.sentinel5p.stac import create_item_dict
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+
+def rebuild(hrefs, cache=None) -> float:
+    stats: Counter = Counter()
+    start = time.perf_counter()
+    for href in hrefs:
+        create_item_dict(href, cache=cache, stats=stats)
+    return (time.perf_counter() - start) / len(hrefs)
+
+
+def main(repeat: int) -> None:
+    hrefs = sorted(str(path) for path in DATA_FILES.glob("S5P_*"))
+    print(f"{len(hrefs)} granules and sidecars, best of {repeat}")
+    print(f"{'rebuild':<12} {'ms/item':>8}")
+    print(f"{'no cache':<12} {1e3 * min(rebuild(hrefs) for _ in range(repeat)):>8.1f}")
+
+    cold = []
+    warm = []
+    for _ in range(repeat):
+        with TemporaryDirectory() as tmp_dir:
+            cache = MetadataCache(tmp_dir)
+            cold.append(rebuild(hrefs, cache))
+            warm.append(rebuild(hrefs, cache))
+            sizes = [
+                os.path.getsize(os.path.join(root, name))
+                for root, _, names in os.walk(tmp_dir)
+                for name in names
+            ]
+    assert cache.stats["hits"] == len(hrefs), cache.stats
+    print(f"{'cold cache':<12} {1e3 * min(cold):>8.1f}")
+    print(f"{'warm cache':<12} {1e3 * min(warm):>8.1f}")
+    print(f"{len(sizes)} entries, {sum(sizes) / len(sizes) / 1024:.1f} KiB on average")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,33 @@
+"""Times ``ProductMetadata.metadata_dict`` per product type.
+
+The granule is opened once and the product metadata extracted repeatedly, so
+only the extraction itself is measured.
+
+Usage: python benchmarks/metadata_extraction.py [repeat]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from stactools.sentinel5p.product_metadata import ProductMetadata
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+
+def main(repeat: int) -> None:
+    print(f"{'granule':<24} {'format':>6} {'us/extraction':>14}")
+    for path in sorted(DATA_FILES.iterdir(), key=lambda p: p.name[9:]):
+        product_metadata = ProductMetadata(str(path))
+        start = time.perf_counter()
+        for _ in range(repeat):
+            product_metadata.metadata_dict
+        elapsed = time.perf_counter() - start
+        print(
+            f"{path.name[4:24]:<24} {path.suffix[1:]:>6} "
+            f"{1e6 * elapsed / repeat:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
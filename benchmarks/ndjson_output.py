@@ -0,0 +1,72 @@
+"""Compares writing lite items as one JSON file each against streaming them
+into an NDJSON file, plain and gzip compressed: items per second, output
+size, and peak memory, which stays flat as the number of items grows.
+
+Usage: python benchmarks/ndjson_output.py [items]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from tempfile import TemporaryDirectory
+
+import pystac
+from granule_index import synthetic_names
+
+from stactools.sentinel5p.batch import create_items
+from stactools.sentinel5p.ndjson import open_ndjson
+
+
+def write_files(names, dst: str) -> None:
+    stac_io = pystac.StacIO.default()
+    for result in create_items(names, dst, jobs=1, lite=True):
+        stac_io.write_text(
+            os.path.join(dst, f"{result.item_id}.json"), result.item_json
+        )
+
+
+def write_ndjson(names, dst: str) -> None:
+    with open_ndjson(dst) as f:
+        for result in create_items(names, None, jobs=1, lite=True):
+            f.write(result.item_json.encode("utf-8") + b"\n")
+
+
+def size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(entry.stat().st_size for entry in os.scandir(path))
+
+
+def run(write, count: int, dst: str):
+    start = time.perf_counter()
+    write(synthetic_names(count), dst)
+    elapsed = time.perf_counter() - start
+    nbytes = size(dst)
+    # Traced separately, as tracing slows item creation down several times
+    tracemalloc.start()
+    write(synthetic_names(count), dst)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count / elapsed, nbytes, peak
+
+
+def main(count: int) -> None:
+    print(f"{'output':<15} {'items':>8} {'items/s':>9} {'MiB':>8} {'peak MiB':>9}")
+    with TemporaryDirectory() as tmp_dir:
+        for n in (count // 10, count):
+            for name in ("files", "items.ndjson", "items.ndjson.gz"):
+                dst = os.path.join(tmp_dir, f"{n}-{name}")
+                if name == "files":
+                    os.mkdir(dst)
+                    rate, nbytes, peak = run(write_files, n, dst)
+                else:
+                    rate, nbytes, peak = run(write_ndjson, n, dst)
+                print(
+                    f"{name:<15} {n:>8} {rate:>9.0f} {nbytes / 2**20:>8.1f} "
+                    f"{peak / 2**20:>9.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,46 @@
+"""Counts bytes and byte ranges read per item for ``create_item`` on fsspec URLs.
+
+The granules are read through ``file://`` URLs, so the counts are those that
+would be fetched from object storage.
+
+Usage: python benchmarks/remote_bytes_read.py [block_size]
+"""
+import sys
+import time
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+from stactools.sentinel5p import stac
+from stactools.sentinel5p.granule import GranuleReader
+from stactools.sentinel5p.remote import DEFAULT_BLOCK_SIZE
+from stactools.sentinel5p.stac import create_item
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+
+def main(block_size: int) -> None:
+    readers = []
+
+    def recording_reader(file_path: str, **kwargs: Any) -> GranuleReader:
+        reader = GranuleReader(file_path, block_size=block_size, **kwargs)
+        readers.append(reader)
+        return reader
+
+    print(f"{'granule':<24} {'file KB':>8} {'read KB':>8} {'ranges':>7} {'ms/item':>8}")
+    with mock.patch.object(stac, "GranuleReader", recording_reader):
+        for path in sorted(DATA_FILES.glob("*.nc")):
+            readers.clear()
+            start = time.perf_counter()
+            create_item(path.as_uri())
+            elapsed = time.perf_counter() - start
+            stats = readers[0].stats
+            print(
+                f"{path.name[4:24]:<24} {path.stat().st_size / 1024:>8.1f} "
+                f"{stats['bytes_read'] / 1024:>8.1f} {stats['range_requests']:>7} "
+                f"{1000 * elapsed:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BLOCK_SIZE)
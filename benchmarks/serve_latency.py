@@ -0,0 +1,84 @@
+"""Compares the latency of creating the item of a granule with a cold
+``stac sentinel5p create-item`` call, which starts the interpreter and loads
+netCDF4 and pystac every time, with a request to a running
+``stac sentinel5p serve``, sent once the previous one is answered.
+
+Usage: python benchmarks/serve_latency.py [rounds]
+"""
+
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+STAC = shutil.which("stac") or "stac"
+
+
+def cold_latencies(hrefs, rounds):
+    latencies = []
+    with TemporaryDirectory() as tmp_dir:
+        for _ in range(rounds):
+            for href in hrefs:
+                start = time.perf_counter()
+                subprocess.run(
+                    [STAC, "sentinel5p", "create-item", href, tmp_dir],
+                    check=True,
+                    capture_output=True,
+                )
+                latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def served_latencies(hrefs, rounds):
+    server = subprocess.Popen(
+        [STAC, "sentinel5p", "serve", "--jobs", "1"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert server.stdin is not None and server.stdout is not None
+
+    def request(line):
+        server.stdin.write(line + "\n")
+        server.stdin.flush()
+        response = json.loads(server.stdout.readline())
+        assert "error" not in response, response
+        return response
+
+    try:
+        # Waits for the server to start, and its worker to warm up
+        request(json.dumps({"href": hrefs[0]}))
+        latencies = []
+        for _ in range(rounds):
+            for href in hrefs:
+                start = time.perf_counter()
+                request(json.dumps({"href": href}))
+                latencies.append(time.perf_counter() - start)
+    finally:
+        server.stdin.close()
+        server.wait()
+    return latencies
+
+
+def main(rounds: int) -> None:
+    hrefs = sorted(str(path) for path in DATA_FILES.glob("S5P_*.nc"))
+    print(f"{len(hrefs)} granules, {rounds} rounds")
+    print(f"{'create item':<12} {'median ms':>10} {'p90 ms':>8}")
+    for name, latencies in (
+        ("cold CLI", cold_latencies(hrefs, rounds)),
+        ("serve", served_latencies(hrefs, rounds)),
+    ):
+        p90 = statistics.quantiles(latencies, n=10)[-1]
+        print(
+            f"{name:<12} {1e3 * statistics.median(latencies):>10.1f} {1e3 * p90:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
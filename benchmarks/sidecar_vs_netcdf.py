@@ -0,0 +1,50 @@
+"""Compares ``create_item`` from netCDF4 granules with ``prefer_sidecar``.
+
+A compact sidecar is written next to a copy of each netCDF4 granule in
+``tests/data-files``, one per product type, and its size reported along with
+that of the granule and of its gzip compressed sidecar.
+
+Usage: python benchmarks/sidecar_vs_netcdf.py [repeat]
+"""
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from stactools.sentinel5p.sidecar import write_sidecar
+from stactools.sentinel5p.stac import create_item
+
+DATA_FILES = Path(__file__).parents[1] / "tests" / "data-files"
+
+
+def _ms_per_item(href: str, repeat: int, prefer_sidecar: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        create_item(href, prefer_sidecar=prefer_sidecar)
+    return 1000 * (time.perf_counter() - start) / repeat
+
+
+def main(repeat: int) -> None:
+    print(
+        f"{'granule':<24} {'nc KB':>7} {'json KB':>8} {'gz KB':>6} "
+        f"{'netcdf ms':>10} {'sidecar ms':>11} {'speedup':>8}"
+    )
+    with TemporaryDirectory() as tmp_dir:
+        for path in sorted(DATA_FILES.glob("*.nc")):
+            href = shutil.copy(path, tmp_dir)
+            compressed = os.path.getsize(write_sidecar(href, compress=True))
+            sidecar = os.path.getsize(write_sidecar(href))
+            netcdf_ms = _ms_per_item(href, repeat, prefer_sidecar=False)
+            sidecar_ms = _ms_per_item(href, repeat, prefer_sidecar=True)
+            print(
+                f"{path.name[4:24]:<24} {path.stat().st_size / 1024:>7.1f} "
+                f"{sidecar / 1024:>8.1f} {compressed / 1024:>6.1f} "
+                f"{netcdf_ms:>10.2f} {sidecar_ms:>11.2f} "
+                f"{netcdf_ms / sidecar_ms:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
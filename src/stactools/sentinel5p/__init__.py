@@ -1,10 +1,28 @@
-import stactools.core
+"""stactools-sentinel5p: STAC items of Sentinel-5P scenes.
 
-from stactools.sentinel5p.stac import create_item
+Importing the package, and registering its commands with stactools, loads
+only click; the modules that read granules and build items, and their heavy
+dependencies, are loaded when first used.
+"""
 
-__all__ = ["create_item"]
+from typing import TYPE_CHECKING, Any
 
-stactools.core.use_fsspec()
+if TYPE_CHECKING:
+    from stactools.sentinel5p.stac import (
+        create_item,
+        create_item_dict,
+        create_item_from_bytes,
+    )
+
+__all__ = ["create_item", "create_item_dict", "create_item_from_bytes"]
+
+
+def __getattr__(name: str) -> Any:
+    if name in __all__:
+        from stactools.sentinel5p import stac
+
+        return getattr(stac, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def register_plugin(registry):
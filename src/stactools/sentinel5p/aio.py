@@ -0,0 +1,212 @@
+"""An asyncio pipeline that creates the items of many granules in object
+storage, where the time per item is spent waiting on requests rather than
+reading HDF5.
+
+The metadata of up to ``concurrency`` granules is fetched at a time with the
+async fsspec filesystems of their URLs: the whole of JSON sidecars and of
+small granules, and the leading and trailing ``prefetch_size`` bytes of larger
+netCDF4 granules, where HDF5 keeps the superblock and the metadata written
+last. The fetched bytes are handed to worker processes that build the items,
+fetching only the blocks that lie outside them, and items are written to
+their destination asynchronously.
+
+Local paths, and filesystems without an async implementation, are read and
+written through a thread pool instead.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+
+import fsspec  # type: ignore
+
+from .batch import BatchResult, create_item_json
+from .cache import MetadataCache
+from .remote import DEFAULT_BLOCK_SIZE, Prefetched, is_url
+from .sidecar import sidecar_href
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_PREFETCH_SIZE = 2**20
+
+
+class _Filesystems:
+    """The filesystems of the URLs read and written by one run of the
+    pipeline, async ones bound to its event loop."""
+
+    def __init__(self) -> None:
+        self._filesystems: Dict[str, Any] = {}
+
+    def get(self, href: str) -> Tuple[Any, str]:
+        protocol = fsspec.core.split_protocol(href)[0] or "file"
+        fs = self._filesystems.get(protocol)
+        if fs is None:
+            if fsspec.get_filesystem_class(protocol).async_impl:
+                # Not shared with other event loops through the instance cache
+                fs = fsspec.filesystem(
+                    protocol, asynchronous=True, skip_instance_cache=True
+                )
+            else:
+                fs = fsspec.filesystem(protocol)
+            self._filesystems[protocol] = fs
+        return fs, fs._strip_protocol(href)
+
+    async def call(self, href: str, method: str, *args: Any) -> Any:
+        """Calls a method of the filesystem of an href on its path, awaiting
+        the coroutine of async filesystems."""
+        fs, path = self.get(href)
+        if fs.async_impl:
+            return await getattr(fs, f"_{method}")(path, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(getattr(fs, method), path, *args)
+        )
+
+    async def close(self) -> None:
+        for fs in self._filesystems.values():
+            session = getattr(fs, "_session", None)
+            if fs.async_impl and session is not None:
+                await session.close()
+
+
+async def _prefetch(
+    filesystems: _Filesystems, href: str, prefetch_size: int = DEFAULT_PREFETCH_SIZE
+) -> Prefetched:
+    """Fetches the byte ranges that hold the metadata of a granule at a URL:
+    all of a JSON sidecar or of a granule up to twice ``prefetch_size``, and
+    the leading and trailing ``prefetch_size`` bytes of larger granules."""
+    info = await filesystems.call(href, "info")
+    size = info["size"]
+    if not href.endswith(".nc") or size <= 2 * prefetch_size:
+        return Prefetched(size, ((0, await filesystems.call(href, "cat_file")),))
+    # The tail starts on a block, so that the blocks read through it are whole
+    tail = (size - prefetch_size) // DEFAULT_BLOCK_SIZE * DEFAULT_BLOCK_SIZE
+    head_data, tail_data = await asyncio.gather(
+        filesystems.call(href, "cat_file", 0, prefetch_size),
+        filesystems.call(href, "cat_file", tail, size),
+    )
+    return Prefetched(size, ((0, head_data), (tail, tail_data)))
+
+
+async def _find_sidecar(filesystems: _Filesystems, href: str) -> Optional[str]:
+    # As sidecar.find_sidecar, without blocking the event loop
+    if not href.endswith(".nc"):
+        return None
+    for compress in (False, True):
+        candidate = sidecar_href(href, compress)
+        if await filesystems.call(candidate, "exists"):
+            return candidate
+    return None
+
+
+async def create_items_async(
+    hrefs: Iterable[str],
+    dst: Optional[str],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    jobs: Optional[int] = None,
+    prefer_sidecar: bool = False,
+    simplify_tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+    lite: bool = False,
+    cache: Optional[MetadataCache] = None,
+    prefetch_size: int = DEFAULT_PREFETCH_SIZE,
+) -> AsyncIterator[BatchResult]:
+    """Creates, and writes, the items of many granules, fetching the metadata
+    of granules at URLs with asyncio.
+
+    Args:
+        hrefs (Iterable[str]): The hrefs of the granules.
+        dst (Optional[str]): The directory, or URL, to write the items in, as
+            ``<id>.json``; or ``None`` not to write them, and for single-line
+            items without self links, for NDJSON.
+        concurrency (int): The number of granules whose metadata is fetched,
+            or whose items are built or written, at a time.
+        jobs (Optional[int]): The number of worker processes building items.
+            Defaults to the number of CPUs; ``1`` builds them in a thread of
+            the current process.
+        prefer_sidecar (bool): Read the metadata from the JSON sidecars next to
+            the granules, where there are any.
+        simplify_tolerance (Optional[float]): Simplify the footprints within
+            this tolerance, in degrees.
+        precision (Optional[int]): Round the footprints' coordinates to this
+            number of decimal places.
+        lite (bool): Build lite items from the granule names alone, fetching
+            nothing.
+        cache (Optional[MetadataCache]): A cache of the metadata read from
+            granules, shared by the worker processes.
+        prefetch_size (int): The number of bytes fetched from each end of
+            netCDF4 granules at URLs, ahead of building their items.
+
+    Returns:
+        AsyncIterator[BatchResult]: One result per granule, in completion
+        order. The number of bytes fetched ahead is counted in their stats
+        under ``bytes_prefetched``.
+    """
+    filesystems = _Filesystems()
+    executor: Executor
+    if jobs == 1:
+        # netCDF4 is not thread safe, so granules are read one at a time
+        executor = ThreadPoolExecutor(max_workers=1)
+    else:
+        executor = ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1)
+    loop = asyncio.get_running_loop()
+
+    async def convert(href: str) -> BatchResult:
+        try:
+            source = href
+            if prefer_sidecar and not lite and is_url(href):
+                source = await _find_sidecar(filesystems, href) or href
+            prefetched = None
+            if not lite and is_url(source):
+                prefetched = await _prefetch(filesystems, source, prefetch_size)
+            task = functools.partial(
+                create_item_json,
+                source,
+                dst,
+                # Already looked for, without blocking
+                prefer_sidecar=prefer_sidecar and not is_url(href),
+                simplify_tolerance=simplify_tolerance,
+                precision=precision,
+                lite=lite,
+                cache=cache,
+                prefetched=prefetched,
+            )
+            result = await loop.run_in_executor(executor, task)
+            stats = dict(result.stats or {})
+            if prefetched is not None:
+                stats["bytes_prefetched"] = sum(
+                    len(data) for _, data in prefetched.ranges
+                )
+            result = result._replace(href=href, stats=stats)
+            if dst is not None and result.item_json is not None:
+                path = os.path.join(dst, f"{result.item_id}.json")
+                data = result.item_json.encode("utf-8")
+                await filesystems.call(path, "pipe_file", data)
+            return result
+        except Exception as e:
+            return BatchResult(href, error=f"{type(e).__name__}: {e}")
+
+    pending: Set["asyncio.Future[BatchResult]"] = set()
+    try:
+        if dst is not None and not is_url(dst):
+            os.makedirs(dst, exist_ok=True)
+        for href in hrefs:
+            pending.add(asyncio.ensure_future(convert(href)))
+            if len(pending) >= concurrency:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        await filesystems.close()
@@ -0,0 +1,320 @@
+import functools
+import glob
+import os
+import sys
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from typing import (
+    Any,
+    Callable,
+    Counter,
+    Dict,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import pystac
+
+from . import fastjson
+from .cache import MetadataCache
+from .granule import JSON_SUFFIXES
+from .remote import Prefetched
+from .sidecar import netcdf_href, sidecar_href, write_sidecar
+from .stac import read_granule_record
+
+GRANULE_SUFFIXES = (".nc",) + JSON_SUFFIXES
+
+T = TypeVar("T")
+
+
+class BatchResult(NamedTuple):
+    """The outcome of creating the item for one granule of a batch.
+
+    Items are carried as serialized JSON rather than as ``pystac.Item``
+    objects, so that results from worker processes are cheap to send back.
+    """
+
+    href: str
+    item_id: Optional[str] = None
+    item_json: Optional[str] = None
+    error: Optional[str] = None
+    stats: Optional[Dict[str, int]] = None
+
+
+class SidecarResult(NamedTuple):
+    """The outcome of writing the sidecar of one granule of a batch."""
+
+    href: str
+    sidecar_href: Optional[str] = None
+    error: Optional[str] = None
+
+
+def expand_sources(sources: Iterable[str]) -> Iterator[str]:
+    """Expands batch sources into granule hrefs.
+
+    Args:
+        sources (Iterable[str]): Granule hrefs, glob patterns, directories
+            (searched for ``.nc`` granules and ``.json`` or ``.json.gz``
+            sidecars), or ``-`` to read one href per line from stdin.
+
+    Returns:
+        Iterator[str]: The granule hrefs, in the order they were found. The
+        sidecars of granules in the same directory are left out, so that their
+        scenes are not created twice.
+    """
+    for source in sources:
+        if source == "-":
+            for line in sys.stdin:
+                href = line.strip()
+                if href:
+                    yield href
+        elif os.path.isdir(source):
+            names = sorted(os.listdir(source))
+            netcdf_names = {name for name in names if name.endswith(".nc")}
+            for name in names:
+                if not name.endswith(GRANULE_SUFFIXES):
+                    continue
+                if name not in netcdf_names and netcdf_href(name) in netcdf_names:
+                    continue
+                yield os.path.join(source, name)
+        elif glob.has_magic(source):
+            yield from sorted(glob.iglob(source))
+        else:
+            yield source
+
+
+def create_item_json(
+    href: str,
+    dst: Optional[str],
+    prefer_sidecar: bool = False,
+    simplify_tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+    lite: bool = False,
+    cache: Optional[MetadataCache] = None,
+    prefetched: Optional[Prefetched] = None,
+) -> BatchResult:
+    """Creates the item for a single granule and serializes it.
+
+    Any error is caught and reported in the result, so that one bad granule
+    does not stop a batch.
+
+    Args:
+        href (str): The href of the granule.
+        dst (Optional[str]): The directory the item will be saved in; used for
+            its self link. If ``None``, the item has no self link and is
+            serialized on a single line, for NDJSON.
+        prefer_sidecar (bool): Read the metadata from the JSON sidecar next to
+            the granule, if there is one.
+        simplify_tolerance (Optional[float]): Simplify the footprint within
+            this tolerance, in degrees.
+        precision (Optional[int]): Round the footprint's coordinates to this
+            number of decimal places.
+        lite (bool): Build a lite item from the granule name alone.
+        cache (Optional[MetadataCache]): A cache of the metadata read from
+            granules.
+        prefetched (Optional[Prefetched]): Byte ranges of the granule, at a
+            URL, already fetched.
+
+    Returns:
+        BatchResult: The item id, JSON and the counts of reading the granule,
+        or the error.
+    """
+    try:
+        stats: Counter[str] = Counter()
+        kwargs: Dict[str, Any] = {
+            "prefer_sidecar": prefer_sidecar,
+            "stats": stats,
+            "simplify_tolerance": simplify_tolerance,
+            "precision": precision,
+            "lite": lite,
+            "cache": cache,
+            "prefetched": prefetched,
+        }
+        record = read_granule_record(href, **kwargs)
+        if dst is None:
+            # Serialized straight away, so the pystac.Item is never built
+            item_dict = record.to_dict()
+            item_id = item_dict["id"]
+            item_json = fastjson.dumps(item_dict)
+        else:
+            item = record.to_item()
+            item_id = item.id
+            item.set_self_href(os.path.join(dst, f"{item.id}.json"))
+            item_json = pystac.StacIO.default().json_dumps(
+                item.to_dict(include_self_link=True, transform_hrefs=True)
+            )
+        return BatchResult(
+            href, item_id=item_id, item_json=item_json, stats=dict(stats)
+        )
+    except Exception as e:
+        return BatchResult(href, error=f"{type(e).__name__}: {e}")
+
+
+def write_sidecar_result(
+    href: str, dst: Optional[str] = None, compact: bool = True, compress: bool = False
+) -> SidecarResult:
+    """Writes the sidecar of a single granule.
+
+    Any error is caught and reported in the result, so that one bad granule
+    does not stop a batch.
+
+    Args:
+        href (str): The href of the granule.
+        dst (Optional[str]): The directory to write the sidecar in. Defaults to
+            the directory of the granule.
+        compact (bool): Only write the metadata items are built from.
+        compress (bool): Gzip compress the sidecar.
+
+    Returns:
+        SidecarResult: The href of the sidecar, or the error.
+    """
+    try:
+        sidecar = sidecar_href(href, compress)
+        if dst is not None:
+            sidecar = os.path.join(dst, os.path.basename(sidecar))
+        return SidecarResult(
+            href,
+            sidecar_href=write_sidecar(href, sidecar, compact, compress),
+        )
+    except Exception as e:
+        return SidecarResult(href, error=f"{type(e).__name__}: {e}")
+
+
+def _run(
+    task: Callable[[str], T],
+    hrefs: Iterable[str],
+    jobs: Optional[int],
+    result_type: Callable[..., T],
+) -> Iterator[T]:
+    """Runs a task for many granules over a pool of worker processes.
+
+    netCDF4/HDF5 is not thread safe, so the granules are read in separate
+    processes. At most a few granules per worker are queued at a time, so
+    ``hrefs`` may be an arbitrarily long stream.
+
+    A worker that dies, such as on a crash reading a corrupt granule, breaks
+    the pool: the granules queued in it are reported as failed, with results
+    of ``result_type``, and the rest of the batch runs in a new pool.
+    """
+    if jobs == 1:
+        for href in hrefs:
+            yield task(href)
+        return
+
+    workers = jobs or os.cpu_count() or 1
+    max_pending = 4 * workers
+    executor = ProcessPoolExecutor(max_workers=workers)
+    # The href, and the pool, of each queued granule
+    pending: Dict["Future[T]", Tuple[str, ProcessPoolExecutor]] = {}
+
+    def restart() -> None:
+        nonlocal executor
+        executor.shutdown(wait=False)
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    def results(futures: Iterable["Future[T]"]) -> Iterator[T]:
+        for future in futures:
+            href, owner = pending.pop(future)
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                result = result_type(href, error=f"{type(e).__name__}: {e}")
+                if owner is executor:
+                    restart()
+            yield result
+
+    try:
+        for href in hrefs:
+            try:
+                future = executor.submit(task, href)
+            except BrokenProcessPool:
+                # Broken since its last results were collected
+                restart()
+                future = executor.submit(task, href)
+            pending[future] = (href, executor)
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from results(done)
+        yield from results(as_completed(list(pending)))
+    finally:
+        executor.shutdown()
+
+
+def create_items(
+    hrefs: Iterable[str],
+    dst: Optional[str],
+    jobs: Optional[int] = None,
+    prefer_sidecar: bool = False,
+    simplify_tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+    lite: bool = False,
+    cache: Optional[MetadataCache] = None,
+) -> Iterator[BatchResult]:
+    """Creates items for many granules over a pool of worker processes.
+
+    Args:
+        hrefs (Iterable[str]): The hrefs of the granules.
+        dst (Optional[str]): The directory the items will be saved in, or
+            ``None`` for single-line items without self links, for NDJSON.
+        jobs (Optional[int]): The number of worker processes. Defaults to the
+            number of CPUs; ``1`` creates the items in the current process.
+        prefer_sidecar (bool): Read the metadata from the JSON sidecars next to
+            the granules, where there are any.
+        simplify_tolerance (Optional[float]): Simplify the footprints within
+            this tolerance, in degrees.
+        precision (Optional[int]): Round the footprints' coordinates to this
+            number of decimal places.
+        lite (bool): Build lite items from the granule names alone.
+        cache (Optional[MetadataCache]): A cache of the metadata read from
+            granules, shared by the worker processes.
+
+    Returns:
+        Iterator[BatchResult]: One result per granule, in completion order.
+    """
+    task = functools.partial(
+        create_item_json,
+        dst=dst,
+        prefer_sidecar=prefer_sidecar,
+        simplify_tolerance=simplify_tolerance,
+        precision=precision,
+        lite=lite,
+        cache=cache,
+    )
+    return _run(task, hrefs, jobs, BatchResult)
+
+
+def write_sidecars(
+    hrefs: Iterable[str],
+    dst: Optional[str] = None,
+    jobs: Optional[int] = None,
+    compact: bool = True,
+    compress: bool = False,
+) -> Iterator[SidecarResult]:
+    """Writes the sidecars of many granules over a pool of worker processes.
+
+    Args:
+        hrefs (Iterable[str]): The hrefs of the granules.
+        dst (Optional[str]): The directory to write the sidecars in. Defaults
+            to the directory of each granule.
+        jobs (Optional[int]): The number of worker processes. Defaults to the
+            number of CPUs; ``1`` writes the sidecars in the current process.
+        compact (bool): Only write the metadata items are built from.
+        compress (bool): Gzip compress the sidecars.
+
+    Returns:
+        Iterator[SidecarResult]: One result per granule, in completion order.
+    """
+    task = functools.partial(
+        write_sidecar_result, dst=dst, compact=compact, compress=compress
+    )
+    return _run(task, hrefs, jobs, SidecarResult)
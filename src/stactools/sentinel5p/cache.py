@@ -0,0 +1,181 @@
+"""A persistent cache of the metadata read from granules, so that items can be
+rebuilt, after a change to how they are laid out, without reading every
+granule again.
+
+Entries are content addressed: they are keyed by a hash of the granule's href,
+size and ETag or modification time, of the package and extractor versions, and
+of the options that change what is read, such as footprint simplification. A
+granule that changes, or a new version of the package, misses the cache
+rather than serving stale metadata.
+
+Entries are zlib compressed pickles, one file per entry. The cache holds at
+most about ``max_size`` bytes: entries are touched when read, and the least
+recently used are evicted first. Worker processes each keep their own count
+of the size of the cache, so with many of them it may briefly exceed its
+cap. Only use a cache directory that you trust, as entries are unpickled.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import zlib
+from typing import Any, Counter, Dict, Optional, Tuple
+
+DEFAULT_MAX_SIZE = 2**30
+
+# Evicting down to below the cap leaves room for a few entries before the
+# next eviction, which has to list the whole cache
+_LOW_WATER = 0.9
+
+
+def fingerprint(href: str) -> Optional[Dict[str, Any]]:
+    """Returns what identifies the content of a granule without reading it:
+    its size, and its ETag or modification time; or ``None`` if the
+    granule does not exist or has neither."""
+    import fsspec  # type: ignore
+
+    fs, path = fsspec.core.url_to_fs(href)
+    try:
+        info = fs.info(path)
+    except FileNotFoundError:
+        return None
+    version = info.get("ETag") or info.get("etag")
+    if version is None:
+        version = info.get("mtime") or info.get("LastModified") or info.get("created")
+    if version is None:
+        return None
+    return {"size": info.get("size"), "version": str(version)}
+
+
+class MetadataCache:
+    """A cache of granule metadata in a local directory.
+
+    Hits, misses, writes and evictions are counted in :attr:`stats`.
+
+    Args:
+        directory (str): The directory of the cache, created if it does not
+            exist.
+        max_size (int): The size, in bytes, the cache is kept below.
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.stats: Counter[str] = Counter()
+        self._size: Optional[int] = None
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Tasks sent to worker processes share one cache per process, rather
+        # than each counting the size of the cache again
+        return (open_cache, (self.directory, self.max_size))
+
+    def key(self, href: str, **options: Any) -> Optional[str]:
+        """Returns the key of the metadata of a granule read with some
+        options, or ``None`` if it cannot be cached."""
+        content = fingerprint(href)
+        if content is None:
+            return None
+        # Imported here, so that the commands load without the extractor
+        from . import __version__
+        from .extraction import EXTRACTOR_VERSION
+
+        material = json.dumps(
+            [href, content, __version__, EXTRACTOR_VERSION, options],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the value of a key, or ``None`` if it is not cached."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            value = pickle.loads(zlib.decompress(data))
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return None
+        except Exception:
+            # A corrupt entry, such as one cut short by a full disk
+            self._remove(path)
+            self.stats["misses"] += 1
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.stats["hits"] += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Caches a value under a key, evicting the least recently used
+        entries if the cache grows over its size."""
+        data = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and moved into place, so that readers never see a
+        # partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.stats["writes"] += 1
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += len(data)
+        if self._size > self.max_size:
+            self._evict()
+
+    def _entries(self):
+        for prefix in os.scandir(self.directory):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if entry.name.endswith(".tmp"):
+                    # Being written
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, entry.path
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in entries:
+            if size <= self.max_size * _LOW_WATER:
+                break
+            self._remove(path)
+            size -= entry_size
+            self.stats["evictions"] += 1
+        self._size = size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+_CACHES: Dict[Tuple[str, int], MetadataCache] = {}
+
+
+def open_cache(directory: str, max_size: int = DEFAULT_MAX_SIZE) -> MetadataCache:
+    """Returns the cache in a directory, the same one for the whole process."""
+    cache = _CACHES.get((directory, max_size))
+    if cache is None:
+        cache = _CACHES[directory, max_size] = MetadataCache(directory, max_size)
+    return cache
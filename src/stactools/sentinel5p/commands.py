@@ -1,13 +1,153 @@
+import contextlib
+import functools
 import logging
 import os
+import sys
+from typing import Counter
 
 import click
 
-from stactools.sentinel5p.stac import create_item
+# Only modules that load quickly are imported here, as stactools creates the
+# commands of every plugin whichever command is run; the others are imported
+# by the commands that use them
+from stactools.sentinel5p.cache import DEFAULT_MAX_SIZE, open_cache
+from stactools.sentinel5p.dedup import (
+    DEFAULT_MODES,
+    DEFAULT_PRECEDENCE,
+    PRECEDENCE_FIELDS,
+    preferred_granules,
+    sort_by_start_time,
+)
+from stactools.sentinel5p.index import build_index, query_index
 
 logger = logging.getLogger(__name__)
 
 
+def footprint_options(function):
+    """Adds the footprint simplification options to a command."""
+    function = click.option(
+        "--precision",
+        type=click.IntRange(min=0),
+        help="Round footprint coordinates to this number of decimal places",
+    )(function)
+    function = click.option(
+        "--simplify-tolerance",
+        type=click.FloatRange(min=0),
+        help="Simplify footprints, keeping them within this distance in "
+        "degrees of the original",
+    )(function)
+    return function
+
+
+def lite_option(function):
+    """Adds the lite item option to a command."""
+    return click.option(
+        "--lite",
+        is_flag=True,
+        help="Build items from the scene names alone, without reading the "
+        "scenes; they are flagged with s5p:lite",
+    )(function)
+
+
+def cache_options(function):
+    """Adds the metadata cache options to a command."""
+    function = click.option(
+        "--cache-size",
+        type=click.IntRange(min=1),
+        default=DEFAULT_MAX_SIZE // 2**20,
+        show_default=True,
+        help="Size of the metadata cache, in MiB",
+    )(function)
+    function = click.option(
+        "--cache",
+        "cache_dir",
+        metavar="DIR",
+        help="Cache the metadata read from scenes in DIR, and build the items "
+        "of scenes that have not changed from it",
+    )(function)
+    return function
+
+
+def _open_cache(cache_dir, cache_size):
+    if cache_dir is None:
+        return None
+    return open_cache(cache_dir, cache_size * 2**20)
+
+
+def _comma_separated(choices=None):
+    def callback(ctx, param, value):
+        values = tuple(v.strip() for v in value.split(",") if v.strip())
+        for v in values:
+            if choices is not None and v not in choices:
+                raise click.BadParameter(
+                    f"{v!r} is not one of {', '.join(choices)}", ctx, param
+                )
+        return values
+
+    return callback
+
+
+def dedup_options(function):
+    """Adds the options that drop duplicate scenes to a command."""
+    function = click.option(
+        "--mode-precedence",
+        default=",".join(DEFAULT_MODES),
+        show_default=True,
+        callback=_comma_separated(),
+        help="Processing modes, most preferred first",
+    )(function)
+    function = click.option(
+        "--precedence",
+        default=",".join(DEFAULT_PRECEDENCE),
+        show_default=True,
+        callback=_comma_separated(PRECEDENCE_FIELDS),
+        help="Fields of the scene names that duplicates are chosen between by, "
+        "in order",
+    )(function)
+    function = click.option(
+        "--dedup",
+        is_flag=True,
+        help="Keep only the preferred scene of each product, orbit, start and "
+        "end time; scenes read from stdin must be ordered by start time, as "
+        "query-index lists them",
+    )(function)
+    return function
+
+
+def _dedup(hrefs, dedup, precedence, mode_precedence, stats):
+    if not dedup:
+        return hrefs
+    return preferred_granules(hrefs, precedence, mode_precedence, stats)
+
+
+def incremental_options(function):
+    """Adds the options that skip scenes with existing items to a command."""
+    function = click.option(
+        "--bloom",
+        is_flag=True,
+        help="Hold the ids of existing items in a Bloom filter, for very large "
+        "catalogs",
+    )(function)
+    function = click.option(
+        "--existing",
+        multiple=True,
+        help="NDJSON file of items, index, or directory of items to skip the "
+        "scenes of, besides the destination; implies --incremental",
+    )(function)
+    function = click.option(
+        "--incremental",
+        is_flag=True,
+        help="Skip scenes whose items are in the destination already, without "
+        "opening them",
+    )(function)
+    return function
+
+
+async def _handle_async(results, handle):
+    async for result in results:
+        handle(result)
+
+
 def create_sentinel5p_command(cli):
     """Creates the stactools-sentinel5p command line utility."""
 
@@ -23,16 +163,481 @@ def create_sentinel5p_command(cli):
     )
     @click.argument("src")
     @click.argument("dst")
-    def create_item_command(src, dst):
+    @click.option(
+        "--prefer-sidecar",
+        is_flag=True,
+        help="Read metadata from the JSON sidecar next to the netCDF4 file, "
+        "if there is one",
+    )
+    @footprint_options
+    @lite_option
+    @cache_options
+    def create_item_command(
+        src,
+        dst,
+        prefer_sidecar,
+        simplify_tolerance,
+        precision,
+        lite,
+        cache_dir,
+        cache_size,
+    ):
         """Creates a STAC Item
 
         Args:
             src: Path to the scene
             dst: Path to the STAC Item JSON file that will be created
         """
-        item = create_item(src)
+        from stactools.sentinel5p.stac import create_item
+
+        item = create_item(
+            src,
+            prefer_sidecar=prefer_sidecar,
+            simplify_tolerance=simplify_tolerance,
+            precision=precision,
+            lite=lite,
+            cache=_open_cache(cache_dir, cache_size),
+        )
         item_path = os.path.join(dst, "{}.json".format(item.id))
         item.set_self_href(item_path)
         item.save_object()
 
-        return sentinel5p
+    @sentinel5p.command(
+        "create-items",
+        short_help="Convert many Sentinel5p scenes into STAC items in parallel",
+    )
+    @click.argument("sources", nargs=-1, required=True)
+    @click.argument("dst")
+    @click.option(
+        "-j",
+        "--jobs",
+        type=click.IntRange(min=1),
+        help="Number of worker processes (defaults to the number of CPUs)",
+    )
+    @click.option(
+        "--prefer-sidecar",
+        is_flag=True,
+        help="Read metadata from the JSON sidecar next to each netCDF4 file, "
+        "if there is one",
+    )
+    @click.option(
+        "--format",
+        "output_format",
+        type=click.Choice(["json", "ndjson", "geoparquet"]),
+        default="json",
+        show_default=True,
+        help="Write one JSON file per item into DST, stream items into the "
+        "NDJSON file DST ('-' for stdout), or into a GeoParquet dataset in DST "
+        "partitioned by product and date",
+    )
+    @click.option(
+        "--gzip",
+        "compress",
+        is_flag=True,
+        help="Gzip the NDJSON output (implied by a DST ending with .gz)",
+    )
+    @click.option(
+        "--dehydrate",
+        "bases_href",
+        metavar="BASES",
+        help="Write NDJSON items dehydrated against a base item per product and "
+        "collection, kept in the JSON file BASES",
+    )
+    @click.option(
+        "--concurrency",
+        type=click.IntRange(min=1),
+        metavar="N",
+        help="Fetch the metadata of up to N scenes at URLs at a time with "
+        "asyncio, ahead of building their items in the worker processes, and "
+        "write JSON items asynchronously",
+    )
+    @footprint_options
+    @lite_option
+    @dedup_options
+    @incremental_options
+    @cache_options
+    def create_items_command(
+        sources,
+        dst,
+        jobs,
+        concurrency,
+        prefer_sidecar,
+        output_format,
+        compress,
+        bases_href,
+        simplify_tolerance,
+        precision,
+        lite,
+        dedup,
+        precedence,
+        mode_precedence,
+        incremental,
+        existing,
+        bloom,
+        cache_dir,
+        cache_size,
+    ):
+        """Creates a STAC Item for each of many scenes
+
+        Args:
+            sources: Paths to scenes, glob patterns, directories of scenes, or
+                '-' to read one path per line from stdin
+            dst: Directory the STAC Item JSON files will be created in, the
+                NDJSON file to write the items to, '-' for stdout, or the
+                directory of the GeoParquet dataset
+        """
+        import pystac
+
+        from stactools.sentinel5p import fastjson
+        from stactools.sentinel5p.batch import create_items, expand_sources
+        from stactools.sentinel5p.dehydration import BaseItems
+        from stactools.sentinel5p.incremental import load_item_ids, skip_existing
+        from stactools.sentinel5p.ndjson import open_ndjson
+
+        ndjson = output_format == "ndjson"
+        if bases_href is not None and not ndjson:
+            raise click.UsageError("--dehydrate requires --format ndjson")
+        # Keep stdout for the items
+        echo = functools.partial(click.echo, err=ndjson and dst == "-")
+        created = 0
+        failed = 0
+        stats: Counter[str] = Counter()
+        hrefs = expand_sources(sources)
+        if dedup and "-" not in sources:
+            # Directories and globs are listed by name
+            hrefs = sort_by_start_time(hrefs)
+        hrefs = _dedup(hrefs, dedup, precedence, mode_precedence, stats)
+        if output_format == "geoparquet":
+            try:
+                from stactools.sentinel5p.geoparquet import GeoParquetWriter
+            except ImportError as e:
+                raise click.ClickException(
+                    "GeoParquet output requires pyarrow: "
+                    "pip install stactools-sentinel5p[parquet]"
+                ) from e
+        incremental = incremental or bool(existing)
+        if incremental:
+            # The NDJSON file appended to is read as such, whatever its name
+            appended = (dst,) if ndjson and dst != "-" else ()
+            dataset = (dst,) if output_format == "geoparquet" else ()
+            if output_format == "json" and dst != "-":
+                sources = (dst,) + existing
+            else:
+                sources = existing
+            ids = load_item_ids(
+                sources,
+                bloom=bloom,
+                ndjson_sources=appended,
+                geoparquet_sources=dataset,
+            )
+            hrefs = skip_existing(hrefs, ids, stats)
+        options = dict(
+            jobs=jobs,
+            prefer_sidecar=prefer_sidecar,
+            simplify_tolerance=simplify_tolerance,
+            precision=precision,
+            lite=lite,
+            cache=_open_cache(cache_dir, cache_size),
+        )
+        item_dst = dst if output_format == "json" else None
+        if concurrency is None:
+            results = create_items(hrefs, item_dst, **options)
+        else:
+            import asyncio
+
+            from stactools.sentinel5p.aio import create_items_async
+
+            results = create_items_async(
+                hrefs, item_dst, concurrency=concurrency, **options
+            )
+        with contextlib.ExitStack() as stack:
+            if ndjson:
+                try:
+                    f = stack.enter_context(
+                        open_ndjson(dst, compress or None, append=incremental)
+                    )
+                except ValueError as e:
+                    raise click.UsageError(str(e)) from e
+
+                if bases_href is None:
+
+                    def write(result):
+                        f.write(result.item_json.encode("utf-8") + b"\n")
+
+                else:
+                    bases = BaseItems.load(bases_href)
+                    # Saved even if conversion stops, for the items written
+                    stack.callback(bases.save, bases_href)
+
+                    def write(result):
+                        item = bases.dehydrate(fastjson.loads(result.item_json))
+                        f.write(fastjson.dumpb(item) + b"\n")
+
+            elif output_format == "geoparquet":
+                writer = stack.enter_context(GeoParquetWriter(dst))
+
+                def write(result):
+                    writer.write(fastjson.loads(result.item_json))
+
+            elif concurrency is not None:
+
+                def write(result):
+                    # Written by the asyncio pipeline
+                    pass
+
+            else:
+                stac_io = pystac.StacIO.default()
+
+                def write(result):
+                    path = os.path.join(dst, "{}.json".format(result.item_id))
+                    stac_io.write_text(path, result.item_json)
+
+            def handle(result):
+                nonlocal created, failed
+                if result.error is not None:
+                    failed += 1
+                    logger.error(
+                        f"Failed to create item for {result.href}: {result.error}"
+                    )
+                    return
+                write(result)
+                created += 1
+                stats.update(result.stats or {})
+
+            try:
+                if concurrency is None:
+                    for result in results:
+                        handle(result)
+                else:
+                    asyncio.run(_handle_async(results, handle))
+            except ValueError as e:
+                # Raised while reading sources out of order for --dedup
+                raise click.ClickException(str(e))
+
+        echo(f"Created {created} items, {failed} failed")
+        if incremental:
+            echo(f"Skipped {stats['skipped_existing']} existing items")
+        if dedup:
+            echo(f"Dropped {stats['duplicates_dropped']} duplicate scenes")
+        echo(
+            f"Footprints: {stats['antimeridian_fast_path']} fast path, "
+            f"{stats['antimeridian_fix']} antimeridian fix"
+        )
+        if cache_dir is not None:
+            echo(
+                f"Metadata cache: {stats['cache_hits']} hits, "
+                f"{stats['cache_misses']} misses"
+            )
+        if failed:
+            raise click.ClickException(f"{failed} granule(s) could not be converted")
+
+    @sentinel5p.command(
+        "create-sidecars",
+        short_help="Write compact JSON metadata sidecars of Sentinel5p scenes",
+    )
+    @click.argument("sources", nargs=-1, required=True)
+    @click.option(
+        "-o",
+        "--output-dir",
+        help="Directory to write the sidecars in (defaults to next to each scene)",
+    )
+    @click.option("--gzip", "compress", is_flag=True, help="Gzip the sidecars")
+    @click.option(
+        "--full",
+        is_flag=True,
+        help="Write all metadata, rather than just what items are built from",
+    )
+    @click.option(
+        "-j",
+        "--jobs",
+        type=click.IntRange(min=1),
+        help="Number of worker processes (defaults to the number of CPUs)",
+    )
+    def create_sidecars_command(sources, output_dir, compress, full, jobs):
+        """Writes a JSON metadata sidecar for each of many netCDF4 scenes, from
+        which items can be created without reading the netCDF4 files
+
+        Args:
+            sources: Paths to scenes, glob patterns, directories of scenes, or
+                '-' to read one path per line from stdin
+        """
+        from stactools.sentinel5p.batch import expand_sources, write_sidecars
+        from stactools.sentinel5p.remote import is_url
+
+        if output_dir is not None and not is_url(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+        hrefs = (href for href in expand_sources(sources) if href.endswith(".nc"))
+        written = 0
+        failed = 0
+        results = write_sidecars(
+            hrefs, output_dir, jobs=jobs, compact=not full, compress=compress
+        )
+        for result in results:
+            if result.error is not None:
+                failed += 1
+                logger.error(
+                    f"Failed to write sidecar of {result.href}: {result.error}"
+                )
+                continue
+            written += 1
+
+        click.echo(f"Wrote {written} sidecars, {failed} failed")
+        if failed:
+            raise click.ClickException(f"{failed} granule(s) could not be converted")
+
+    @sentinel5p.command(
+        "build-index",
+        short_help="Index Sentinel5p scenes by name in a SQLite database",
+    )
+    @click.argument("sources", nargs=-1, required=True)
+    @click.argument("index")
+    def build_index_command(sources, index):
+        """Adds scenes to a SQLite index of their product, mode, orbit, times,
+        collection and processor version, parsed from their names alone
+
+        Args:
+            sources: Paths or URLs of scenes, glob patterns, directories of
+                scenes, or '-' to read one path per line from stdin
+            index: Path to the SQLite index, created if need be
+        """
+        from stactools.sentinel5p.batch import expand_sources
+
+        indexed, skipped = build_index(expand_sources(sources), index)
+        click.echo(f"Indexed {indexed} scenes, {skipped} skipped", err=True)
+
+    @sentinel5p.command(
+        "query-index",
+        short_help="List the Sentinel5p scenes of a SQLite index matching a query",
+    )
+    @click.argument("index", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--product", help="Product, such as NO2 or AER_AI")
+    @click.option("--mode", help="Processing mode, such as OFFL or NRTI")
+    @click.option(
+        "--start",
+        type=click.DateTime(),
+        help="Scenes whose sensing ends at or after this time (UTC)",
+    )
+    @click.option(
+        "--end",
+        type=click.DateTime(),
+        help="Scenes whose sensing starts before this time (UTC)",
+    )
+    @click.option(
+        "--orbits",
+        type=(int, int),
+        help="First and last absolute orbits",
+    )
+    @click.option("--collection", help="Collection, such as 01")
+    @dedup_options
+    def query_index_command(
+        index,
+        product,
+        mode,
+        start,
+        end,
+        orbits,
+        collection,
+        dedup,
+        precedence,
+        mode_precedence,
+    ):
+        """Prints the paths of the scenes of a SQLite index that match a query,
+        one per line and ordered by start time, for example to pipe into
+        'create-items -'
+
+        Args:
+            index: Path to the SQLite index
+        """
+        records = query_index(
+            index,
+            product=product,
+            mode=mode,
+            start=start,
+            end=end,
+            orbits=orbits,
+            collection=collection,
+        )
+        stats: Counter[str] = Counter()
+        hrefs = (record.href for record in records)
+        for href in _dedup(hrefs, dedup, precedence, mode_precedence, stats):
+            click.echo(href)
+        if dedup:
+            click.echo(
+                f"Dropped {stats['duplicates_dropped']} duplicate scenes", err=True
+            )
+
+    @sentinel5p.command(
+        "serve",
+        short_help="Create STAC items for requests read from stdin or a socket",
+    )
+    @click.option(
+        "--socket",
+        "socket_path",
+        metavar="PATH",
+        help="Serve requests over connections to a Unix socket at PATH, "
+        "rather than reading them from stdin",
+    )
+    @click.option(
+        "-j",
+        "--jobs",
+        type=click.IntRange(min=1),
+        help="Number of worker processes (defaults to the number of CPUs)",
+    )
+    @click.option(
+        "--prefer-sidecar",
+        is_flag=True,
+        help="Read metadata from the JSON sidecar next to each netCDF4 file, "
+        "if there is one, unless a request says otherwise",
+    )
+    @footprint_options
+    @lite_option
+    @cache_options
+    def serve_command(
+        socket_path,
+        jobs,
+        prefer_sidecar,
+        simplify_tolerance,
+        precision,
+        lite,
+        cache_dir,
+        cache_size,
+    ):
+        """Keeps worker processes running, and creates a STAC item for each
+        JSON-lines request, such as {"href": "S5P_[...].nc", "request_id": 1},
+        answering with {"request_id": 1, "href": ..., "item": {...}} or an
+        "error". Requests may set prefer_sidecar, simplify_tolerance,
+        precision and lite, which default to the options given here, and
+        {"op": "health"} and {"op": "stats"} report on the server.
+
+        Requests are read from stdin, and answered on stdout, until stdin is
+        closed; or, with --socket, over each connection until interrupted.
+        """
+        from stactools.sentinel5p.serve import ItemServer, SocketServer
+
+        item_server = ItemServer(
+            jobs=jobs,
+            cache=_open_cache(cache_dir, cache_size),
+            prefer_sidecar=prefer_sidecar,
+            simplify_tolerance=simplify_tolerance,
+            precision=precision,
+            lite=lite,
+        )
+        with item_server:
+            if socket_path is None:
+
+                def respond(response):
+                    sys.stdout.write(response + "\n")
+                    sys.stdout.flush()
+
+                item_server.serve_lines(sys.stdin, respond)
+                return
+            server = SocketServer(socket_path, item_server)
+            click.echo(f"Serving on {socket_path}", err=True)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                server.server_close()
+
+    return sentinel5p
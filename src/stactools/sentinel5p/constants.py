@@ -1,10 +1,10 @@
-import re
-
 import pystac
 import shapely.geometry
 from pystac import ProviderRole
 from pystac.link import Link
 
+from .naming import FILENAME_DATETIME_FORMAT, FILENAME_EXPR  # noqa: F401
+
 INSPIRE_METADATA_ASSET_KEY = "inspire-metadata"
 SAFE_MANIFEST_ASSET_KEY = "safe-manifest"
 PRODUCT_METADATA_ASSET_KEY = "product-metadata"
@@ -17,6 +17,8 @@ SENTINEL_LICENSE = Link(
 
 SENTINEL_CONSTELLATION = "Sentinel-5P"
 
+SENTINEL_PLATFORM = "Sentinel 5 Precursor"
+
 SENTINEL_INSTRUMENTS = ["TROPOMI"]
 
 SENTINEL_PROVIDER = pystac.Provider(
@@ -114,12 +116,11 @@ SENTINEL_TROPOMI_BANDS = {
     },
 }
 
-FILENAME_EXPR = re.compile(
-    r"S5P_(?P<mode>[A-Z]{4})_(?P<product_type>L(?P<level>[0-9]{1})_(?P<product>.{7}))_"
-    r"(?P<start_datetime>[0-9,A-Z]{15})_(?P<end_datetime>[0-9,A-Z]{15})_"
-    r"(?P<orbit>[0-9]{5})_(?P<collection>[0-9]{2})_(?P<processor_version>[0-9]{6})_"
-    r"(?P<production_datetime>[0-9,A-Z]{15})"
-)
+# Items built from the granule name alone carry this property, set to true
+LITE_PROPERTY = "s5p:lite"
+
+# The coarse geometry of such items
+GLOBAL_GEOMETRY = shapely.geometry.box(-180, -90, 180, 90)
 
 ABOUT_LINKS = {
     "L2__AER_AI": "http://www.tropomi.eu/data-products/uv-aerosol-index",
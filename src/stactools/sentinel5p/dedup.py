@@ -0,0 +1,147 @@
+"""Selection of one granule among copies of the same observation.
+
+The same product of the same orbit and sensing window is often published
+several times: as NRTI, OFFL and RPRO processing, or in several collections
+and processor versions. :func:`preferred_granules` keeps only the preferred
+copy under a precedence policy, from the granule names alone.
+
+Input is streamed in order of start time, as listed by
+:func:`~stactools.sentinel5p.index.query_index`, so only the granules that
+start at the same time are held in memory. Hrefs listed otherwise, such as by
+name from directories, are put in that order by :func:`sort_by_start_time`.
+"""
+
+from typing import (
+    Any,
+    Callable,
+    Counter,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .index import IndexRecord, parse_granule_name
+
+# Fields of granule names that copies can be chosen between by
+PRECEDENCE_FIELDS = ("mode", "collection", "processor_version", "production_datetime")
+
+# By default, compared in that order
+DEFAULT_PRECEDENCE = PRECEDENCE_FIELDS
+
+# Processing modes, most preferred first: reprocessed, offline, near real time
+DEFAULT_MODES = ("RPRO", "OFFL", "NRTI")
+
+GroupKey = Tuple[str, int, str, str]
+
+
+def group_key(record: IndexRecord) -> GroupKey:
+    """Returns the key shared by copies of the same observation."""
+    return (record.product, record.orbit, record.start_datetime, record.end_datetime)
+
+
+def _rank_function(
+    precedence: Sequence[str], modes: Sequence[str]
+) -> Callable[[IndexRecord], Tuple[Any, ...]]:
+    for field in precedence:
+        if field not in PRECEDENCE_FIELDS:
+            raise ValueError(
+                f"Unknown precedence field {field!r}, expected one of "
+                f"{', '.join(PRECEDENCE_FIELDS)}"
+            )
+    mode_ranks = {mode: len(modes) - i for i, mode in enumerate(modes)}
+
+    # Collections, processor versions and datetimes are zero padded or ISO
+    # 8601 strings, so greater strings are newer
+    def rank(record: IndexRecord) -> Tuple[Any, ...]:
+        return tuple(
+            (
+                mode_ranks.get(record.mode, 0)
+                if field == "mode"
+                else getattr(record, field)
+            )
+            for field in precedence
+        )
+
+    return rank
+
+
+def preferred_granules(
+    hrefs: Iterable[str],
+    precedence: Sequence[str] = DEFAULT_PRECEDENCE,
+    modes: Sequence[str] = DEFAULT_MODES,
+    stats: Optional[Counter[str]] = None,
+) -> Iterator[str]:
+    """Drops all but the preferred copy of each observation from a stream of
+    granule hrefs.
+
+    Copies share their product, orbit, start and end times. The preferred
+    copy ranks highest on the first field of ``precedence`` they differ in;
+    the first copy listed is kept if they do not differ. hrefs that do not
+    follow the Sentinel-5P naming convention are passed through as soon as
+    they are read.
+
+    Args:
+        hrefs (Iterable[str]): The granule hrefs, ordered by start time, such
+            as those listed from an index.
+        precedence (Sequence[str]): Fields of the names to compare, in order:
+            any of ``mode``, ``collection``, ``processor_version`` and
+            ``production_datetime``. Later collections and processor versions
+            and newer production times are preferred.
+        modes (Sequence[str]): Processing modes, most preferred first.
+        stats (Optional[Counter[str]]): Counts ``duplicates_dropped``.
+
+    Returns:
+        Iterator[str]: The preferred hrefs, in order of start time.
+
+    Raises:
+        ValueError: If the hrefs are not ordered by start time.
+    """
+    rank = _rank_function(precedence, modes)
+    start: Optional[str] = None
+    group: Dict[GroupKey, Tuple[Tuple[Any, ...], str]] = {}
+    for href in hrefs:
+        record = parse_granule_name(href)
+        if record is None:
+            yield href
+            continue
+        if record.start_datetime != start:
+            if start is not None and record.start_datetime < start:
+                raise ValueError(
+                    f"Granules are not ordered by start time: {href} starts "
+                    f"before {start}"
+                )
+            for _, preferred in group.values():
+                yield preferred
+            group.clear()
+            start = record.start_datetime
+        key = group_key(record)
+        record_rank = rank(record)
+        current = group.get(key)
+        if current is None:
+            group[key] = (record_rank, href)
+            continue
+        if stats is not None:
+            stats["duplicates_dropped"] += 1
+        if record_rank > current[0]:
+            group[key] = (record_rank, href)
+    for _, preferred in group.values():
+        yield preferred
+
+
+def sort_by_start_time(hrefs: Iterable[str]) -> List[str]:
+    """Returns granule hrefs ordered by start time, from their names, for
+    :func:`preferred_granules`.
+
+    hrefs that do not follow the Sentinel-5P naming convention come first;
+    the sort is stable, so hrefs that start at the same time keep their order.
+    """
+
+    def start_time(href: str) -> str:
+        record = parse_granule_name(href)
+        return "" if record is None else record.start_datetime
+
+    return sorted(hrefs, key=start_time)
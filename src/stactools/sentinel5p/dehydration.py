@@ -0,0 +1,190 @@
+"""Dehydrated items: the differences of items from a base item.
+
+Items of the same product and collection repeat large constant blocks:
+providers, links, asset titles and descriptions, the sat extension fields,
+and the ``s5p:<product>`` properties. A dehydrated item holds only what
+differs from the base item of its product and collection, as pgstac stores
+items against the base item of their collection, and :func:`hydrate`
+restores the full item.
+
+Dehydration follows pgstac: values equal to those of the base are dropped,
+objects and lists of objects of the same length are dehydrated member by
+member, and keys of the base that an item does not have are set to
+:data:`DO_NOT_MERGE_MARKER`.
+"""
+
+import copy
+import json
+from typing import Any, Dict, List, Optional
+
+import fsspec  # type: ignore
+
+from . import fastjson
+from .index import parse_granule_name
+
+# Marks keys of the base item that the item does not have
+DO_NOT_MERGE_MARKER = "𒍟※"
+
+# Properties that differ from granule to granule, left out of base items
+VARIABLE_PROPERTIES = (
+    "datetime",
+    "start_datetime",
+    "end_datetime",
+    "sat:absolute_orbit",
+    "s5p:shape",
+)
+
+
+def base_key(item_id: str) -> str:
+    """Returns the key of the base item of an item, such as ``NO2_01``, from
+    the product and collection in its id."""
+    record = parse_granule_name(item_id)
+    if record is None:
+        raise ValueError(
+            f"Item id does not match Sentinel-5p naming convention(s): {item_id}"
+        )
+    return f"{record.product}_{record.collection}"
+
+
+def base_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns a base item for the product and collection of an item: the
+    item without its id, geometry, bounding box, asset hrefs and
+    :data:`VARIABLE_PROPERTIES`."""
+    base = copy.deepcopy(item)
+    for key in ("id", "geometry", "bbox"):
+        base.pop(key, None)
+    for name in VARIABLE_PROPERTIES:
+        base["properties"].pop(name, None)
+    for asset in base.get("assets", {}).values():
+        asset.pop("href", None)
+    base["links"] = [link for link in base.get("links", []) if link["rel"] != "self"]
+    return base
+
+
+def _dehydrate_list(base: List[Any], values: List[Any]) -> List[Any]:
+    return [
+        (
+            dehydrate(base_value, value)
+            if isinstance(base_value, dict) and isinstance(value, dict)
+            else value
+        )
+        for base_value, value in zip(base, values)
+    ]
+
+
+def dehydrate(base: Dict[str, Any], item: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the differences of an item, or any object, from a base.
+
+    Args:
+        base (Dict[str, Any]): The base item.
+        item (Dict[str, Any]): The full item.
+
+    Returns:
+        Dict[str, Any]: The dehydrated item, which shares values with
+        ``item``.
+    """
+    dehydrated = {}
+    for key, value in item.items():
+        if key not in base:
+            dehydrated[key] = value
+            continue
+        base_value = base[key]
+        if value == base_value:
+            continue
+        if isinstance(value, dict) and isinstance(base_value, dict):
+            dehydrated[key] = dehydrate(base_value, value)
+        elif (
+            isinstance(value, list)
+            and isinstance(base_value, list)
+            and len(value) == len(base_value)
+        ):
+            dehydrated[key] = _dehydrate_list(base_value, value)
+        else:
+            dehydrated[key] = value
+    for key in base:
+        if key not in item:
+            dehydrated[key] = DO_NOT_MERGE_MARKER
+    return dehydrated
+
+
+def hydrate(
+    base: Dict[str, Any], item: Dict[str, Any], copy_base: bool = True
+) -> Dict[str, Any]:
+    """Restores a dehydrated item, or any object, in place.
+
+    Args:
+        base (Dict[str, Any]): The base item the item was dehydrated against.
+        item (Dict[str, Any]): The dehydrated item.
+        copy_base (bool): Copy the values taken from the base, rather than
+            share them; pass ``False`` with a fresh copy of the base.
+
+    Returns:
+        Dict[str, Any]: ``item``, hydrated.
+    """
+    for key, base_value in base.items():
+        if key not in item:
+            item[key] = copy.deepcopy(base_value) if copy_base else base_value
+            continue
+        value = item[key]
+        if value == DO_NOT_MERGE_MARKER:
+            del item[key]
+        elif isinstance(value, dict) and isinstance(base_value, dict):
+            hydrate(base_value, value, copy_base)
+        elif (
+            isinstance(value, list)
+            and isinstance(base_value, list)
+            and len(value) == len(base_value)
+        ):
+            for element_base, element in zip(base_value, value):
+                if isinstance(element_base, dict) and isinstance(element, dict):
+                    hydrate(element_base, element, copy_base)
+    return item
+
+
+class BaseItems:
+    """The base items of a dehydrated catalog, by :func:`base_key`.
+
+    Args:
+        bases (Optional[Dict[str, Dict[str, Any]]]): Base items to start
+            from, such as those loaded with :meth:`load`.
+    """
+
+    def __init__(self, bases: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        self.bases: Dict[str, Dict[str, Any]] = dict(bases or {})
+        # Parsing the JSON of a base is faster than deep copying it
+        self._json: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, href: str) -> "BaseItems":
+        """Loads base items from a JSON file; none if it does not exist."""
+        fs, path = fsspec.core.url_to_fs(href)
+        if not fs.exists(path):
+            return cls()
+        with fs.open(path, "rt") as f:
+            return cls(json.load(f))
+
+    def save(self, href: str) -> None:
+        """Saves the base items to a JSON file."""
+        with fsspec.open(href, "wt") as f:
+            json.dump(self.bases, f, indent=2, ensure_ascii=False)
+
+    def dehydrate(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Dehydrates an item against the base item of its product and
+        collection, which is made from the item if there is none yet."""
+        key = base_key(item["id"])
+        base = self.bases.get(key)
+        if base is None:
+            base = self.bases[key] = base_item(item)
+        return dehydrate(base, item)
+
+    def hydrate(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Restores a dehydrated item in place.
+
+        Raises:
+            KeyError: If there is no base item for the item.
+        """
+        key = base_key(item["id"])
+        base_json = self._json.get(key)
+        if base_json is None:
+            base_json = self._json[key] = fastjson.dumps(self.bases[key])
+        return hydrate(fastjson.loads(base_json), item, copy_base=False)
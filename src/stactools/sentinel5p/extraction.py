@@ -0,0 +1,448 @@
+"""Declarative extraction of the product metadata of Sentinel-5P granules.
+
+Each product type is described by a list of :class:`Field` s, naming the
+property to fill, the group attributes and dimensions it is read from and a
+converter for the values read. The fields of a product type are compiled
+once into an :class:`ExtractionPlan`, which resolves every group it needs once
+per granule and reads all of that group's values in one go, the same way for
+netCDF4 granules and for their JSON metadata sidecars.
+"""
+
+import functools
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .granule import GranuleReader
+
+ROOT = ""
+PRODUCT = "PRODUCT"
+METADATA = "METADATA"
+ALGORITHM_SETTINGS = "METADATA/ALGORITHM_SETTINGS"
+GRANULE_DESCRIPTION = "METADATA/GRANULE_DESCRIPTION"
+EOP_PROCESSING = "METADATA/EOP_METADATA/eop:metaDataProperty/eop:processing"
+EOP_INSTRUMENT = "METADATA/EOP_METADATA/om:procedure/eop:instrument"
+FOOTPRINT = (
+    "METADATA/EOP_METADATA/om:featureOfInterest/eop:multiExtentOf/"
+    "gml:surfaceMembers/gml:exterior"
+)
+ISO_PLATFORM = "METADATA/ISO_METADATA/gmi:acquisitionInformation/gmi:platform"
+
+# Bump when what is extracted from granules changes, so that metadata cached
+# by earlier versions is read again
+EXTRACTOR_VERSION = 1
+
+RESOLUTION_UPGRADE_TIME = "2019-08-06T13:30:00"
+RESOLUTION_EXPR = re.compile(r"^([0-9\.]+)x([0-9\.]+) *km2$")
+
+
+class Source(NamedTuple):
+    """A value read from a granule: a group attribute or a dimension size."""
+
+    group: str
+    name: str
+    dimension: bool = False
+
+
+class Field(NamedTuple):
+    """A metadata property, the sources it is read from, and how the values
+    read are converted into the property value."""
+
+    key: str
+    sources: Tuple[Source, ...]
+    convert: Callable[..., Any]
+
+
+def attr(name: str, group: str = ROOT) -> Source:
+    return Source(group, name)
+
+
+def dim(group: str, name: str) -> Source:
+    return Source(group, name, dimension=True)
+
+
+# Read outside of the extraction plans, by ProductMetadata, MetadataLinks and
+# fill_sat_properties; not every granule has all of them
+ITEM_SOURCES = (
+    attr("time_coverage_start"),
+    attr("time_coverage_end"),
+    attr("title"),
+    attr("orbit"),
+    attr("gml:posList", FOOTPRINT),
+    attr("gmi:description", ISO_PLATFORM),
+    attr("MissionName", GRANULE_DESCRIPTION),
+)
+
+
+def product_prefix(product_type: str) -> str:
+    """Returns the prefix of the product-specific fields of a product type,
+    such as ``no2`` for ``L2__NO2___`` and ``npbd3`` for ``L2__NP_BD3``."""
+    prefix = product_type[4:].strip("_").lower()
+    # np-bd products drop the underscore
+    if prefix.startswith("np_bd"):
+        prefix = prefix.replace("_", "")
+    return prefix
+
+
+class ExtractionPlan:
+    """The compiled extraction of the fields of one product type.
+
+    The sources of all fields are merged per group, so that each group is
+    resolved once and each value read once, into a flat list of values. Every
+    field then refers to its values by position in that list.
+
+    Args:
+        fields (List[Field]): The fields to extract, in output order.
+        prefix (Optional[str]): The prefix of the product-specific fields,
+            which :meth:`extract_nested` returns apart under their bare names.
+    """
+
+    def __init__(self, fields: List[Field], prefix: Optional[str] = None) -> None:
+        groups: Dict[str, Tuple[List[str], List[str]]] = {}
+        for field in fields:
+            for source in field.sources:
+                attributes, dimensions = groups.setdefault(source.group, ([], []))
+                names = dimensions if source.dimension else attributes
+                if source.name not in names:
+                    names.append(source.name)
+
+        slots: Dict[Source, int] = {}
+        self.groups: List[Tuple[str, Tuple[str, ...], Tuple[str, ...]]] = []
+        for path, (attributes, dimensions) in groups.items():
+            for name in attributes:
+                slots[Source(path, name)] = len(slots)
+            for name in dimensions:
+                slots[Source(path, name, dimension=True)] = len(slots)
+            self.groups.append((path, tuple(attributes), tuple(dimensions)))
+
+        self.fields = [
+            (field.key, tuple(slots[source] for source in field.sources), field.convert)
+            for field in fields
+        ]
+        self.prefix = prefix
+        # The bare names of product-specific fields, None for the others
+        self.product_names = [
+            (
+                field.key.partition(":")[2]
+                if field.key.partition(":")[0] == prefix
+                else None
+            )
+            for field in fields
+        ]
+
+    def extract(self, granule: GranuleReader) -> Dict[str, Any]:
+        """Extracts the fields from a granule.
+
+        Args:
+            granule (GranuleReader): The opened granule.
+
+        Returns:
+            Dict[str, Any]: The extracted properties; fields converted to
+            ``None`` are left out.
+        """
+        result = {}
+        for (key, _, _), value in zip(self.fields, self._convert(granule)):
+            if value is not None:
+                result[key] = value
+        return result
+
+    def extract_nested(
+        self, granule: GranuleReader
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Extracts the fields from a granule, with the product-specific
+        fields apart, as they are laid out under ``s5p:<prefix>`` in items.
+
+        Args:
+            granule (GranuleReader): The opened granule.
+
+        Returns:
+            Tuple[Dict[str, Any], Dict[str, Any]]: The other properties, and
+            the product-specific ones under their names without the prefix;
+            fields converted to ``None`` are left out.
+        """
+        properties = {}
+        product_properties = {}
+        for (key, _, _), name, value in zip(
+            self.fields, self.product_names, self._convert(granule)
+        ):
+            if value is None:
+                continue
+            if name is None:
+                properties[key] = value
+            else:
+                product_properties[name] = value
+        return properties, product_properties
+
+    def _convert(self, granule: GranuleReader) -> List[Any]:
+        values: List[Any] = []
+        for path, attribute_names, dimension_names in self.groups:
+            values.extend(granule.read_attrs(path, attribute_names))
+            values.extend(granule.read_dimensions(path, dimension_names))
+        return [
+            convert(*[values[position] for position in positions])
+            for _, positions, convert in self.fields
+        ]
+
+
+# ---- Converters ----
+
+
+def _with_z(value: str) -> str:
+    return str(value + "Z")
+
+
+def _as_list(*values: Any) -> List[Any]:
+    return list(values)
+
+
+def _shape(*sizes: Any) -> List[int]:
+    return [int(size) for size in sizes]
+
+
+def _instruments(name: Any) -> List[str]:
+    return [str(name)]
+
+
+def _upper_instruments(name: str) -> List[str]:
+    return [str(name.upper())]
+
+
+def _observed_after_res_upgraded(observed_time: str) -> bool:
+    # ISO 8601 timestamps of the same layout sort like the times they denote
+    if len(observed_time) not in (19, 20):
+        raise ValueError("Source datetime format is not supported.")
+    return observed_time[:19] > RESOLUTION_UPGRADE_TIME
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_resolution(spatial_resolution: str) -> Tuple[int, ...]:
+    resolution_match = RESOLUTION_EXPR.match(spatial_resolution)
+    if not resolution_match:
+        raise ValueError(f"Unexpected spatial_resolutio: '{spatial_resolution}'")
+    return tuple(int(1000 * float(x)) for x in resolution_match.groups())
+
+
+def _str_res_to_list(spatial_resolution: str) -> List[int]:
+    return list(_parse_resolution(spatial_resolution))
+
+
+def _spatial_resolution(start_time: str, spatial_resolution: str) -> List[int]:
+    if _observed_after_res_upgraded(start_time):
+        spatial_resolution = spatial_resolution.replace("7x", "5.5x")
+    return _str_res_to_list(spatial_resolution)
+
+
+def _nominal_spatial_resolution(start_time: str) -> List[int]:
+    if _observed_after_res_upgraded(start_time):
+        return _str_res_to_list("5.5x3.5km2")
+    return _str_res_to_list("7x3.5km2")
+
+
+def _viirs_bands(bands: str) -> List[int]:
+    return [int(band) for band in bands.split("; ")[:-1]]
+
+
+def _input_orbits(orbits: str) -> List[int]:
+    return [int(num) for num in orbits.split(" ")]
+
+
+def _input_files(files: str) -> List[str]:
+    return [file.split("/")[-1].split(".")[0] for file in files.split(" ")]
+
+
+# ---- Product specs ----
+
+
+def _swath_fields(
+    time_convert: Callable[[str], str] = str,
+    instrument: Optional[Field] = None,
+    shape_group: str = PRODUCT,
+    nominal_resolution: bool = False,
+) -> List[Field]:
+    if instrument is None:
+        instrument = Field("instruments", (attr("sensor"),), _instruments)
+    if nominal_resolution:
+        resolution = Field(
+            "s5p:spatial_resolution",
+            (attr("time_coverage_start"),),
+            _nominal_spatial_resolution,
+        )
+    else:
+        resolution = Field(
+            "s5p:spatial_resolution",
+            (attr("time_coverage_start"), attr("spatial_resolution")),
+            _spatial_resolution,
+        )
+    return [
+        Field("start_datetime", (attr("time_coverage_start"),), time_convert),
+        Field("end_datetime", (attr("time_coverage_end"),), time_convert),
+        instrument,
+        Field(
+            "s5p:processing_mode", (attr("eop:processingMode", EOP_PROCESSING),), str
+        ),
+        Field(
+            "s5p:product_type", (attr("ProductShortName", GRANULE_DESCRIPTION),), str
+        ),
+        Field(
+            "s5p:shape",
+            (dim(shape_group, "scanline"), dim(shape_group, "ground_pixel")),
+            _shape,
+        ),
+        resolution,
+    ]
+
+
+def _geolocation_band(prefix: str) -> Field:
+    return Field(
+        f"{prefix}:geolocation_grid_from_band",
+        (attr("geolocation_grid_from_band"),),
+        int,
+    )
+
+
+def _input_bands(prefix: str, count: int) -> Field:
+    return Field(
+        f"{prefix}:input_band",
+        tuple(attr(f"input.{i}.type", ALGORITHM_SETTINGS) for i in range(1, count + 1)),
+        _as_list,
+    )
+
+
+def _irradiance(prefix: str) -> Field:
+    return Field(
+        f"{prefix}:irradiance_accompanied",
+        (attr("input.1.irrType", ALGORITHM_SETTINGS),),
+        str,
+    )
+
+
+def _cloud_product(prefix: str) -> List[Field]:
+    return _swath_fields(time_convert=_with_z) + [
+        _geolocation_band(prefix),
+        Field(f"{prefix}:cloud_mode", (attr("cloud_mode"),), str),
+    ]
+
+
+def _npp_viirs_product(band: int) -> List[Field]:
+    prefix = f"npbd{band}"
+    return _swath_fields(
+        instrument=Field(
+            "instruments", (attr("eop:shortName", EOP_INSTRUMENT),), _instruments
+        ),
+        shape_group=f"BAND{band}_NPPC/STANDARD_MODE",
+        nominal_resolution=True,
+    ) + [
+        Field(
+            f"{prefix}:analysed_s5p_band",
+            (attr("S5P_Band_Number", ALGORITHM_SETTINGS),),
+            int,
+        ),
+        Field(
+            f"{prefix}:VIIRS_band",
+            (attr("VIIRS_Bands", ALGORITHM_SETTINGS),),
+            _viirs_bands,
+        ),
+        Field(
+            f"{prefix}:number_of_scaled_fov",
+            (attr("Number_of_scaled_FOV", ALGORITHM_SETTINGS),),
+            int,
+        ),
+    ]
+
+
+PRODUCT_FIELDS: Dict[str, List[Field]] = {
+    "L2__AER_AI": _swath_fields()
+    + [
+        _geolocation_band("aer_ai"),
+        Field("aer_ai:input_band", (attr("input.1.type", ALGORITHM_SETTINGS),), str),
+        _irradiance("aer_ai"),
+    ],
+    "L2__AER_LH": _swath_fields()
+    + [
+        _geolocation_band("aer_lh"),
+        _input_bands("aer_lh", 5),
+        _irradiance("aer_lh"),
+    ],
+    "L2__CH4___": _swath_fields()
+    + [
+        _geolocation_band("ch4"),
+        _input_bands("ch4", 7),
+        Field(
+            "ch4:irradiance_accompanied",
+            (
+                attr("input.1.irrType", ALGORITHM_SETTINGS),
+                attr("input.3.irrType", ALGORITHM_SETTINGS),
+            ),
+            _as_list,
+        ),
+    ],
+    "L2__CLOUD_": _cloud_product("cloud"),
+    "L2__CO____": _swath_fields()
+    + [
+        _geolocation_band("co"),
+        _input_bands("co", 2),
+        _irradiance("co"),
+    ],
+    "L2__HCHO__": _cloud_product("hcho"),
+    "L2__NO2___": _swath_fields()
+    + [
+        _geolocation_band("no2"),
+        _input_bands("no2", 5),
+        _irradiance("no2"),
+    ],
+    "L2__O3____": _cloud_product("o3"),
+    "L2__O3_TCL": [
+        Field(
+            "instruments",
+            (attr("InstrumentName", GRANULE_DESCRIPTION),),
+            _upper_instruments,
+        ),
+        Field("s5p:processing_mode", (attr("processingMode", METADATA),), str),
+        Field(
+            "s5p:product_type", (attr("ProductShortName", GRANULE_DESCRIPTION),), str
+        ),
+        Field(
+            "s5p:spatial_resolution",
+            (attr("time_coverage_start"),),
+            _nominal_spatial_resolution,
+        ),
+        Field(
+            "o3_tcl:shape_ccd",
+            (dim(PRODUCT, "latitude_ccd"), dim(PRODUCT, "longitude_ccd")),
+            _shape,
+        ),
+        Field(
+            "o3_tcl:shape_csa",
+            (dim(PRODUCT, "latitude_csa"), dim(PRODUCT, "longitude_csa")),
+            _shape,
+        ),
+        Field(
+            "o3_tcl:stratosphere_start_datetime",
+            (attr("time_coverage_start"),),
+            _with_z,
+        ),
+        Field(
+            "o3_tcl:stratosphere_end_datetime", (attr("time_coverage_end"),), _with_z
+        ),
+        Field(
+            "o3_tcl:troposphere_start_datetime",
+            (attr("time_coverage_troposphere_start"),),
+            _with_z,
+        ),
+        Field(
+            "o3_tcl:troposphere_end_datetime",
+            (attr("time_coverage_troposphere_end"),),
+            _with_z,
+        ),
+        Field("o3_tcl:input_orbits", (attr("input_orbits", METADATA),), _input_orbits),
+        Field("o3_tcl:input_files", (attr("input_files", METADATA),), _input_files),
+    ],
+    "L2__SO2___": _cloud_product("so2"),
+    "L2__NP_BD3": _npp_viirs_product(3),
+    "L2__NP_BD6": _npp_viirs_product(6),
+    "L2__NP_BD7": _npp_viirs_product(7),
+}
+
+EXTRACTION_PLANS: Dict[str, ExtractionPlan] = {
+    product_type: ExtractionPlan(fields, product_prefix(product_type))
+    for product_type, fields in PRODUCT_FIELDS.items()
+}
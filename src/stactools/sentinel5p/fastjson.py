@@ -0,0 +1,77 @@
+"""Fast JSON parsing and compact dumping, with orjson when it is installed
+and the standard library otherwise.
+
+Dumped JSON is byte for byte that of ``json.dumps(obj, separators=(",", ":"))``.
+orjson writes some values differently: non-ASCII characters and DEL
+unescaped, small and large floats without Python's exponent notation, and
+NaN and infinities as ``null``. Its output is checked for those, and the
+object is dumped with the standard library instead if it holds any, which
+items seldom do.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+# Python writes floats below 1e-4 and from 1e16 in exponent notation. orjson
+# writes the former in full, as 0.0000..., and the latter with an exponent
+# but without its sign. Digits are mapped to 0 to find any digit followed by
+# an exponent with a single substring search, which is much faster than a
+# regular expression; strings that happen to match are dumped with the
+# standard library too.
+_DIGITS_TO_ZERO = bytes.maketrans(b"123456789E", b"000000000e")
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Parses JSON, as ``json.loads``, from any bytes-like object too."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Such as NaN, or integers beyond 64 bits
+            pass
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _orjson_dumps(obj: Any) -> Union[bytes, None]:
+    try:
+        data = orjson.dumps(
+            obj,
+            option=orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+    except orjson.JSONEncodeError:
+        # Such as keys that are not strings, or integers beyond 64 bits
+        return None
+    if (
+        not data.isascii()
+        or b"\x7f" in data
+        or b"null" in data
+        or b"0.0000" in data
+        or b"0e" in data.translate(_DIGITS_TO_ZERO)
+    ):
+        return None
+    return data
+
+
+def dumps(obj: Any) -> str:
+    """Dumps compact JSON, as ``json.dumps(obj, separators=(",", ":"))``."""
+    if orjson is not None:
+        data = _orjson_dumps(obj)
+        if data is not None:
+            return data.decode("ascii")
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def dumpb(obj: Any) -> bytes:
+    """Dumps compact JSON encoded in UTF-8, as :func:`dumps`."""
+    if orjson is not None:
+        data = _orjson_dumps(obj)
+        if data is not None:
+            return data
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
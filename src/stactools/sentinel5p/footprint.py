@@ -0,0 +1,164 @@
+"""Footprints of Sentinel-5P granules.
+
+Footprints are read from the ``gml:posList`` of the granule's EOP metadata, a
+string of space separated latitude longitude pairs that runs to thousands of
+vertices for full-orbit granules, so it is parsed with NumPy.
+
+Footprints that cross the antimeridian or cover a pole are fixed with
+:func:`antimeridian.fix_polygon`. Most do neither, which a vectorized check
+of the coordinates tells cheaply, and those skip the full algorithm.
+
+Footprints may then be simplified and rounded to a coordinate precision, to
+shrink items.
+"""
+
+from typing import Counter, Optional, Union
+
+import antimeridian
+import numpy as np
+import shapely  # type: ignore
+from shapely.geometry import MultiPolygon, Polygon  # type: ignore
+from shapely.geometry.polygon import orient  # type: ignore
+
+# antimeridian treats longitudes within this of ±180 as on the antimeridian
+ANTIMERIDIAN_TOLERANCE = 1e-6
+# and consecutive points within this of each other as duplicates
+DUPLICATE_TOLERANCE = 1e-8
+
+
+def parse_pos_list(pos_list: str) -> np.ndarray:
+    """Parses a ``gml:posList`` into coordinates.
+
+    Args:
+        pos_list (str): Latitude longitude pairs, separated by spaces (or
+            commas).
+
+    Returns:
+        np.ndarray: The (N, 2) array of longitude latitude coordinates.
+    """
+    if "," in pos_list:
+        pos_list = pos_list.replace(",", " ")
+    # Raises on malformed values, which np.fromstring of NumPy 1 only warns
+    # about, cutting the coordinates short
+    values = np.array(pos_list.split(), dtype=np.float64)
+    if values.size % 2:
+        raise ValueError(f"Odd number of values in posList: {values.size}")
+    return values.reshape(-1, 2)[:, ::-1]
+
+
+def pos_list_polygon(pos_list: str) -> Polygon:
+    """Returns the polygon, unfixed for the antimeridian, of a
+    ``gml:posList``."""
+    return shapely.polygons(parse_pos_list(pos_list))
+
+
+def _without_duplicates(coordinates: np.ndarray) -> Optional[np.ndarray]:
+    """Drops consecutive near-duplicate points, as antimeridian does by
+    comparing each point with the last one kept; ``None`` if that could differ
+    from comparing each point with the one before it."""
+    near_previous = np.all(
+        np.abs(np.diff(coordinates, axis=0)) <= DUPLICATE_TOLERANCE, axis=1
+    )
+    if not near_previous.any():
+        return coordinates
+    keep = np.concatenate(([True], ~near_previous))
+    kept = coordinates[keep]
+    last_kept = np.maximum.accumulate(np.where(keep, np.arange(len(keep)), 0))
+    dropped = ~keep
+    if np.any(
+        np.abs(coordinates[dropped] - coordinates[last_kept[dropped]])
+        > DUPLICATE_TOLERANCE
+    ):
+        return None
+    if np.any(np.all(np.abs(np.diff(kept, axis=0)) <= DUPLICATE_TOLERANCE, axis=1)):
+        return None
+    return kept
+
+
+def _normalized_if_simple(coordinates: np.ndarray) -> Optional[np.ndarray]:
+    """Returns the coordinates as ``antimeridian.fix_polygon`` would leave
+    them, if the polygon neither crosses the antimeridian nor covers a pole;
+    ``None`` otherwise, or if in doubt."""
+    longitudes = coordinates[:, 0]
+    if np.any(np.abs(longitudes) >= 180 - ANTIMERIDIAN_TOLERANCE):
+        return None
+    # The same normalization of longitudes as antimeridian's, rounding included
+    normalized = _without_duplicates(
+        np.column_stack(((longitudes + 180) % 360 - 180, coordinates[:, 1]))
+    )
+    if normalized is None:
+        return None
+    if np.any(np.abs(np.diff(normalized[:, 0])) > 180):
+        return None
+    if not shapely.is_ccw(shapely.linearrings(normalized)):
+        # Wound clockwise, so the polygon covers a pole
+        return None
+    return normalized
+
+
+def pos_list_footprint(
+    pos_list: str, stats: Optional[Counter[str]] = None
+) -> Union[Polygon, MultiPolygon]:
+    """Returns the footprint of a ``gml:posList``, split at the antimeridian.
+
+    The result is that of ``antimeridian.fix_polygon(..., fix_winding=False)``,
+    which only runs for footprints that cross the antimeridian or cover a
+    pole.
+
+    Args:
+        pos_list (str): Latitude longitude pairs, separated by spaces.
+        stats (Optional[Counter[str]]): Counts ``antimeridian_fast_path`` or
+            ``antimeridian_fix``, for the path taken.
+    """
+    coordinates = parse_pos_list(pos_list)
+    normalized = _normalized_if_simple(coordinates)
+    if normalized is not None:
+        if stats is not None:
+            stats["antimeridian_fast_path"] += 1
+        return shapely.polygons(normalized)
+    if stats is not None:
+        stats["antimeridian_fix"] += 1
+    return antimeridian.fix_polygon(shapely.polygons(coordinates), fix_winding=False)
+
+
+def simplify_footprint(
+    footprint: Union[Polygon, MultiPolygon],
+    tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+) -> Union[Polygon, MultiPolygon]:
+    """Simplifies a footprint and rounds its coordinates.
+
+    Both steps keep the footprint valid: simplification preserves topology,
+    and coordinates are rounded vertex by vertex unless that makes the
+    footprint invalid, in which case GEOS snaps it to the grid and repairs
+    it. Rings are oriented counter-clockwise again afterwards.
+
+    Args:
+        footprint (Union[Polygon, MultiPolygon]): The footprint.
+        tolerance (Optional[float]): The greatest distance, in degrees, the
+            simplified footprint may be from the original one. Not simplified
+            if ``None``.
+        precision (Optional[int]): The number of decimal places to round
+            coordinates to. Not rounded if ``None``.
+
+    Returns:
+        Union[Polygon, MultiPolygon]: The simplified footprint.
+    """
+    if tolerance is None and precision is None:
+        return footprint
+    if tolerance is not None:
+        footprint = shapely.simplify(footprint, tolerance, preserve_topology=True)
+    if precision is not None:
+        grid_size = 10.0**-precision
+        rounded = shapely.set_precision(footprint, grid_size, mode="pointwise")
+        if not rounded.is_valid:
+            rounded = shapely.set_precision(footprint, grid_size)
+        footprint = rounded
+    if footprint.is_empty:
+        raise ValueError(
+            f"Footprint collapsed when simplified with tolerance {tolerance} "
+            f"and precision {precision}"
+        )
+    if isinstance(footprint, MultiPolygon):
+        return MultiPolygon([orient(polygon) for polygon in footprint.geoms])
+    return orient(footprint)
@@ -0,0 +1,261 @@
+"""GeoParquet files of items, partitioned by product and date.
+
+Items are written as rows of `stac-geoparquet`_ style tables: the geometry is
+WKB, the bounding box is a struct column covering it, and properties are
+top-level columns. Nested ``s5p:*`` properties are flattened into one column
+per field, such as ``s5p:no2.geolocation_grid_from_band``.
+
+Files are laid out as Hive partitions, ``product=<s5p:product_name>/
+date=<YYYY-MM-DD>/``, so that a product and day can be read without opening
+the files of others. Rows are buffered per partition and written a row group
+at a time as items stream in.
+
+This needs the ``parquet`` extra.
+
+.. _stac-geoparquet: https://github.com/stac-utils/stac-geoparquet
+"""
+
+import json
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import fsspec  # type: ignore
+import pyarrow as pa  # type: ignore
+import pyarrow.dataset as ds  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
+import shapely  # type: ignore
+import shapely.geometry  # type: ignore
+from pystac.utils import str_to_datetime
+
+GEOPARQUET_VERSION = "1.1.0"
+
+# Rows per row group, and partitions with a file open at once
+ROW_GROUP_SIZE = 5_000
+MAX_OPEN_PARTITIONS = 32
+
+DATETIME_PROPERTIES = ("datetime", "start_datetime", "end_datetime")
+
+BBOX_FIELDS = ("xmin", "ymin", "xmax", "ymax")
+
+GEO_METADATA = {
+    "version": GEOPARQUET_VERSION,
+    "primary_column": "geometry",
+    "columns": {
+        "geometry": {
+            "encoding": "WKB",
+            "geometry_types": ["Polygon", "MultiPolygon"],
+            "covering": {
+                "bbox": {field: ["bbox", field] for field in BBOX_FIELDS},
+            },
+        }
+    },
+}
+
+
+def _datetime(value: str) -> datetime:
+    # Much faster than dateutil for the UTC datetimes pystac writes
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return str_to_datetime(value)
+
+
+def item_to_row(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the row of an item dictionary.
+
+    Args:
+        item (Dict[str, Any]): The item, as returned by ``Item.to_dict``.
+
+    Returns:
+        Dict[str, Any]: The columns of the row.
+    """
+    row: Dict[str, Any] = {
+        "type": item["type"],
+        "stac_version": item["stac_version"],
+        "stac_extensions": item.get("stac_extensions", []),
+        "id": item["id"],
+        "geometry": shapely.to_wkb(shapely.geometry.shape(item["geometry"])),
+        "bbox": dict(zip(BBOX_FIELDS, item["bbox"])),
+    }
+    for name, value in item["properties"].items():
+        if name in DATETIME_PROPERTIES:
+            row[name] = _datetime(value)
+        elif name.startswith("s5p:") and isinstance(value, dict):
+            for field, field_value in value.items():
+                row[f"{name}.{field}"] = field_value
+        else:
+            row[name] = value
+    row["links"] = item.get("links", [])
+    row["assets"] = item.get("assets", {})
+    return row
+
+
+def partition_path(item: Dict[str, Any]) -> str:
+    """Returns the Hive partition directory of an item, relative to the root
+    of the dataset."""
+    properties = item["properties"]
+    date = _datetime(properties["datetime"]).strftime("%Y-%m-%d")
+    return f"product={properties['s5p:product_name']}/date={date}"
+
+
+def iter_dataset_item_ids(root: str) -> Iterator[str]:
+    """Yields the ids of the items of a GeoParquet dataset, reading only its
+    ``id`` column.
+
+    Args:
+        root (str): The path or fsspec URL of the dataset directory.
+
+    Returns:
+        Iterator[str]: The ids of the items.
+    """
+    fs, path = fsspec.core.url_to_fs(root)
+    dataset = ds.dataset(path, filesystem=fs, format="parquet", partitioning="hive")
+    for batch in dataset.to_batches(columns=["id"]):
+        yield from batch.column(0).to_pylist()
+
+
+def _with_geo_metadata(schema: pa.Schema) -> pa.Schema:
+    metadata = dict(schema.metadata or {})
+    metadata[b"geo"] = json.dumps(GEO_METADATA).encode("utf-8")
+    return schema.with_metadata(metadata)
+
+
+def _rows_to_table(rows: List[Dict[str, Any]]) -> pa.Table:
+    """Returns the table of rows, with a column for every key of any row."""
+    # from_pylist would take the columns of the first row only
+    names: Dict[str, None] = {}
+    for row in rows:
+        names.update(dict.fromkeys(row))
+    return pa.Table.from_pydict(
+        {name: [row.get(name) for row in rows] for name in names}
+    )
+
+
+def _conform(table: pa.Table, schema: pa.Schema) -> Optional[pa.Table]:
+    """Returns the table cast to a schema, or ``None`` if it does not fit."""
+    if not set(table.schema.names) <= set(schema.names):
+        return None
+    columns = [
+        (
+            table.column(field.name)
+            if field.name in table.schema.names
+            else pa.nulls(len(table), field.type)
+        )
+        for field in schema
+    ]
+    try:
+        return pa.Table.from_arrays(columns, names=schema.names).cast(schema)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
+
+
+class _Partition:
+    """The open file and buffered rows of a partition."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.rows: List[Dict[str, Any]] = []
+        self.file: Any = None
+        self.writer: Optional[pq.ParquetWriter] = None
+
+
+class GeoParquetWriter:
+    """Writes items into a partitioned GeoParquet dataset as they stream in.
+
+    Each partition gets a file per writer, named with a random prefix so that
+    several runs or writers can add to the same dataset. A partition that is
+    closed to bound the number of open files, or whose rows no longer fit the
+    schema of its file, continues in a new file.
+
+    Use as a context manager, or call :meth:`close` once all items are
+    written.
+
+    Args:
+        root (str): The path or fsspec URL of the dataset directory.
+        row_group_size (int): The number of rows per row group.
+        max_open_partitions (int): The number of partitions with a file open
+            at once; the least recently written is closed past that.
+        compression (str): The Parquet compression codec.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        row_group_size: int = ROW_GROUP_SIZE,
+        max_open_partitions: int = MAX_OPEN_PARTITIONS,
+        compression: str = "zstd",
+    ) -> None:
+        self.fs, self.root = fsspec.core.url_to_fs(root)
+        self.row_group_size = row_group_size
+        self.max_open_partitions = max_open_partitions
+        self.compression = compression
+        self.files_written = 0
+        self._prefix = uuid.uuid4().hex[:12]
+        self._partitions: "OrderedDict[str, _Partition]" = OrderedDict()
+
+    def write(self, item: Dict[str, Any]) -> None:
+        """Adds an item dictionary to the dataset."""
+        path = partition_path(item)
+        partition = self._partitions.get(path)
+        if partition is None:
+            partition = self._partitions[path] = _Partition(path)
+            if len(self._partitions) > self.max_open_partitions:
+                self._close(self._partitions.popitem(last=False)[1])
+        else:
+            self._partitions.move_to_end(path)
+        partition.rows.append(item_to_row(item))
+        if len(partition.rows) >= self.row_group_size:
+            self._flush(partition)
+
+    def _open(self, partition: _Partition, schema: pa.Schema) -> pq.ParquetWriter:
+        directory = f"{self.root}/{partition.path}"
+        self.fs.makedirs(directory, exist_ok=True)
+        name = f"part-{self._prefix}-{self.files_written:05d}.parquet"
+        self.files_written += 1
+        partition.file = self.fs.open(f"{directory}/{name}", "wb")
+        partition.writer = pq.ParquetWriter(
+            partition.file, schema, compression=self.compression
+        )
+        return partition.writer
+
+    def _close_file(self, partition: _Partition) -> None:
+        if partition.writer is not None:
+            partition.writer.close()
+            partition.file.close()
+            partition.writer = None
+            partition.file = None
+
+    def _flush(self, partition: _Partition) -> None:
+        if not partition.rows:
+            return
+        table = _rows_to_table(partition.rows)
+        partition.rows = []
+        writer = partition.writer
+        if writer is not None:
+            conformed = _conform(table, writer.schema)
+            if conformed is None:
+                # Continue in a new file when new columns or types turn up
+                self._close_file(partition)
+                writer = None
+            else:
+                table = conformed
+        if writer is None:
+            writer = self._open(partition, _with_geo_metadata(table.schema))
+        writer.write_table(table)
+
+    def _close(self, partition: _Partition) -> None:
+        self._flush(partition)
+        self._close_file(partition)
+
+    def close(self) -> None:
+        """Writes the buffered rows and closes all files."""
+        while self._partitions:
+            self._close(self._partitions.popitem(last=False)[1])
+
+    def __enter__(self) -> "GeoParquetWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
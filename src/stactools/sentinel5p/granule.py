@@ -0,0 +1,186 @@
+import gzip
+from types import TracebackType
+from typing import Any, Counter, Dict, List, Optional, Sequence, Type, Union
+
+import netCDF4 as nc  # type: ignore
+
+from . import fastjson, remote
+
+JSON_SUFFIXES = (".json", ".json.gz")
+
+
+class GranuleError(Exception):
+    pass
+
+
+class GranuleReader:
+    """Opens a Sentinel-5P netCDF4 granule, or its JSON metadata sidecar (which
+    may be gzip compressed), once.
+
+    The reader is shared by :class:`~stactools.sentinel5p.product_metadata.ProductMetadata`,
+    :class:`~stactools.sentinel5p.metadata_links.MetadataLinks` and
+    :func:`~stactools.sentinel5p.properties.fill_sat_properties`, and should be
+    used as a context manager so the underlying dataset is closed as soon as
+    the item has been built.
+
+    Local paths are opened with netCDF4. fsspec URLs are read with h5netcdf
+    through a :class:`~stactools.sentinel5p.remote.BlockCachedFile`, fetching
+    only the byte ranges that hold the metadata, in blocks of ``block_size``.
+
+    Granules and sidecars already in memory, such as those received from a
+    message queue, are read from ``data`` without being written to disk;
+    ``file_path`` then only names them.
+
+    Groups and attributes are cached as they are read. The number of netCDF4
+    group opens and attribute reads, and of bytes read from URLs, is counted
+    in :attr:`stats`.
+
+    Args:
+        file_path (str): The path or fsspec URL to a Sentinel-5P netCDF4 file
+            or JSON sidecar.
+        block_size (int): The size of the byte ranges read from URLs.
+        prefetched (Optional[remote.Prefetched]): Byte ranges of the file at
+            ``file_path``, a URL, already fetched.
+        data (Optional[Union[bytes, memoryview]]): The content of the file,
+            read in place rather than from ``file_path``.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        block_size: int = remote.DEFAULT_BLOCK_SIZE,
+        prefetched: Optional[remote.Prefetched] = None,
+        data: Optional[Union[bytes, memoryview]] = None,
+    ) -> None:
+        self.file_path = file_path
+        self.stats: Counter[str] = Counter()
+        self._groups: Dict[str, Any] = {}
+        self._attrs: Dict[str, Dict[str, Any]] = {}
+        self._file: Optional[remote.BlockCachedFile] = None
+        self.root: Any
+        if file_path.endswith(".nc"):
+            self.is_netcdf = True
+            if data is not None:
+                # netCDF4 reads the buffer in place
+                self.root = nc.Dataset(file_path, memory=data)
+            elif remote.is_url(file_path):
+                self.root = self._open_remote_netcdf(block_size, prefetched)
+            else:
+                self.root = nc.Dataset(file_path)
+        elif file_path.endswith(JSON_SUFFIXES):
+            self.is_netcdf = False
+            if data is not None:
+                if file_path.endswith(".gz"):
+                    data = gzip.decompress(data)
+                self.root = fastjson.loads(data)
+            elif remote.is_url(file_path):
+                self.root = remote.load_json(file_path, self.stats, prefetched)
+            else:
+                opener = gzip.open if file_path.endswith(".gz") else open
+                with opener(file_path, "rb") as f:
+                    self.root = fastjson.loads(f.read())
+        else:
+            raise GranuleError(
+                f"Source file format is not supported: .{file_path.split('.')[-1]}"
+            )
+
+    def _open_remote_netcdf(
+        self, block_size: int, prefetched: Optional[remote.Prefetched]
+    ) -> Any:
+        self._file = remote.BlockCachedFile(
+            self.file_path, block_size, self.stats, prefetched
+        )
+        try:
+            return remote.open_netcdf(self._file)
+        except ImportError as e:
+            self._file.close()
+            raise GranuleError(
+                "Reading netCDF4 granules from URLs requires h5netcdf: "
+                "pip install stactools-sentinel5p[remote]"
+            ) from e
+        except BaseException:
+            self._file.close()
+            raise
+
+    def group(self, path: str) -> Any:
+        """Returns the group at a path such as ``METADATA/GRANULE_DESCRIPTION``.
+
+        Each group is resolved once and cached for the life of the reader.
+
+        Args:
+            path (str): The slash separated path of the group; empty for the
+                root group.
+        """
+        try:
+            return self._groups[path]
+        except KeyError:
+            pass
+        if not path:
+            group = self.root
+        elif self.is_netcdf:
+            self.stats["group_opens"] += 1
+            group = self.root[path]
+        else:
+            group = self.root
+            for name in path.split("/"):
+                group = group[name]
+        self._groups[path] = group
+        return group
+
+    def attr(self, path: str, name: str) -> Any:
+        """Returns an attribute of the group at ``path``.
+
+        Attributes are cached per group, so each one is read from the granule
+        at most once however many times it is asked for.
+        """
+        attrs = self._attrs.setdefault(path, {})
+        try:
+            return attrs[name]
+        except KeyError:
+            pass
+        group = self.group(path)
+        if self.is_netcdf:
+            self.stats["attr_reads"] += 1
+            if self._file is not None:
+                value = group.attrs[name]
+            else:
+                value = group.getncattr(name)
+        else:
+            value = group[name]
+        attrs[name] = value
+        return value
+
+    def read_attrs(self, path: str, names: Sequence[str]) -> List[Any]:
+        """Returns attributes of the group at ``path``, in order."""
+        return [self.attr(path, name) for name in names]
+
+    def read_dimensions(self, path: str, names: Sequence[str]) -> List[int]:
+        """Returns dimension sizes of the group at ``path``, in order."""
+        if not names:
+            return []
+        group = self.group(path)
+        if self.is_netcdf:
+            dimensions = group.dimensions
+            return [dimensions[name].size for name in names]
+        dimensions = group["dimensions"]
+        return [dimensions[name] for name in names]
+
+    def close(self) -> None:
+        """Closes the underlying netCDF4 dataset, if any."""
+        if self._file is not None:
+            if not self._file.closed:
+                self.root.close()
+                self._file.close()
+        elif self.is_netcdf and self.root.isopen():
+            self.root.close()
+
+    def __enter__(self) -> "GranuleReader":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
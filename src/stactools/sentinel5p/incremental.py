@@ -0,0 +1,228 @@
+"""Incremental ingestion: skipping granules whose items already exist.
+
+An item id is the name of its granule without suffixes, so granules can be
+checked against existing items before they are opened. The ids of existing
+items are loaded from directories of item files, NDJSON files of items, or
+granule indexes, into an :class:`ItemIdSet` of 64-bit hashes (8 bytes per
+id), or a :class:`BloomFilter` for very large catalogs.
+"""
+
+import functools
+import gzip
+import hashlib
+import math
+import os
+from array import array
+from typing import Callable, Counter, Iterable, Iterator, List, Optional, Tuple, Union
+
+import fsspec  # type: ignore
+import numpy as np
+
+from . import fastjson, remote
+from .index import query_index
+from .ndjson import GZIP_MAGIC, NDJSON_SUFFIXES
+
+INDEX_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+ITEM_SUFFIX = ".json"
+
+# The default false positive rate of Bloom filters
+BLOOM_ERROR_RATE = 1e-6
+
+
+def item_id(href: str) -> str:
+    """Returns the id of the item of a granule, from its href."""
+    return href.rpartition("/")[2].split(".", 1)[0]
+
+
+def _hash64(value: str) -> int:
+    digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class ItemIdSet:
+    """A compact set of item ids, held as a sorted array of their 64-bit
+    hashes.
+
+    Lookups of ids not in the set are wrong with a probability of about
+    ``len(self) / 2**64``.
+    """
+
+    def __init__(self, ids: Iterable[str]) -> None:
+        hashes = array("Q", map(_hash64, ids))
+        self._hashes = np.unique(np.frombuffer(hashes, dtype=np.uint64))
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, id: object) -> bool:
+        if not isinstance(id, str):
+            return False
+        value = np.uint64(_hash64(id))
+        i = int(np.searchsorted(self._hashes, value))
+        return i < len(self._hashes) and bool(self._hashes[i] == value)
+
+
+class BloomFilter:
+    """A Bloom filter of item ids.
+
+    Args:
+        capacity (int): The number of ids the filter is sized for.
+        error_rate (float): The rate of false positives once ``capacity``
+            ids have been added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE) -> None:
+        capacity = max(capacity, 1)
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def _positions(self, id: str) -> Iterator[int]:
+        digest = hashlib.blake2b(id.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, id: str) -> None:
+        for position in self._positions(id):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, id: object) -> bool:
+        if not isinstance(id, str):
+            return False
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(id)
+        )
+
+
+def _list_item_files(directory: str) -> Iterator[str]:
+    names: Iterable[str]
+    if remote.is_url(directory):
+        fs, path = fsspec.core.url_to_fs(directory)
+        names = (name.rpartition("/")[2] for name in fs.ls(path, detail=False))
+    else:
+        names = os.listdir(directory)
+    return (name for name in names if name.endswith(ITEM_SUFFIX))
+
+
+def _iter_ndjson_ids(source: str) -> Iterator[str]:
+    with fsspec.open(source, "rb") as f:
+        # Told apart by content, as files of any name may be compressed
+        compressed = f.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+        f.seek(0)
+        lines = gzip.GzipFile(fileobj=f) if compressed else f
+        for line in lines:
+            if line.strip():
+                yield fastjson.loads(line)["id"]
+
+
+def iter_item_ids(source: str, ndjson: bool = False) -> Iterator[str]:
+    """Yields the ids of the existing items of a source.
+
+    Args:
+        source (str): A directory of item files named by their ids, as
+            written by ``create-items``; an NDJSON file of items, which may be
+            gzip compressed; or a granule index.
+        ndjson (bool): Read the source as an NDJSON file of items, whatever
+            its name.
+
+    Returns:
+        Iterator[str]: The ids of the items.
+    """
+    if ndjson or source.endswith(NDJSON_SUFFIXES):
+        yield from _iter_ndjson_ids(source)
+    elif source.endswith(INDEX_SUFFIXES):
+        for record in query_index(source):
+            yield record.id
+    else:
+        for name in _list_item_files(source):
+            yield name[: -len(ITEM_SUFFIX)]
+
+
+def _exists(source: str) -> bool:
+    if remote.is_url(source):
+        fs, path = fsspec.core.url_to_fs(source)
+        return bool(fs.exists(path))
+    return os.path.exists(source)
+
+
+def load_item_ids(
+    sources: Iterable[str],
+    bloom: bool = False,
+    error_rate: float = BLOOM_ERROR_RATE,
+    ndjson_sources: Iterable[str] = (),
+    geoparquet_sources: Iterable[str] = (),
+) -> Union[ItemIdSet, BloomFilter]:
+    """Loads the ids of existing items, for :func:`skip_existing`.
+
+    Args:
+        sources (Iterable[str]): Sources of existing items, as taken by
+            :func:`iter_item_ids`. Sources that do not exist yet are ignored.
+        bloom (bool): Load the ids into a Bloom filter rather than a set of
+            hashes. The sources are read twice, first to size the filter.
+        error_rate (float): The false positive rate of the Bloom filter.
+        ndjson_sources (Iterable[str]): Further sources read as NDJSON files
+            of items whatever their names, such as the file ``create-items``
+            appends to.
+        geoparquet_sources (Iterable[str]): Further sources read as GeoParquet
+            datasets of items; this needs the ``parquet`` extra.
+
+    Returns:
+        Union[ItemIdSet, BloomFilter]: The ids.
+    """
+    readers: List[Tuple[str, Callable[[str], Iterator[str]]]] = []
+    readers.extend((source, iter_item_ids) for source in sources)
+    readers.extend(
+        (source, functools.partial(iter_item_ids, ndjson=True))
+        for source in ndjson_sources
+    )
+    if geoparquet_sources:
+        from .geoparquet import iter_dataset_item_ids
+
+        readers.extend((source, iter_dataset_item_ids) for source in geoparquet_sources)
+    readers = [(source, read) for source, read in readers if _exists(source)]
+
+    def iter_ids() -> Iterator[str]:
+        for source, read in readers:
+            yield from read(source)
+
+    if not bloom:
+        return ItemIdSet(iter_ids())
+    capacity = sum(1 for _ in iter_ids())
+    ids = BloomFilter(capacity, error_rate)
+    for id in iter_ids():
+        ids.add(id)
+    return ids
+
+
+def skip_existing(
+    hrefs: Iterable[str],
+    ids: Union[ItemIdSet, BloomFilter],
+    stats: Optional[Counter[str]] = None,
+) -> Iterator[str]:
+    """Drops the granules whose items already exist from a stream of hrefs,
+    without opening them.
+
+    Args:
+        hrefs (Iterable[str]): The hrefs of the granules.
+        ids (Union[ItemIdSet, BloomFilter]): The ids of the existing items.
+        stats (Optional[Counter[str]]): Counts ``skipped_existing``.
+
+    Returns:
+        Iterator[str]: The hrefs of the granules without items.
+    """
+    for href in hrefs:
+        if item_id(href) in ids:
+            if stats is not None:
+                stats["skipped_existing"] += 1
+            continue
+        yield href
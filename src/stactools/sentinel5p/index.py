@@ -0,0 +1,276 @@
+"""A SQLite index of Sentinel-5P granules, built from their names alone.
+
+Each granule name is parsed with :data:`~stactools.sentinel5p.constants.FILENAME_EXPR`
+into a row of the ``granules`` table, so that archives of millions of
+granules can be queried by product, mode, time and orbit without listing
+object stores again. Datetimes are stored as ISO 8601 strings in UTC, which
+sort as the datetimes do.
+"""
+
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .naming import FILENAME_EXPR
+
+BATCH_SIZE = 50_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS granules (
+    href TEXT NOT NULL,
+    product TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    orbit INTEGER NOT NULL,
+    start_datetime TEXT NOT NULL,
+    end_datetime TEXT NOT NULL,
+    collection TEXT NOT NULL,
+    processor_version TEXT NOT NULL,
+    production_datetime TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS properties (
+    name TEXT PRIMARY KEY,
+    value
+);
+"""
+
+HREF_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS granules_href ON granules (href)"
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS granules_product_start
+    ON granules (product, mode, start_datetime);
+CREATE INDEX IF NOT EXISTS granules_orbit ON granules (orbit);
+"""
+
+COLUMNS = (
+    "href",
+    "product",
+    "mode",
+    "orbit",
+    "start_datetime",
+    "end_datetime",
+    "collection",
+    "processor_version",
+    "production_datetime",
+)
+
+
+class IndexRecord(NamedTuple):
+    """A granule of the index."""
+
+    href: str
+    product: str
+    mode: str
+    orbit: int
+    start_datetime: str
+    end_datetime: str
+    collection: str
+    processor_version: str
+    production_datetime: str
+
+    @property
+    def id(self) -> str:
+        """The granule name, which is the id of its item."""
+        return self.href.rpartition("/")[2].split(".", 1)[0]
+
+
+def _iso(value: str) -> str:
+    # 20200303T013547 -> 2020-03-03T01:35:47Z
+    return (
+        f"{value[0:4]}-{value[4:6]}-{value[6:8]}T"
+        f"{value[9:11]}:{value[11:13]}:{value[13:15]}Z"
+    )
+
+
+def parse_granule_name(href: str) -> Optional[IndexRecord]:
+    """Returns the index record of a granule, from its name alone.
+
+    Args:
+        href (str): The path or URL of a granule or its sidecar.
+
+    Returns:
+        Optional[IndexRecord]: The record, or ``None`` if the name does not
+        follow the Sentinel-5P naming convention.
+    """
+    name = href.rpartition("/")[2].split(".", 1)[0]
+    match = FILENAME_EXPR.match(name)
+    if match is None:
+        return None
+    (
+        mode,
+        _,
+        _,
+        product,
+        start_datetime,
+        end_datetime,
+        orbit,
+        collection,
+        processor_version,
+        production_datetime,
+    ) = match.groups()
+    return IndexRecord(
+        href,
+        product.strip("_"),
+        mode,
+        int(orbit),
+        _iso(start_datetime),
+        _iso(end_datetime),
+        collection,
+        processor_version,
+        _iso(production_datetime),
+    )
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Opens the index at ``path``, creating it if need be."""
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def build_index(
+    hrefs: Iterable[str], path: str, batch_size: int = BATCH_SIZE
+) -> Tuple[int, int]:
+    """Adds granules to the index at ``path``, in a single streaming pass.
+
+    Granules already in the index are replaced. The query indexes are
+    created, or brought up to date, once all rows are written.
+
+    Args:
+        hrefs (Iterable[str]): The hrefs of the granules; may be an
+            arbitrarily long stream.
+        path (str): The path of the SQLite index.
+        batch_size (int): The number of rows written per statement.
+
+    Returns:
+        Tuple[int, int]: The number of granules indexed, and of hrefs skipped
+        because their names do not follow the Sentinel-5P naming convention.
+    """
+    indexed = 0
+    skipped = 0
+    new = not os.path.exists(path)
+    connection = connect(path)
+    try:
+        if new:
+            # Safe without a journal, as a new index can be built again if
+            # writing it is cut short; existing indexes keep the defaults
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            # Indexes are faster to build once the table is filled
+            insert = "INSERT INTO granules VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        else:
+            connection.execute(HREF_INDEX)
+            insert = (
+                "INSERT OR REPLACE INTO granules VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            )
+        iterator = iter(hrefs)
+        while True:
+            chunk = list(islice(iterator, batch_size))
+            if not chunk:
+                break
+            batch = [
+                record
+                for record in map(parse_granule_name, chunk)
+                if record is not None
+            ]
+            skipped += len(chunk) - len(batch)
+            with connection:
+                connection.executemany(insert, batch)
+            indexed += len(batch)
+        if new:
+            try:
+                connection.execute(HREF_INDEX)
+            except sqlite3.IntegrityError:
+                # Keep the last row of each href listed more than once, as
+                # replacing rows would have
+                connection.execute(
+                    "DELETE FROM granules WHERE rowid NOT IN "
+                    "(SELECT max(rowid) FROM granules GROUP BY href)"
+                )
+                connection.execute(HREF_INDEX)
+        connection.executescript(INDEXES)
+        # Bounds the start of granules that overlap a time, see query_index
+        connection.execute(
+            "INSERT OR REPLACE INTO properties SELECT 'max_duration', "
+            "max(strftime('%s', end_datetime) - strftime('%s', start_datetime)) "
+            "FROM granules"
+        )
+        connection.commit()
+    finally:
+        connection.close()
+    return indexed, skipped
+
+
+def _iso_datetime(value: datetime) -> str:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def query_index(
+    path: str,
+    product: Optional[str] = None,
+    mode: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    orbits: Optional[Tuple[int, int]] = None,
+    collection: Optional[str] = None,
+) -> Iterator[IndexRecord]:
+    """Queries the index at ``path``.
+
+    Args:
+        path (str): The path of the SQLite index.
+        product (Optional[str]): The product, such as ``NO2`` or ``AER_AI``.
+        mode (Optional[str]): The processing mode, such as ``OFFL`` or ``NRTI``.
+        start (Optional[datetime]): Only granules whose sensing ends at or
+            after this time. Naive datetimes are taken to be in UTC.
+        end (Optional[datetime]): Only granules whose sensing starts before
+            this time.
+        orbits (Optional[Tuple[int, int]]): The first and last orbits.
+        collection (Optional[str]): The collection, such as ``01``.
+
+    Returns:
+        Iterator[IndexRecord]: The matching granules, ordered by start time.
+    """
+    conditions = []
+    parameters: List[object] = []
+    if product is not None:
+        conditions.append("product = ?")
+        parameters.append(product.strip("_").upper())
+    if mode is not None:
+        conditions.append("mode = ?")
+        parameters.append(mode.upper())
+    if end is not None:
+        conditions.append("start_datetime < ?")
+        parameters.append(_iso_datetime(end))
+    if orbits is not None:
+        conditions.append("orbit BETWEEN ? AND ?")
+        parameters.extend(orbits)
+    if collection is not None:
+        conditions.append("collection = ?")
+        parameters.append(collection)
+
+    uri = Path(path).absolute().as_uri() + "?mode=ro"
+    connection = sqlite3.connect(uri, uri=True)
+    try:
+        if start is not None:
+            conditions.append("end_datetime >= ?")
+            parameters.append(_iso_datetime(start))
+            # Granules that end after the start began at most the longest
+            # duration before it, which the start time index narrows down to
+            row = connection.execute(
+                "SELECT value FROM properties WHERE name = 'max_duration'"
+            ).fetchone()
+            if row is not None and row[0] is not None:
+                conditions.append("start_datetime >= ?")
+                parameters.append(_iso_datetime(start - timedelta(seconds=row[0])))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = (
+            f"SELECT {', '.join(COLUMNS)} FROM granules{where} ORDER BY start_datetime"
+        )
+        for row in connection.execute(sql, parameters):
+            yield IndexRecord(*row)
+    finally:
+        connection.close()
@@ -1,9 +1,10 @@
-import json
+from typing import Union
 
-import netCDF4 as nc  # type: ignore
 import pystac
 
 from .constants import SAFE_MANIFEST_ASSET_KEY, SENTINEL_TROPOMI_BANDS
+from .granule import GranuleError, GranuleReader
+from .sidecar import netcdf_href
 
 
 class ManifestError(Exception):
@@ -11,16 +12,14 @@ class ManifestError(Exception):
 
 
 class MetadataLinks:
-    def __init__(self, file_path: str):
-        self.file_path = file_path
-        if file_path.endswith(".nc"):
-            self._root = nc.Dataset(file_path)
-        elif file_path.endswith(".json"):
-            self._root = json.load(open(file_path))
-        else:
-            raise ManifestError(
-                f"Source file format is not supported: .{file_path.split('.')[-1]}"
-            )
+    def __init__(self, granule: Union[str, GranuleReader]):
+        if not isinstance(granule, GranuleReader):
+            try:
+                granule = GranuleReader(granule)
+            except GranuleError as e:
+                raise ManifestError(str(e)) from e
+        self.granule = granule
+        self.file_path = granule.file_path
 
     def create_manifest_asset(self):
         if self.file_path.endswith(".nc"):
@@ -69,10 +68,9 @@ class MetadataLinks:
         roles = ["data"]
         if self.file_path.endswith(".nc"):
             data_href = self.file_path
-            description = self._root.title
         else:
-            data_href = self.file_path.replace(".json", ".nc")
-            description = self._root["title"]
+            data_href = netcdf_href(self.file_path)
+        description = self.granule.attr("", "title")
         asset = pystac.Asset(
             href=data_href,
             media_type=media_type,
@@ -0,0 +1,16 @@
+"""The Sentinel-5P naming convention of granules.
+
+Kept apart from :mod:`~stactools.sentinel5p.constants`, and free of heavy
+imports, so that commands that only parse granule names load quickly.
+"""
+
+import re
+
+FILENAME_EXPR = re.compile(
+    r"S5P_(?P<mode>[A-Z]{4})_(?P<product_type>L(?P<level>[0-9]{1})_(?P<product>.{7}))_"
+    r"(?P<start_datetime>[0-9,A-Z]{15})_(?P<end_datetime>[0-9,A-Z]{15})_"
+    r"(?P<orbit>[0-9]{5})_(?P<collection>[0-9]{2})_(?P<processor_version>[0-9]{6})_"
+    r"(?P<production_datetime>[0-9,A-Z]{15})"
+)
+
+FILENAME_DATETIME_FORMAT = "%Y%m%dT%H%M%S"
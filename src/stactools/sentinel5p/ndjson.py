@@ -0,0 +1,69 @@
+"""Newline-delimited JSON (NDJSON) files of items, one item per line."""
+
+import gzip
+import sys
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional, cast
+
+import fsspec  # type: ignore
+
+NDJSON_SUFFIXES = (".ndjson", ".ndjson.gz")
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _existing_compression(dst: str) -> Optional[bool]:
+    """Returns whether a file is gzip compressed, from its first bytes, or
+    ``None`` if it is missing or empty."""
+    fs, path = fsspec.core.url_to_fs(dst)
+    if not fs.exists(path):
+        return None
+    with fs.open(path, "rb") as f:
+        start = f.read(len(GZIP_MAGIC))
+    return start == GZIP_MAGIC if start else None
+
+
+@contextmanager
+def open_ndjson(
+    dst: str, compress: Optional[bool] = None, append: bool = False
+) -> Iterator[IO[bytes]]:
+    """Opens an NDJSON file for writing items to, as they are built.
+
+    Args:
+        dst (str): The path or fsspec URL of the file, or ``-`` for stdout.
+        compress (Optional[bool]): Gzip compress the file. Defaults to whether
+            ``dst`` ends with ``.gz``.
+        append (bool): Append to the file rather than replace it. Gzip
+            compressed files are appended to as another gzip member, and
+            existing files keep the compression they have.
+
+    Returns:
+        Iterator[IO[bytes]]: The binary file to write lines of JSON to.
+
+    Raises:
+        ValueError: If ``compress`` is given, and differs from the compression
+            of the existing file appended to.
+    """
+    existing = _existing_compression(dst) if append and dst != "-" else None
+    if existing is not None:
+        if compress is not None and compress != existing:
+            raise ValueError(
+                f"Cannot append {'gzip compressed' if compress else 'plain'} "
+                f"NDJSON to {dst}, which is "
+                f"{'gzip compressed' if existing else 'not compressed'}"
+            )
+        compress = existing
+    if compress is None:
+        compress = dst.endswith(".gz")
+    mode = "ab" if append else "wb"
+    if dst == "-":
+        stdout = sys.stdout.buffer
+        if compress:
+            with gzip.GzipFile(fileobj=stdout, mode="wb", mtime=0) as f:
+                yield cast(IO[bytes], f)
+        else:
+            yield stdout
+        stdout.flush()
+        return
+    with fsspec.open(dst, mode, compression="gzip" if compress else None) as f:
+        yield f
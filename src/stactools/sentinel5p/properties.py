@@ -1,31 +1,29 @@
-import json  # type: ignore
-
-import netCDF4 as nc  # type: ignore
+from typing import Union
 
 from .constants import INTERNATIONAL_DESIGNATOR
+from .granule import GranuleReader
 
 
-def fill_sat_properties(sat_ext, href):
+def fill_sat_properties(sat_ext, granule: Union[str, GranuleReader]):
     """Fills the properties for SAR.
     Based on the sat Extension.py
     Args:
         sat_ext (pystac.extensions.sat.SatExtension): The extension to be populated.
-        href (str): The HREF to the scene, this is expected to be an netCDF4 file.
+        granule (Union[str, GranuleReader]): The HREF to the scene, this is expected
+            to be an netCDF4 file, or an already opened GranuleReader.
     Returns:
         pystac.Asset: An asset with the SAT relevant properties.
     """
 
-    if href.endswith(".nc"):
-        root = nc.Dataset(href)
-    else:
-        root = json.load(open(href))
+    if not isinstance(granule, GranuleReader):
+        with GranuleReader(granule) as reader:
+            return fill_sat_properties(sat_ext, reader)
+
+    href = granule.file_path
 
     sat_ext.platform_international_designator = INTERNATIONAL_DESIGNATOR
 
     if "O3_TCL" in href:
         pass
     else:
-        if href.endswith(".nc"):
-            sat_ext.absolute_orbit = int(root.orbit)
-        elif href.endswith(".json"):
-            sat_ext.absolute_orbit = int(root["orbit"])
+        sat_ext.absolute_orbit = int(granule.attr("", "orbit"))
@@ -0,0 +1,170 @@
+"""Reading Sentinel-5P granules from fsspec URLs.
+
+Only a few KB of a granule, the HDF5 superblock and the headers and
+attributes of the ``METADATA`` groups, are needed to build its item, so
+netCDF4 granules are read through a :class:`BlockCachedFile` that fetches
+just the blocks HDF5 asks for, instead of downloading the whole file.
+
+Byte ranges of a granule may also be fetched ahead, as the asyncio pipeline
+of :mod:`~stactools.sentinel5p.aio` does for many granules at a time, and
+handed to the reader as :class:`Prefetched`; only the blocks outside them are
+fetched as HDF5 asks for them.
+"""
+
+import gzip
+import io
+from typing import Any, Counter, NamedTuple, Optional, Tuple
+
+import fsspec  # type: ignore
+from fsspec.caching import BlockCache  # type: ignore
+
+from . import fastjson
+
+DEFAULT_BLOCK_SIZE = 2**16
+MAX_BLOCKS = 64
+
+
+class Prefetched(NamedTuple):
+    """Byte ranges of a granule fetched ahead of reading it.
+
+    Ranges should start at multiples of the block size of the
+    :class:`BlockCachedFile` they are read through, so that whole blocks are
+    found in them.
+    """
+
+    size: int
+    ranges: Tuple[Tuple[int, bytes], ...]
+
+    def read(self, start: int, end: int) -> Optional[bytes]:
+        """Returns the bytes from ``start`` to ``end``, or ``None`` if they
+        are not all within one of the ranges."""
+        # Blocks may reach past the end of the file
+        end = min(end, self.size)
+        for range_start, data in self.ranges:
+            first = start - range_start
+            last = end - range_start
+            if first >= 0 and last <= len(data):
+                return data[first:last]
+        return None
+
+    @property
+    def complete(self) -> bool:
+        """Whether the ranges hold the whole granule."""
+        return sum(len(data) for _, data in self.ranges) == self.size
+
+
+def is_url(href: str) -> bool:
+    """Returns whether an href is a URL to be read through fsspec, rather than
+    a local path."""
+    return "://" in href
+
+
+class BlockCachedFile(io.RawIOBase):
+    """A read-only, seekable file over an fsspec file, fetching whole blocks
+    on demand and keeping the most recently used ones.
+
+    The number of bytes and byte ranges fetched are counted in ``stats``
+    under ``bytes_read`` and ``range_requests``; blocks found in prefetched
+    ranges are not.
+
+    Args:
+        href (str): An fsspec URL.
+        block_size (int): The size of the byte ranges fetched.
+        stats (Optional[Counter[str]]): The counter to count fetches in.
+        prefetched (Optional[Prefetched]): Byte ranges of the file already
+            fetched, and its size. The file is only opened if blocks outside
+            them are read.
+    """
+
+    def __init__(
+        self,
+        href: str,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        stats: Optional[Counter[str]] = None,
+        prefetched: Optional[Prefetched] = None,
+    ) -> None:
+        super().__init__()
+        self._fs, self._path = fsspec.core.url_to_fs(href)
+        self.prefetched = prefetched
+        if prefetched is None:
+            self.size = self._fs.size(self._path)
+        else:
+            self.size = prefetched.size
+        self.stats: Counter[str] = Counter() if stats is None else stats
+        self._file: Any = None
+        self._cache = BlockCache(block_size, self._fetch, self.size, MAX_BLOCKS)
+        self._position = 0
+
+    def _fetch(self, start: int, end: int) -> bytes:
+        if self.prefetched is not None:
+            data = self.prefetched.read(start, end)
+            if data is not None:
+                return data
+        if self._file is None:
+            self._file = self._fs.open(self._path, "rb", cache_type="none")
+        self._file.seek(start)
+        data = self._file.read(end - start)
+        self.stats["bytes_read"] += len(data)
+        self.stats["range_requests"] += 1
+        return data
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self._position = offset
+        return offset
+
+    def readinto(self, buffer: Any) -> int:
+        end = min(self._position + len(buffer), self.size)
+        if end <= self._position:
+            return 0
+        data = self._cache._fetch(self._position, end)
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed and self._file is not None:
+            self._file.close()
+        super().close()
+
+
+def open_netcdf(file: BlockCachedFile) -> Any:
+    """Opens a netCDF4 granule from a file-like object with h5netcdf.
+
+    The groups and dimensions of the returned file are read as with netCDF4,
+    but attributes are read through ``group.attrs`` rather than
+    ``group.getncattr``.
+    """
+    import h5netcdf  # type: ignore
+
+    return h5netcdf.File(file, "r")
+
+
+def load_json(
+    href: str, stats: Counter[str], prefetched: Optional[Prefetched] = None
+) -> Any:
+    """Loads a JSON sidecar, gzip compressed if its name ends with ``.gz``,
+    from an fsspec URL, or from its prefetched bytes if they are complete."""
+    if prefetched is not None and prefetched.complete:
+        data = b"".join(data for _, data in prefetched.ranges)
+    else:
+        with fsspec.open(href, "rb") as f:
+            data = f.read()
+        stats["bytes_read"] += len(data)
+    if href.endswith(".gz"):
+        data = gzip.decompress(data)
+    return fastjson.loads(data)
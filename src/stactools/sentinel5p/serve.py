@@ -0,0 +1,314 @@
+"""A long-running server that creates items for granules as they arrive,
+keeping warm worker processes rather than starting the interpreter, and
+loading netCDF4 and pystac, for every granule.
+
+Requests and responses are JSON lines, read from stdin and written to stdout,
+or exchanged over the connections to a Unix socket. A request names a
+granule, and optionally sets the options of :func:`create_item` for it and a
+``request_id`` that its response carries::
+
+    {"href": "/data/S5P_NRTI_L2__NO2____[...].nc", "request_id": 1}
+    {"href": "/data/S5P_NRTI_L2__CO_____[...].nc", "precision": 4}
+
+and is answered with the item, or the error::
+
+    {"request_id": 1, "href": "/data/S5P_NRTI_L2__NO2____[...].nc", "item": {...}}
+    {"request_id": null, "href": "/data/S5P_NRTI_L2__CO_____[...].nc", "error": "..."}
+
+Requests are handled concurrently, so responses come in the order their items
+are done. ``{"op": "health"}`` and ``{"op": "stats"}`` are answered at once,
+with the status of the server, and with the counts of requests, items, errors
+and of reading granules.
+
+A worker that dies, such as from a crash in HDF5 on a corrupt granule, fails
+the requests it was handling, and those queued with it; the pool of workers
+is then replaced, and counted under ``restarts``.
+"""
+
+import functools
+import os
+import socketserver
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Counter, Dict, Iterable, Optional, Tuple
+
+from . import fastjson
+from .batch import BatchResult, create_item_json
+from .cache import MetadataCache
+
+# The options of create_item that requests may set
+REQUEST_OPTIONS = ("prefer_sidecar", "simplify_tolerance", "precision", "lite")
+
+_FLAGS = ("prefer_sidecar", "lite")
+
+
+class RequestError(Exception):
+    pass
+
+
+def _warm_up() -> None:
+    # Loads netCDF4, shapely and pystac in each worker before the first request
+    from . import stac  # noqa: F401
+
+
+class ItemServer:
+    """Creates items for JSON-lines requests over a pool of worker processes.
+
+    Args:
+        jobs (Optional[int]): The number of worker processes. Defaults to the
+            number of CPUs.
+        cache (Optional[MetadataCache]): A cache of the metadata read from
+            granules.
+        **defaults: Defaults of the options of :func:`create_item` that
+            requests may set, named in :data:`REQUEST_OPTIONS`.
+    """
+
+    def __init__(
+        self,
+        jobs: Optional[int] = None,
+        cache: Optional[MetadataCache] = None,
+        **defaults: Any,
+    ) -> None:
+        unknown = set(defaults) - set(REQUEST_OPTIONS)
+        if unknown:
+            raise TypeError(f"Unknown options: {', '.join(sorted(unknown))}")
+        self.workers = jobs or os.cpu_count() or 1
+        self.cache = cache
+        self.defaults = defaults
+        self.stats: Counter[str] = Counter()
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        # At most a few requests per worker are queued at a time, so that
+        # reading requests waits for the workers
+        self._slots = threading.BoundedSemaphore(4 * self.workers)
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up)
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        # A worker died, such as from a segfault reading a corrupt granule,
+        # which breaks the whole pool; the first to notice replaces it
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._new_executor()
+            self.stats["restarts"] += 1
+        broken.shutdown(wait=False)
+
+    def __enter__(self) -> "ItemServer":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Waits for the requests being handled, and stops the workers."""
+        self._executor.shutdown(wait=True)
+
+    def health(self) -> Dict[str, Any]:
+        """Returns the status of the server."""
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "pending": self.stats["pending"],
+            "uptime_s": round(time.monotonic() - self.started, 3),
+        }
+
+    def _parse(self, line: str) -> Dict[str, Any]:
+        try:
+            request = fastjson.loads(line)
+        except ValueError as e:
+            raise RequestError(f"Invalid JSON: {e}") from e
+        if not isinstance(request, dict):
+            raise RequestError("Requests must be JSON objects")
+        return request
+
+    def _options(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        href = request.get("href")
+        if not isinstance(href, str):
+            raise RequestError("Requests must have an href")
+        unknown = set(request) - set(REQUEST_OPTIONS) - {"href", "request_id"}
+        if unknown:
+            raise RequestError(f"Unknown options: {', '.join(sorted(unknown))}")
+        options = dict(self.defaults)
+        for name in REQUEST_OPTIONS:
+            if name in request:
+                options[name] = self._check_option(name, request[name])
+        return options
+
+    @staticmethod
+    def _check_option(name: str, value: Any) -> Any:
+        if name in _FLAGS:
+            if not isinstance(value, bool):
+                raise RequestError(f"{name} must be true or false")
+            return value
+        if value is None:
+            return value
+        if name == "precision":
+            valid = isinstance(value, int) and not isinstance(value, bool)
+        else:
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+        if not valid or value < 0:
+            kind = "an integer" if name == "precision" else "a number"
+            raise RequestError(f"{name} must be {kind} of at least 0, or null")
+        return value
+
+    def handle(self, line: str, respond: Callable[[str], None]) -> None:
+        """Handles a request, calling ``respond`` once with the JSON line of
+        its response, without its newline; from another thread if the request
+        creates an item."""
+        request: Dict[str, Any] = {}
+        try:
+            request = self._parse(line)
+            op = request.get("op")
+            if op == "health":
+                respond(fastjson.dumps({**self._envelope(request), **self.health()}))
+                return
+            if op == "stats":
+                with self._lock:
+                    stats: Dict[str, Any] = dict(self.stats)
+                stats["uptime_s"] = round(time.monotonic() - self.started, 3)
+                respond(fastjson.dumps({**self._envelope(request), "stats": stats}))
+                return
+            if op is not None:
+                raise RequestError(f"Unknown op: {op}")
+            options = self._options(request)
+        except RequestError as e:
+            with self._lock:
+                self.stats["requests"] += 1
+                self.stats["errors"] += 1
+            respond(fastjson.dumps({**self._envelope(request), "error": str(e)}))
+            return
+
+        self._slots.acquire()
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["pending"] += 1
+        try:
+            executor, future = self._submit(request["href"], options)
+        except Exception as e:
+            self._slots.release()
+            with self._lock:
+                self.stats["pending"] -= 1
+                self.stats["errors"] += 1
+            error = f"{type(e).__name__}: {e}"
+            respond(fastjson.dumps({**self._envelope(request), "error": error}))
+            return
+        future.add_done_callback(
+            functools.partial(self._done, executor, request, respond)
+        )
+
+    def _submit(
+        self, href: str, options: Dict[str, Any]
+    ) -> "Tuple[ProcessPoolExecutor, Future[BatchResult]]":
+        executor = self._executor
+        try:
+            future = executor.submit(
+                create_item_json, href, None, cache=self.cache, **options
+            )
+        except BrokenProcessPool:
+            self._restart(executor)
+            executor = self._executor
+            future = executor.submit(
+                create_item_json, href, None, cache=self.cache, **options
+            )
+        return executor, future
+
+    @staticmethod
+    def _envelope(request: Dict[str, Any]) -> Dict[str, Any]:
+        envelope = {"request_id": request.get("request_id")}
+        if "href" in request:
+            envelope["href"] = request["href"]
+        return envelope
+
+    def _done(
+        self,
+        executor: ProcessPoolExecutor,
+        request: Dict[str, Any],
+        respond: Callable[[str], None],
+        future: "Future[BatchResult]",
+    ) -> None:
+        self._slots.release()
+        try:
+            result = future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._restart(executor)
+            result = BatchResult(request["href"], error=f"{type(e).__name__}: {e}")
+        with self._lock:
+            self.stats["pending"] -= 1
+            if result.error is None:
+                self.stats["items"] += 1
+                self.stats.update(result.stats or {})
+            else:
+                self.stats["errors"] += 1
+        envelope = fastjson.dumps(self._envelope(request))
+        if result.error is None:
+            # The item is spliced in, rather than parsed and dumped again
+            respond(f'{envelope[:-1]},"item":{result.item_json}}}')
+        else:
+            respond(fastjson.dumps({**self._envelope(request), "error": result.error}))
+
+    def serve_lines(self, lines: Iterable[str], respond: Callable[[str], None]) -> None:
+        """Handles requests, one per line, and waits for their responses.
+
+        Args:
+            lines (Iterable[str]): The requests; blank lines are skipped.
+            respond (Callable[[str], None]): Called with each response, from
+                one thread at a time.
+        """
+        # Every request is answered once
+        answered = threading.Condition()
+        counts: Counter[str] = Counter()
+
+        def respond_once(response: str) -> None:
+            with answered:
+                respond(response)
+                counts["answered"] += 1
+                answered.notify_all()
+
+        for line in lines:
+            if not line.strip():
+                continue
+            with answered:
+                counts["requests"] += 1
+            self.handle(line, respond_once)
+        with answered:
+            answered.wait_for(lambda: counts["answered"] == counts["requests"])
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "SocketServer"
+
+    def handle(self) -> None:
+        def respond(response: str) -> None:
+            try:
+                self.wfile.write(response.encode("utf-8") + b"\n")
+                self.wfile.flush()
+            except OSError:
+                # The client went away
+                pass
+
+        lines = (line.decode("utf-8") for line in self.rfile)
+        self.server.item_server.serve_lines(lines, respond)
+
+
+class SocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves an :class:`ItemServer` over a Unix socket, handling each
+    connection in its own thread."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, item_server: ItemServer) -> None:
+        self.item_server = item_server
+        super().__init__(path, _Handler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.remove(self.server_address)  # type: ignore
+        except FileNotFoundError:
+            pass
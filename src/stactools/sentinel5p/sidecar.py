@@ -0,0 +1,165 @@
+"""JSON metadata sidecars of Sentinel-5P netCDF4 granules.
+
+A sidecar mirrors the metadata of its granule: every group is a nested
+object holding the group's attributes, its subgroups, and its dimension sizes
+under ``"dimensions"``. Items built from a sidecar that sits next to its
+granule are identical to those built from the granule, without reading HDF5.
+
+Compact sidecars hold only the groups, attributes and dimensions that items
+are built from, and may be gzip compressed.
+"""
+
+import gzip
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import fsspec  # type: ignore
+import netCDF4 as nc  # type: ignore
+import numpy as np
+
+from . import fastjson, remote
+from .extraction import EXTRACTION_PLANS, ITEM_SOURCES
+from .granule import JSON_SUFFIXES, GranuleReader
+from .product_metadata import ProductMetadata
+
+SIDECAR_SUFFIX = ".json"
+COMPRESSED_SIDECAR_SUFFIX = ".json.gz"
+
+
+def sidecar_href(href: str, compress: bool = False) -> str:
+    """Returns the href of the sidecar of a netCDF4 granule, next to it."""
+    suffix = COMPRESSED_SIDECAR_SUFFIX if compress else SIDECAR_SUFFIX
+    return os.path.splitext(href)[0] + suffix
+
+
+def netcdf_href(href: str) -> str:
+    """Returns the href of the netCDF4 granule next to a sidecar."""
+    for suffix in sorted(JSON_SUFFIXES, key=len, reverse=True):
+        if href.endswith(suffix):
+            return href[: -len(suffix)] + ".nc"
+    return href
+
+
+def _exists(href: str) -> bool:
+    if remote.is_url(href):
+        fs, path = fsspec.core.url_to_fs(href)
+        return bool(fs.exists(path))
+    return os.path.exists(href)
+
+
+def find_sidecar(href: str) -> Optional[str]:
+    """Returns the href of the sidecar next to a netCDF4 granule, if there is
+    one.
+
+    Args:
+        href (str): The path or fsspec URL of the granule.
+
+    Returns:
+        Optional[str]: The href of the sidecar, uncompressed or else gzip
+        compressed, or ``None`` if ``href`` is not a netCDF4 granule or has no
+        sidecar.
+    """
+    if not href.endswith(".nc"):
+        return None
+    for compress in (False, True):
+        candidate = sidecar_href(href, compress)
+        if _exists(candidate):
+            return candidate
+    return None
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def group_to_dict(group: Any) -> Dict[str, Any]:
+    """Returns the metadata of a netCDF4 group and its subgroups, as laid out
+    in sidecars."""
+    result = {name: _to_json(group.getncattr(name)) for name in group.ncattrs()}
+    for name, subgroup in group.groups.items():
+        result[name] = group_to_dict(subgroup)
+    if group.dimensions:
+        result["dimensions"] = {
+            name: dimension.size for name, dimension in group.dimensions.items()
+        }
+    return result
+
+
+def _item_sources(product_type: str) -> List[Tuple[str, List[str], List[str]]]:
+    groups: Dict[str, Tuple[List[str], List[str]]] = {}
+    plan = EXTRACTION_PLANS[product_type]
+    for path, attribute_names, dimension_names in plan.groups:
+        groups[path] = (list(attribute_names), list(dimension_names))
+    for source in ITEM_SOURCES:
+        names, _ = groups.setdefault(source.group, ([], []))
+        if source.name not in names:
+            names.append(source.name)
+    return [(path, names, dims) for path, (names, dims) in groups.items()]
+
+
+def compact_metadata(granule: GranuleReader) -> Dict[str, Any]:
+    """Returns the metadata items are built from, as laid out in sidecars.
+
+    Args:
+        granule (GranuleReader): The opened granule, or sidecar.
+
+    Returns:
+        Dict[str, Any]: The groups, attributes and dimensions read to build
+        the item of the granule.
+    """
+    product_type = ProductMetadata(granule).product_type
+    result: Dict[str, Any] = {}
+    for path, attribute_names, dimension_names in _item_sources(product_type):
+        target = result
+        for name in path.split("/") if path else ():
+            target = target.setdefault(name, {})
+        for name in attribute_names:
+            try:
+                value = granule.attr(path, name)
+            except (AttributeError, IndexError, KeyError):
+                # Not every product has every attribute read for items
+                continue
+            target[name] = _to_json(value)
+        if dimension_names:
+            sizes = granule.read_dimensions(path, dimension_names)
+            target["dimensions"] = dict(zip(dimension_names, sizes))
+    return result
+
+
+def write_sidecar(
+    href: str,
+    dst: Optional[str] = None,
+    compact: bool = True,
+    compress: bool = False,
+) -> str:
+    """Writes the sidecar of a netCDF4 granule.
+
+    Args:
+        href (str): The path or fsspec URL of the granule.
+        dst (Optional[str]): The href of the sidecar. Defaults to the sidecar
+            href next to the granule.
+        compact (bool): Only write the metadata items are built from. Full
+            sidecars can only be written from local granules.
+        compress (bool): Gzip compress the sidecar.
+
+    Returns:
+        str: The href of the sidecar written.
+    """
+    if dst is None:
+        dst = sidecar_href(href, compress)
+    if compact:
+        with GranuleReader(href) as granule:
+            metadata = compact_metadata(granule)
+    else:
+        with nc.Dataset(href) as dataset:
+            metadata = group_to_dict(dataset)
+    data = fastjson.dumpb(metadata)
+    if compress:
+        data = gzip.compress(data, mtime=0)
+    with fsspec.open(dst, "wb") as f:
+        f.write(data)
+    return dst
@@ -1,23 +1,37 @@
 import logging
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Counter, Dict, List, NamedTuple, Optional, Union
 
 import pystac
-from pystac.extensions.sat import SatExtension
+import stactools.core
+from pystac.utils import datetime_to_str
+from shapely.geometry import mapping  # type: ignore
 
+from .cache import MetadataCache
 from .constants import (
-    ABOUT_LINKS,
-    ASSET_TITLES,
+    FILENAME_DATETIME_FORMAT,
     FILENAME_EXPR,
+    GLOBAL_GEOMETRY,
+    INTERNATIONAL_DESIGNATOR,
+    LITE_PROPERTY,
+    O3_TCL_GEOMETRY,
     SENTINEL_CONSTELLATION,
-    SENTINEL_PROVIDER,
+    SENTINEL_INSTRUMENTS,
+    SENTINEL_PLATFORM,
 )
-from .metadata_links import MetadataLinks
+from .granule import GranuleReader
 from .product_metadata import ProductMetadata
-from .properties import fill_sat_properties
+from .remote import Prefetched
+from .sidecar import find_sidecar, netcdf_href
+from .templates import ItemTemplate, item_template
 
 logger = logging.getLogger(__name__)
 
+# Read and write items at fsspec URLs; done when items are first built rather
+# than when the package is imported, as stactools.core is slow to import
+stactools.core.use_fsspec()
+
 
 # ---
 # This module includes copious contributions ported from the Microsoft Planetary
@@ -48,28 +62,282 @@ def recursive_round(coordinates: List[Any], precision: int) -> List[Any]:
     return rounded
 
 
-def create_item(file_path: str) -> pystac.Item:
-    """Create a STC Item from a Sentinel-5P scene.
+def _filename_datetime(value: str) -> datetime:
+    return datetime.strptime(value, FILENAME_DATETIME_FORMAT).replace(
+        tzinfo=timezone.utc
+    )
+
+
+class GranuleRecord:
+    """The values an item is built from, read from a granule or its name.
+
+    A record serializes straight to the dict of its item with
+    :meth:`to_dict`, without building the ``pystac`` object graph, for bulk
+    outputs such as NDJSON; or builds the item with :meth:`to_item`.
+    """
+
+    __slots__ = (
+        "id",
+        "geometry",
+        "bbox",
+        "datetime",
+        "properties",
+        "template",
+        "data_href",
+        "description",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        geometry: Dict[str, Any],
+        bbox: List[float],
+        datetime: Optional[datetime],
+        properties: Dict[str, Any],
+        template: ItemTemplate,
+        data_href: str,
+        description: Optional[str] = None,
+    ) -> None:
+        self.id = id
+        self.geometry = geometry
+        self.bbox = bbox
+        self.datetime = datetime
+        self.properties = properties
+        self.template = template
+        self.data_href = data_href
+        self.description = description
+
+    def to_item(self) -> pystac.Item:
+        """Returns the item of the record, which takes over its properties."""
+        item = pystac.Item(
+            id=self.id,
+            geometry=self.geometry,
+            bbox=self.bbox,
+            datetime=self.datetime,
+            properties=self.properties,
+            stac_extensions=list(self.template.stac_extensions),
+        )
+        item.add_asset(
+            self.template.asset_id,
+            self.template.new_asset(self.data_href, self.description),
+        )
+        item.links.append(self.template.new_about_link())
+        return item
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the dict of the item of the record, the same as
+        ``record.to_item().to_dict()``, which takes over its properties."""
+        properties = self.properties
+        properties["datetime"] = (
+            None if self.datetime is None else datetime_to_str(self.datetime)
+        )
+        item: Dict[str, Any] = {
+            "type": "Feature",
+            "stac_version": pystac.get_stac_version(),
+            "stac_extensions": list(self.template.stac_extensions),
+            "id": self.id,
+            "geometry": self.geometry,
+            "bbox": self.bbox,
+            "properties": properties,
+            "links": [self.template.new_about_link_dict()],
+            "assets": {
+                self.template.asset_id: self.template.new_asset_dict(
+                    self.data_href, self.description
+                )
+            },
+        }
+        if not self.geometry:
+            del item["bbox"]
+        return item
+
+
+def read_lite_record(file_path: str) -> GranuleRecord:
+    """Reads the record of a lite item from the name of a Sentinel-5P scene;
+    see :func:`create_lite_item`."""
+    stem = file_path.rpartition("/")[2].split(".")[0]
+    s5p_naming = FILENAME_EXPR.match(stem)
+    if not s5p_naming:
+        raise ValueError(
+            "Granule name does not match Sentinel-5p naming convention(s):" + stem
+        )
+    product_type = s5p_naming.group("product_type")
+    template = item_template(product_type)
+    footprint = O3_TCL_GEOMETRY if "O3_TCL" in product_type else GLOBAL_GEOMETRY
+    start_datetime = _filename_datetime(s5p_naming.group("start_datetime"))
+    end_datetime = _filename_datetime(s5p_naming.group("end_datetime"))
+
+    properties: Dict[str, Any] = {
+        "sat:platform_international_designator": INTERNATIONAL_DESIGNATOR
+    }
+    if "O3_TCL" not in product_type:
+        properties["sat:absolute_orbit"] = int(s5p_naming.group("orbit"))
+    properties.update(
+        {
+            "start_datetime": datetime_to_str(start_datetime),
+            "end_datetime": datetime_to_str(end_datetime),
+            "instruments": list(SENTINEL_INSTRUMENTS),
+            "providers": template.new_providers(),
+            "platform": SENTINEL_PLATFORM,
+            "constellation": SENTINEL_CONSTELLATION,
+            "s5p:processing_mode": s5p_naming.group("mode"),
+            "s5p:product_type": product_type,
+            "s5p:product_name": template.asset_id,
+            "s5p:collection_identifier": s5p_naming.group("collection"),
+            "s5p:processor_version": s5p_naming.group("processor_version"),
+            "s5p:production_datetime": datetime_to_str(
+                _filename_datetime(s5p_naming.group("production_datetime"))
+            ),
+            LITE_PROPERTY: True,
+        }
+    )
+
+    return GranuleRecord(
+        id=stem,
+        geometry=mapping(footprint),
+        bbox=list(footprint.bounds),
+        datetime=start_datetime + (end_datetime - start_datetime) / 2,
+        properties=properties,
+        template=template,
+        data_href=file_path if file_path.endswith(".nc") else netcdf_href(file_path),
+    )
+
+
+def create_lite_item(file_path: str) -> pystac.Item:
+    """Create a lite STAC Item from the name of a Sentinel-5P scene alone.
+
+    The granule is never opened. The item holds what the name tells: the
+    processing mode, product, sensing and production times, orbit,
+    collection and processor version, with a global footprint (the fixed
+    one for ``O3_TCL`` products). It is flagged with ``s5p:lite: true``, so
+    that it can later be replaced by the full item from :func:`create_item`.
 
     Args:
-        file_path (str): The path to a Sentinel-5P netCDF4 file.
+        file_path (str): The path or fsspec URL to a Sentinel-5P netCDF4 file
+            or its JSON sidecar; it need not exist.
 
     Returns:
-        pystac.Item: An item representing the Sentinel-5P scene.
+        pystac.Item: A lite item representing the Sentinel-5P scene.
     """
+    return read_lite_record(file_path).to_item()
+
+
+class GranuleMetadata(NamedTuple):
+    """What items are built from that is read from a granule, as cached by
+    :class:`~stactools.sentinel5p.cache.MetadataCache`."""
+
+    # The href the metadata was read from: the granule or its sidecar
+    file_path: str
+    scene_id: str
+    geometry: Dict[str, Any]
+    bbox: List[float]
+    datetime: datetime
+    orbit: Optional[int]
+    metadata: Dict[str, Any]
+    product_properties: Dict[str, Any]
+    platform: Optional[str]
+    title: Optional[str]
+
+
+def read_granule_metadata(
+    file_path: str,
+    stats: Optional[Counter[str]] = None,
+    simplify_tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+    prefetched: Optional[Prefetched] = None,
+    data: Optional[Union[bytes, memoryview]] = None,
+) -> GranuleMetadata:
+    """Reads what items are built from from a Sentinel-5P netCDF4 file or
+    JSON sidecar. The arguments are those of :func:`create_item`, the byte
+    ranges of the file, at a URL, that were fetched ahead, and the content
+    of the file, if it is in memory."""
+    with GranuleReader(file_path, prefetched=prefetched, data=data) as granule:
+        product_metadata = ProductMetadata(
+            granule, simplify_tolerance=simplify_tolerance, precision=precision
+        )
+        orbit = None
+        if "O3_TCL" not in granule.file_path:
+            orbit = int(granule.attr("", "orbit"))
+        metadata, product_properties = product_metadata.nested_metadata
+        granule_metadata = GranuleMetadata(
+            file_path=granule.file_path,
+            scene_id=product_metadata.scene_id,
+            geometry=product_metadata.get_geometry,
+            bbox=product_metadata.get_bbox,
+            datetime=product_metadata.get_datetime,
+            orbit=orbit,
+            metadata=metadata,
+            product_properties=product_properties,
+            platform=product_metadata.platform,
+            title=granule.attr("", "title"),
+        )
 
-    metalinks = MetadataLinks(file_path)
+        if stats is not None:
+            stats.update(granule.stats)
 
-    product_metadata = ProductMetadata(file_path)
+        return granule_metadata
 
-    item = pystac.Item(
-        id=product_metadata.scene_id,
-        geometry=product_metadata.get_geometry,
-        bbox=product_metadata.get_bbox,
-        datetime=product_metadata.get_datetime,
-        properties={},
-        stac_extensions=[],
+
+def _cached_granule_metadata(
+    file_path: str,
+    cache: MetadataCache,
+    stats: Optional[Counter[str]] = None,
+    simplify_tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+    prefetched: Optional[Prefetched] = None,
+) -> GranuleMetadata:
+    key = cache.key(
+        file_path, simplify_tolerance=simplify_tolerance, precision=precision
+    )
+    granule_metadata = None if key is None else cache.get(key)
+    if granule_metadata is not None:
+        if stats is not None:
+            stats["cache_hits"] += 1
+        return granule_metadata
+
+    granule_metadata = read_granule_metadata(
+        file_path, stats, simplify_tolerance, precision, prefetched
     )
+    if key is not None:
+        cache.put(key, granule_metadata)
+    if stats is not None:
+        stats["cache_misses"] += 1
+    return granule_metadata
+
+
+def read_granule_record(
+    file_path: str,
+    prefer_sidecar: bool = False,
+    stats: Optional[Counter[str]] = None,
+    simplify_tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+    lite: bool = False,
+    cache: Optional[MetadataCache] = None,
+    prefetched: Optional[Prefetched] = None,
+    data: Optional[Union[bytes, memoryview]] = None,
+) -> GranuleRecord:
+    """Reads the record of the item of a Sentinel-5P scene. The arguments
+    are those of :func:`create_item`, the byte ranges of the file the
+    metadata is read from, at a URL, that were fetched ahead, and the content
+    of the file, if it is in memory; see :func:`create_item_from_bytes`."""
+    if lite:
+        return read_lite_record(file_path)
+
+    source = file_path
+    if prefer_sidecar:
+        source = find_sidecar(file_path) or file_path
+
+    if data is not None:
+        granule_metadata = read_granule_metadata(
+            file_path, stats, simplify_tolerance, precision, data=data
+        )
+    elif cache is None:
+        granule_metadata = read_granule_metadata(
+            source, stats, simplify_tolerance, precision, prefetched
+        )
+    else:
+        granule_metadata = _cached_granule_metadata(
+            source, cache, stats, simplify_tolerance, precision, prefetched
+        )
 
     s5p_naming = FILENAME_EXPR.match(Path(file_path).stem)
     if not s5p_naming:
@@ -77,52 +345,154 @@ def create_item(file_path: str) -> pystac.Item:
             "Granule name does not match Sentinel-5p naming convention(s):"
             + Path(file_path).stem
         )
+    product_type = s5p_naming.group("product_type")
 
-    # ---- Add Extensions ----
-    # sat
-    sat = SatExtension.ext(item, add_if_missing=True)
-    fill_sat_properties(sat, file_path)
+    # Laid out in the order the properties were historically set in
+    properties: Dict[str, Any] = {
+        "sat:platform_international_designator": INTERNATIONAL_DESIGNATOR
+    }
+    if granule_metadata.orbit is not None:
+        properties["sat:absolute_orbit"] = granule_metadata.orbit
+    properties.update(granule_metadata.metadata)
 
-    # s5p product properties
-    item.properties.update({**product_metadata.metadata_dict})
+    template = item_template(product_type)
+    properties["providers"] = template.new_providers()
+    properties["platform"] = granule_metadata.platform
+    properties["constellation"] = SENTINEL_CONSTELLATION
+    properties["s5p:product_name"] = template.asset_id
+    properties["s5p:processing_mode"] = s5p_naming.group("mode")
+    properties["s5p:collection_identifier"] = s5p_naming.group("collection")
+    properties[template.product_key] = granule_metadata.product_properties
 
-    # --Common metadata--
-    item.common_metadata.providers = [SENTINEL_PROVIDER]
-    item.common_metadata.platform = product_metadata.platform
-    item.common_metadata.constellation = SENTINEL_CONSTELLATION
+    if granule_metadata.file_path.endswith(".nc"):
+        data_href = granule_metadata.file_path
+    else:
+        data_href = netcdf_href(granule_metadata.file_path)
 
-    # product specific properties
-    asset_spec_prefix = s5p_naming.group("product").strip("_").lower()
-    asset_id = asset_spec_prefix.replace("_", "-")
+    return GranuleRecord(
+        id=granule_metadata.scene_id,
+        geometry=granule_metadata.geometry,
+        bbox=granule_metadata.bbox,
+        datetime=granule_metadata.datetime,
+        properties=properties,
+        template=template,
+        data_href=data_href,
+        description=granule_metadata.title,
+    )
 
-    # special handling needed for np-bd products
-    if asset_spec_prefix.startswith("np_bd"):
-        asset_spec_prefix = asset_spec_prefix.replace("_", "")
 
-    asset_spec_properties = {
-        k.replace(f"{asset_spec_prefix}:", ""): v
-        for k, v in item.properties.items()
-        if k.startswith(asset_spec_prefix + ":")
-    }
-    for key in asset_spec_properties:
-        del item.properties[f"{asset_spec_prefix}:{key}"]
+def create_item(
+    file_path: str,
+    prefer_sidecar: bool = False,
+    stats: Optional[Counter[str]] = None,
+    simplify_tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+    lite: bool = False,
+    cache: Optional[MetadataCache] = None,
+) -> pystac.Item:
+    """Create a STC Item from a Sentinel-5P scene.
 
-    product_type = s5p_naming.group("product_type")
-    s5p_properties = {
-        "s5p:product_name": asset_id,
-        "s5p:processing_mode": s5p_naming.group("mode"),
-        "s5p:collection_identifier": s5p_naming.group("collection"),
-        f"s5p:{asset_spec_prefix}": asset_spec_properties,
-    }
-    item.properties.update(s5p_properties)
-    _, asset_obj, band_dict_list = metalinks.create_band_asset()
-    asset_obj.title = ASSET_TITLES[product_type]
-    item.add_asset(asset_id, asset_obj)
-
-    item.links.append(
-        pystac.Link(
-            rel="about", target=ABOUT_LINKS[product_type], media_type="text/html"
-        )
-    )
+    Args:
+        file_path (str): The path or fsspec URL to a Sentinel-5P netCDF4 file
+            or its JSON sidecar. Only the byte ranges holding the metadata of
+            netCDF4 files at URLs are read.
+        prefer_sidecar (bool): Read the metadata of a netCDF4 file from the
+            JSON sidecar next to it, if there is one. The item is the same as
+            the one created from the netCDF4 file.
+        stats (Optional[Counter[str]]): A counter to add the counts of the
+            :class:`~stactools.sentinel5p.granule.GranuleReader` to, such as
+            group opens, attribute and byte reads, and footprint fixes.
+        simplify_tolerance (Optional[float]): Simplify the footprint, keeping
+            it within this distance in degrees of the original, with its
+            topology preserved.
+        precision (Optional[int]): Round the footprint's coordinates to this
+            number of decimal places. The bbox is that of the simplified and
+            rounded footprint, so it still covers the geometry.
+        lite (bool): Build a lite item from the name of the scene alone,
+            without reading it; see :func:`create_lite_item`.
+        cache (Optional[MetadataCache]): A cache of the metadata read from
+            scenes, to build the item from rather than read the scene again
+            if it has not changed. Hits and misses are counted in ``stats``.
+
+    Returns:
+        pystac.Item: An item representing the Sentinel-5P scene.
+    """
+    return read_granule_record(
+        file_path,
+        prefer_sidecar=prefer_sidecar,
+        stats=stats,
+        simplify_tolerance=simplify_tolerance,
+        precision=precision,
+        lite=lite,
+        cache=cache,
+    ).to_item()
+
+
+def create_item_dict(
+    file_path: str,
+    prefer_sidecar: bool = False,
+    stats: Optional[Counter[str]] = None,
+    simplify_tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+    lite: bool = False,
+    cache: Optional[MetadataCache] = None,
+) -> Dict[str, Any]:
+    """Create the dict of a STAC Item from a Sentinel-5P scene, without
+    building the ``pystac.Item``.
+
+    The dict is the same as ``create_item(...).to_dict()``, for outputs that
+    serialize items straight away, such as NDJSON and GeoParquet. The
+    arguments are those of :func:`create_item`.
+
+    Returns:
+        Dict[str, Any]: The dict of an item representing the Sentinel-5P
+        scene, without a self link.
+    """
+    return read_granule_record(
+        file_path,
+        prefer_sidecar=prefer_sidecar,
+        stats=stats,
+        simplify_tolerance=simplify_tolerance,
+        precision=precision,
+        lite=lite,
+        cache=cache,
+    ).to_dict()
+
+
+def create_item_from_bytes(
+    name: str,
+    data: Union[bytes, memoryview],
+    stats: Optional[Counter[str]] = None,
+    simplify_tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+) -> pystac.Item:
+    """Create a STAC Item from a Sentinel-5P netCDF4 file or JSON sidecar in
+    memory, such as one received from a message queue, without writing it to
+    disk.
+
+    netCDF4 files are opened with ``netCDF4.Dataset(name, memory=data)``,
+    which reads the buffer in place.
 
-    return item
+    Args:
+        name (str): The name of the file, or its path or URL: it ends with
+            ``.nc``, ``.json`` or ``.json.gz``, the scene is identified by it
+            as by the name of a file, and it is the href of the item's asset.
+        data (Union[bytes, memoryview]): The content of the file.
+        stats (Optional[Counter[str]]): A counter to add the counts of
+            reading the file to, as for :func:`create_item`.
+        simplify_tolerance (Optional[float]): Simplify the footprint, as for
+            :func:`create_item`.
+        precision (Optional[int]): Round the footprint's coordinates, as for
+            :func:`create_item`.
+
+    Returns:
+        pystac.Item: An item representing the Sentinel-5P scene, the same as
+        the one created from the file at ``name``.
+    """
+    return read_granule_record(
+        name,
+        stats=stats,
+        simplify_tolerance=simplify_tolerance,
+        precision=precision,
+        data=data,
+    ).to_item()
@@ -0,0 +1,88 @@
+"""Templates of the parts of items that are the same for every granule of a
+product type.
+
+The provider, the sat extension schema, the asset title and the about link
+of a product type are built once, by :func:`item_template`, and copied into
+each item rather than rebuilt from pystac objects per granule.
+"""
+
+import functools
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import pystac
+from pystac.extensions.sat import SatExtension
+
+from .constants import ABOUT_LINKS, ASSET_TITLES, SENTINEL_PROVIDER
+from .extraction import product_prefix
+
+NETCDF_MEDIA_TYPE = "application/x-netcdf"
+
+
+class ItemTemplate(NamedTuple):
+    """The constant parts of the items of a product type."""
+
+    product_type: str
+    # Such as no2 or np-bd3, for the asset key and s5p:product_name
+    asset_id: str
+    # Such as s5p:no2 or s5p:npbd3, for the product-specific properties
+    product_key: str
+    asset_title: str
+    about_href: str
+    stac_extensions: Tuple[str, ...]
+    providers: Tuple[Dict[str, Any], ...]
+
+    def new_providers(self) -> List[Dict[str, Any]]:
+        """Returns the providers property of an item."""
+        return [dict(provider) for provider in self.providers]
+
+    def new_asset(self, href: str, description: Optional[str] = None) -> pystac.Asset:
+        """Returns the data asset of an item."""
+        return pystac.Asset(
+            href=href,
+            media_type=NETCDF_MEDIA_TYPE,
+            title=self.asset_title,
+            description=description,
+            roles=["data"],
+        )
+
+    def new_about_link(self) -> pystac.Link:
+        """Returns the link to the product's page of an item."""
+        return pystac.Link(rel="about", target=self.about_href, media_type="text/html")
+
+    def new_asset_dict(
+        self, href: str, description: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Returns the data asset of an item, as serialized by pystac."""
+        asset: Dict[str, Any] = {
+            "href": href,
+            "type": NETCDF_MEDIA_TYPE,
+            "title": self.asset_title,
+        }
+        if description is not None:
+            asset["description"] = description
+        asset["roles"] = ["data"]
+        return asset
+
+    def new_about_link_dict(self) -> Dict[str, Any]:
+        """Returns the link to the product's page of an item, as serialized by
+        pystac."""
+        return {"rel": "about", "href": self.about_href, "type": "text/html"}
+
+
+@functools.lru_cache(maxsize=None)
+def item_template(product_type: str) -> ItemTemplate:
+    """Returns the template of the items of a product type, such as
+    ``L2__NO2___``.
+
+    Raises:
+        KeyError: If the product type is not supported.
+    """
+    return ItemTemplate(
+        product_type=product_type,
+        asset_id=product_type[3:].strip("_").lower().replace("_", "-"),
+        product_key=f"s5p:{product_prefix(product_type)}",
+        asset_title=ASSET_TITLES[product_type],
+        about_href=ABOUT_LINKS[product_type],
+        stac_extensions=(SatExtension.get_schema_uri(),),
+        providers=(SENTINEL_PROVIDER.to_dict(),),
+    )
@@ -0,0 +1,240 @@
+import asyncio
+import glob
+import importlib.util
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import unittest
+from collections import Counter
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from tempfile import TemporaryDirectory
+
+from stactools.sentinel5p.aio import create_items_async
+from stactools.sentinel5p.sidecar import sidecar_href, write_sidecar
+from stactools.sentinel5p.stac import create_item_dict
+from tests import test_data
+
+RANGE_EXPR = re.compile(r"bytes=(\d+)-(\d+)")
+
+
+class GranuleServer(ThreadingHTTPServer):
+    """Serves the files of a directory over HTTP, with byte ranges, waiting
+    ``delay`` seconds before answering each request as object storage would,
+    and counting requests and the most served at a time."""
+
+    daemon_threads = True
+
+    def __init__(self, directory, delay=0.0):
+        self.directory = directory
+        self.delay = delay
+        self.requests = Counter()
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.start()
+
+    def url(self, name):
+        return f"http://127.0.0.1:{self.server_address[1]}/{name}"
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+        self.thread.join()
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=args[2].directory, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_head(self):
+        server = self.server
+        with server.lock:
+            server.requests[self.command] += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        time.sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        match = RANGE_EXPR.fullmatch(self.headers.get("Range", ""))
+        if match:
+            start, end = int(match.group(1)), int(match.group(2)) + 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(data)}")
+            data = data[start:end]
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        return _Body(data)
+
+
+class _Body:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self, *args):
+        data, self.data = self.data, b""
+        return data
+
+    def close(self):
+        pass
+
+
+def create_items(*args, **kwargs):
+    async def collect():
+        return [result async for result in create_items_async(*args, **kwargs)]
+
+    return asyncio.run(collect())
+
+
+def _without_assets(item_dict):
+    return {key: value for key, value in item_dict.items() if key != "assets"}
+
+
+@unittest.skipIf(
+    importlib.util.find_spec("h5netcdf") is None
+    or importlib.util.find_spec("aiohttp") is None,
+    "h5netcdf or aiohttp is not installed",
+)
+class CreateItemsAsyncTest(unittest.TestCase):
+    def setUp(self):
+        self.data_files = test_data.get_path("data-files")
+        self.server = GranuleServer(self.data_files)
+        self.addCleanup(self.server.close)
+
+    def granules(self, pattern="S5P_*.nc"):
+        return sorted(
+            os.path.basename(href)
+            for href in glob.glob(os.path.join(self.data_files, pattern))
+        )
+
+    def test_creates_items_from_urls(self):
+        names = self.granules("S5P_*")
+        results = create_items(
+            [self.server.url(name) for name in names], None, concurrency=4, jobs=1
+        )
+        self.assertEqual(len(results), len(names))
+        for result in results:
+            name = os.path.basename(result.href)
+            with self.subTest(name):
+                self.assertIsNone(result.error)
+                expected = create_item_dict(os.path.join(self.data_files, name))
+                item = json.loads(result.item_json)
+                self.assertEqual(item["id"], result.item_id)
+                self.assertEqual(
+                    json.dumps(_without_assets(item)),
+                    json.dumps(_without_assets(expected)),
+                )
+                # Small granules are fetched whole, ahead
+                size = os.path.getsize(os.path.join(self.data_files, name))
+                self.assertEqual(result.stats["bytes_prefetched"], size)
+                self.assertNotIn("range_requests", result.stats)
+        self.assertEqual(self.server.requests["GET"], len(names))
+
+    def test_fetches_blocks_outside_the_prefetched_ranges(self):
+        (name,) = self.granules("S5P_OFFL_L2__NO2____*.nc")
+        (result,) = create_items(
+            [self.server.url(name)], None, jobs=1, prefetch_size=4096
+        )
+        self.assertIsNone(result.error)
+        # The tail starts on a block
+        size = os.path.getsize(os.path.join(self.data_files, name))
+        tail = (size - 4096) // 65536 * 65536
+        self.assertEqual(result.stats["bytes_prefetched"], 4096 + size - tail)
+        self.assertGreater(result.stats["range_requests"], 0)
+        expected = create_item_dict(os.path.join(self.data_files, name))
+        self.assertEqual(
+            json.dumps(_without_assets(json.loads(result.item_json))),
+            json.dumps(_without_assets(expected)),
+        )
+
+    def test_writes_items(self):
+        names = self.granules()[:3]
+        with TemporaryDirectory() as tmp_dir:
+            dst = os.path.join(tmp_dir, "items")
+            results = create_items(
+                [self.server.url(name) for name in names], dst, jobs=2
+            )
+            self.assertEqual(
+                sorted(os.listdir(dst)),
+                sorted(f"{result.item_id}.json" for result in results),
+            )
+            for result in results:
+                path = os.path.join(dst, f"{result.item_id}.json")
+                with open(path) as f:
+                    self.assertEqual(f.read(), result.item_json)
+                links = json.loads(result.item_json)["links"]
+                self.assertIn(
+                    path, [link["href"] for link in links if link["rel"] == "self"]
+                )
+
+    def test_prefers_sidecars(self):
+        (name,) = self.granules("S5P_OFFL_L2__CO_____*.nc")
+        with TemporaryDirectory() as tmp_dir:
+            shutil.copy(os.path.join(self.data_files, name), tmp_dir)
+            write_sidecar(
+                os.path.join(tmp_dir, name),
+                sidecar_href(os.path.join(tmp_dir, name), compress=True),
+                compress=True,
+            )
+            server = GranuleServer(tmp_dir)
+            try:
+                (result,) = create_items(
+                    [server.url(name)], None, jobs=1, prefer_sidecar=True
+                )
+            finally:
+                server.close()
+        self.assertIsNone(result.error)
+        self.assertEqual(result.href, server.url(name))
+        self.assertNotIn("group_opens", result.stats)
+        expected = create_item_dict(os.path.join(self.data_files, name))
+        self.assertEqual(
+            json.dumps(_without_assets(json.loads(result.item_json))),
+            json.dumps(_without_assets(expected)),
+        )
+
+    def test_reports_errors(self):
+        names = ["S5P_OFFL_L2__NO2____missing.nc"] + self.granules()[:1]
+        results = create_items([self.server.url(name) for name in names], None, jobs=1)
+        errors = {os.path.basename(r.href): r.error for r in results}
+        self.assertIn("FileNotFoundError", errors[names[0]])
+        self.assertIsNone(errors[names[1]])
+
+    def test_lite_items_fetch_nothing(self):
+        names = self.granules()
+        results = create_items(
+            [self.server.url(name) for name in names], None, jobs=1, lite=True
+        )
+        self.assertEqual(len(results), len(names))
+        self.assertEqual(sum(self.server.requests.values()), 0)
+
+    def test_concurrency_is_bounded_and_scales(self):
+        names = self.granules()[:8]
+        # Long enough for the requests of concurrent granules to overlap
+        self.server.delay = 0.05
+        hrefs = [self.server.url(name) for name in names]
+        max_active = {}
+        for concurrency in (1, 8):
+            self.server.max_active = 0
+            results = create_items(hrefs, None, concurrency=concurrency, jobs=1)
+            max_active[concurrency] = self.server.max_active
+            self.assertEqual(len(results), len(names))
+            self.assertTrue(all(result.error is None for result in results))
+            self.assertLessEqual(self.server.max_active, concurrency)
+        self.assertEqual(max_active[1], 1)
+        self.assertGreater(max_active[8], 1)
@@ -0,0 +1,64 @@
+import glob
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from stactools.sentinel5p.batch import (
+    BatchResult,
+    SidecarResult,
+    create_item_json,
+    create_items,
+    write_sidecar_result,
+    write_sidecars,
+)
+from tests import test_data
+
+CRASH_HREF = "crash.nc"
+
+
+def crash_or_create_item_json(href, *args, **kwargs):
+    # Kills the worker process, as a segfault reading a corrupt granule would
+    if href == CRASH_HREF:
+        os._exit(1)
+    return create_item_json(href, *args, **kwargs)
+
+
+def crash_or_write_sidecar_result(href, *args, **kwargs):
+    if href == CRASH_HREF:
+        os._exit(1)
+    return write_sidecar_result(href, *args, **kwargs)
+
+
+class WorkerCrashTest(unittest.TestCase):
+    def setUp(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "*.nc")
+        # More granules than are queued with the crashed one
+        self.hrefs = [CRASH_HREF] + 3 * sorted(glob.glob(granule_glob))[:4]
+
+    def assertRecovered(self, results, result_type):
+        self.assertEqual(sorted(r.href for r in results), sorted(self.hrefs))
+        for result in results:
+            self.assertIsInstance(result, result_type)
+        errors = [r for r in results if r.error is not None]
+        self.assertIn(CRASH_HREF, [r.href for r in errors])
+        # Granules queued in the pool of the crashed worker fail with it
+        for result in errors:
+            self.assertIn("BrokenProcessPool", result.error)
+        # The rest are run in a new pool
+        self.assertLess(len(errors), len(results))
+
+    def test_create_items(self):
+        with mock.patch(
+            "stactools.sentinel5p.batch.create_item_json", crash_or_create_item_json
+        ):
+            results = list(create_items(self.hrefs, None, jobs=2))
+        self.assertRecovered(results, BatchResult)
+
+    def test_write_sidecars(self):
+        with TemporaryDirectory() as tmp_dir, mock.patch(
+            "stactools.sentinel5p.batch.write_sidecar_result",
+            crash_or_write_sidecar_result,
+        ):
+            results = list(write_sidecars(self.hrefs, tmp_dir, jobs=2))
+        self.assertRecovered(results, SidecarResult)
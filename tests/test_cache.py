@@ -0,0 +1,88 @@
+import glob
+import json
+import os
+import pickle
+import shutil
+import unittest
+from collections import Counter
+from tempfile import TemporaryDirectory
+
+from stactools.sentinel5p.cache import MetadataCache, open_cache
+from stactools.sentinel5p.stac import create_item_dict
+from tests import test_data
+
+KEYS = {name: name * 64 for name in "abcd"}
+
+
+class MetadataCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.cache = MetadataCache(os.path.join(self.tmp_dir.name, "cache"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_items_from_cache(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "S5P_*")
+        granule_hrefs = sorted(glob.glob(granule_glob))
+        for granule_href in granule_hrefs:
+            with self.subTest(granule_href):
+                expected = json.dumps(create_item_dict(granule_href))
+                stats: Counter = Counter()
+                for _ in range(2):
+                    item = create_item_dict(granule_href, cache=self.cache, stats=stats)
+                    self.assertEqual(json.dumps(item), expected)
+                self.assertEqual(stats["cache_misses"], 1)
+                self.assertEqual(stats["cache_hits"], 1)
+        self.assertEqual(self.cache.stats["writes"], len(granule_hrefs))
+
+    def test_changed_granules_miss(self):
+        granule_href = os.path.join(
+            self.tmp_dir.name,
+            "S5P_OFFL_L2__CO_____"
+            "20200303T013547_20200303T031717_"
+            "12367_01_010302_"
+            "20200306T032410.nc",
+        )
+        shutil.copy(
+            test_data.get_path(f"data-files/{os.path.basename(granule_href)}"),
+            granule_href,
+        )
+        create_item_dict(granule_href, cache=self.cache)
+        create_item_dict(granule_href, cache=self.cache, precision=4)
+        self.assertEqual(self.cache.stats["misses"], 2)
+
+        create_item_dict(granule_href, cache=self.cache)
+        self.assertEqual(self.cache.stats["hits"], 1)
+
+        os.utime(granule_href, (0, 0))
+        create_item_dict(granule_href, cache=self.cache)
+        self.assertEqual(self.cache.stats["misses"], 3)
+
+    def test_least_recently_used_are_evicted(self):
+        value = os.urandom(1000)
+        self.cache.max_size = 3500
+        for i, name in enumerate("abc"):
+            self.cache.put(KEYS[name], value)
+            os.utime(self.cache._path(KEYS[name]), (i, i))
+        # Reading "a" makes "b" the least recently used
+        self.assertEqual(self.cache.get(KEYS["a"]), value)
+        self.cache.put(KEYS["d"], value)
+        self.assertEqual(self.cache.stats["evictions"], 1)
+        self.assertIsNone(self.cache.get(KEYS["b"]))
+        for name in "acd":
+            self.assertEqual(self.cache.get(KEYS[name]), value)
+
+    def test_corrupt_entries_miss(self):
+        self.cache.put(KEYS["a"], {"a": 1})
+        with open(self.cache._path(KEYS["a"]), "wb") as f:
+            f.write(b"not an entry")
+        self.assertIsNone(self.cache.get(KEYS["a"]))
+        self.assertFalse(os.path.exists(self.cache._path(KEYS["a"])))
+        self.assertEqual(self.cache.stats["misses"], 1)
+
+    def test_pickled_caches_are_shared_per_process(self):
+        cache = open_cache(self.cache.directory)
+        self.assertIs(open_cache(self.cache.directory), cache)
+        self.assertIs(pickle.loads(pickle.dumps(cache)), cache)
+        self.assertIs(pickle.loads(pickle.dumps(self.cache)), cache)
@@ -1,11 +1,23 @@
+import glob
+import gzip
+import json
 import os.path
+import shutil
 from tempfile import TemporaryDirectory
+from unittest import mock
 
+import pyarrow.parquet as pq  # type: ignore
 import pystac
+from click.testing import CliRunner
 from pystac.utils import is_absolute_href
 from stactools.testing import CliTestCase
 
 from stactools.sentinel5p.commands import create_sentinel5p_command
+from stactools.sentinel5p.dehydration import BaseItems
+from stactools.sentinel5p.granule import GranuleReader
+from stactools.sentinel5p.incremental import iter_item_ids
+from stactools.sentinel5p.sidecar import write_sidecar
+from stactools.sentinel5p.stac import create_item
 from tests import test_data
 
 
@@ -538,3 +550,504 @@ class CommandsTest(CliTestCase):
                 self.assertTrue("/./" not in asset.href)
                 self.assertTrue(is_absolute_href(asset.href))
                 os.remove(f"{tmp_dir}/{item_id}.json")
+
+    def test_create_items(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "*.nc")
+        granule_hrefs = sorted(glob.glob(granule_glob))
+
+        with TemporaryDirectory() as tmp_dir:
+            bad_href = os.path.join(tmp_dir, "S5P_OFFL_L2__NO2____bad.nc")
+            with open(bad_href, "w") as f:
+                f.write("not a netCDF4 file")
+            items_dir = os.path.join(tmp_dir, "items")
+
+            cmd = [
+                "sentinel5p",
+                "create-items",
+                granule_glob,
+                bad_href,
+                items_dir,
+                "--jobs",
+                "2",
+            ]
+            result = self.run_command(cmd)
+
+            self.assertEqual(result.exit_code, 1)
+            self.assertIn("Footprints: 0 fast path, 12 antimeridian fix", result.output)
+            jsons = [p for p in os.listdir(items_dir) if p.endswith(".json")]
+            self.assertEqual(len(jsons), len(granule_hrefs))
+
+            item_dir = os.path.join(tmp_dir, "item")
+            for granule_href in granule_hrefs:
+                self.run_command(["sentinel5p", "create-item", granule_href, item_dir])
+            for fname in os.listdir(item_dir):
+                with open(os.path.join(item_dir, fname)) as f:
+                    expected = json.load(f)
+                with open(os.path.join(items_dir, fname)) as f:
+                    item = json.load(f)
+                expected["links"] = [
+                    link for link in expected["links"] if link["rel"] != "self"
+                ]
+                item["links"] = [
+                    link for link in item["links"] if link["rel"] != "self"
+                ]
+                self.assertEqual(item, expected)
+
+    def test_create_items_from_directory(self):
+        granule_hrefs = sorted(
+            glob.glob(os.path.join(test_data.get_path("data-files"), "*.nc"))
+        )
+
+        with TemporaryDirectory() as tmp_dir:
+            granules_dir = os.path.join(tmp_dir, "granules")
+            os.mkdir(granules_dir)
+            both = shutil.copy(granule_hrefs[0], granules_dir)
+            write_sidecar(both)
+            only_sidecar = shutil.copy(granule_hrefs[1], granules_dir)
+            write_sidecar(only_sidecar)
+            os.remove(only_sidecar)
+            items_dir = os.path.join(tmp_dir, "items")
+
+            cmd = ["sentinel5p", "create-items", granules_dir, items_dir]
+            result = self.run_command(cmd + ["--jobs", "1"])
+            self.assertEqual(result.exit_code, 0, result.output)
+            # A granule and its sidecar are one scene
+            self.assertIn("Created 2 items", result.output)
+            self.assertEqual(
+                sorted(os.listdir(items_dir)),
+                sorted(
+                    os.path.basename(href).replace(".nc", ".json")
+                    for href in granule_hrefs[:2]
+                ),
+            )
+
+    def test_create_item_prefer_sidecar(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_OFFL_L2__NO2____"
+            "20200303T013547_20200303T031717_"
+            "12367_01_010302_"
+            "20200306T053815.nc"
+        )
+
+        with TemporaryDirectory() as tmp_dir:
+            href = shutil.copy(granule_href, tmp_dir)
+            write_sidecar(href)
+
+            for name, options in [("nc", []), ("sidecar", ["--prefer-sidecar"])]:
+                cmd = ["sentinel5p", "create-item", href, os.path.join(tmp_dir, name)]
+                self.run_command(cmd + options)
+
+            fname = os.path.basename(href).replace(".nc", ".json")
+            with open(os.path.join(tmp_dir, "nc", fname)) as f:
+                expected = json.load(f)
+            with open(os.path.join(tmp_dir, "sidecar", fname)) as f:
+                item = json.load(f)
+            for links in (expected["links"], item["links"]):
+                links[:] = [link for link in links if link["rel"] != "self"]
+            self.assertEqual(item, expected)
+
+    def test_create_item_simplified(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_OFFL_L2__NO2____"
+            "20200303T013547_20200303T031717_"
+            "12367_01_010302_"
+            "20200306T053815.nc"
+        )
+
+        with TemporaryDirectory() as tmp_dir:
+            cmd = ["sentinel5p", "create-item", granule_href, tmp_dir]
+            self.run_command(cmd + ["--simplify-tolerance", "0.01", "--precision", "4"])
+
+            fname = os.path.basename(granule_href).replace(".nc", ".json")
+            item = pystac.Item.from_file(os.path.join(tmp_dir, fname))
+            expected = create_item(granule_href)
+            coordinates = item.geometry["coordinates"][0]
+            self.assertLess(len(coordinates), len(expected.geometry["coordinates"][0]))
+            for x, y in coordinates:
+                self.assertEqual((x, y), (round(x, 4), round(y, 4)))
+
+    def test_create_items_lite(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "*.nc")
+
+        with TemporaryDirectory() as tmp_dir:
+            cmd = ["sentinel5p", "create-items", granule_glob, tmp_dir, "--lite"]
+            result = self.run_command(cmd + ["--jobs", "1"])
+
+            self.assertEqual(result.exit_code, 0)
+            self.assertIn("Footprints: 0 fast path, 0 antimeridian fix", result.output)
+            jsons = [p for p in os.listdir(tmp_dir) if p.endswith(".json")]
+            self.assertEqual(len(jsons), len(glob.glob(granule_glob)))
+            for fname in jsons:
+                with open(os.path.join(tmp_dir, fname)) as f:
+                    self.assertIs(json.load(f)["properties"]["s5p:lite"], True)
+
+    def test_build_and_query_index(self):
+        data_files = test_data.get_path("data-files")
+
+        with TemporaryDirectory() as tmp_dir:
+            index = os.path.join(tmp_dir, "index.sqlite")
+            result = self.run_command(["sentinel5p", "build-index", data_files, index])
+            self.assertEqual(result.exit_code, 0)
+            self.assertIn("Indexed 26 scenes, 0 skipped", result.output)
+
+            cmd = ["sentinel5p", "query-index", index, "--mode", "OFFL"]
+            cmd += ["--start", "2020-03-01", "--end", "2020-06-01"]
+            result = self.run_command(cmd + ["--product", "NO2"])
+            self.assertEqual(result.exit_code, 0)
+            self.assertEqual(
+                [os.path.basename(line) for line in result.output.splitlines()],
+                [
+                    "S5P_OFFL_L2__NO2____"
+                    "20200303T013547_20200303T031717_"
+                    "12367_01_010302_"
+                    "20200306T053815.nc"
+                ],
+            )
+
+            items_dir = os.path.join(tmp_dir, "items")
+            cmd = ["sentinel5p", "create-items", "-", items_dir, "--jobs", "1"]
+            result = CliRunner().invoke(self.cli, cmd, input=result.output)
+            self.assertEqual(result.exit_code, 0)
+            self.assertEqual(len(os.listdir(items_dir)), 1)
+
+    def test_create_items_dedup(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_OFFL_L2__NO2____"
+            "20200303T013547_20200303T031717_"
+            "12367_01_010302_"
+            "20200306T053815.nc"
+        )
+
+        with TemporaryDirectory() as tmp_dir:
+            offl = shutil.copy(granule_href, tmp_dir)
+            nrti = shutil.copy(granule_href, offl.replace("_OFFL_", "_NRTI_"))
+            later = shutil.copy(granule_href, offl.replace("T013547_", "T020000_"))
+            items_dir = os.path.join(tmp_dir, "items")
+
+            cmd = ["sentinel5p", "create-items", "-", items_dir, "--dedup"]
+            result = CliRunner().invoke(
+                self.cli, cmd + ["--jobs", "1"], input=f"{nrti}\n{offl}\n{later}\n"
+            )
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("Dropped 1 duplicate scenes", result.output)
+            self.assertEqual(
+                sorted(os.listdir(items_dir)),
+                sorted(
+                    os.path.basename(href).replace(".nc", ".json")
+                    for href in (offl, later)
+                ),
+            )
+
+            result = CliRunner().invoke(
+                self.cli, cmd + ["--jobs", "1"], input=f"{later}\n{offl}\n"
+            )
+            self.assertEqual(result.exit_code, 1)
+            self.assertIn("not ordered by start time", result.output)
+
+            result = CliRunner().invoke(
+                self.cli, cmd + ["--precedence", "mode,orbit"], input=f"{offl}\n"
+            )
+            self.assertEqual(result.exit_code, 2)
+
+            # Directories and globs, listed by name, are sorted by start time
+            earlier = offl.replace("_OFFL_", "_RPRO_").replace("T013547_", "T010000_")
+            shutil.copy(granule_href, earlier)
+            for source in (tmp_dir, os.path.join(tmp_dir, "S5P_*.nc")):
+                with self.subTest(source=source):
+                    shutil.rmtree(items_dir)
+                    cmd = ["sentinel5p", "create-items", source, items_dir]
+                    result = self.run_command(cmd + ["--dedup", "--jobs", "1"])
+                    self.assertEqual(result.exit_code, 0, result.output)
+                    self.assertIn("Dropped 1 duplicate scenes", result.output)
+                    self.assertEqual(len(os.listdir(items_dir)), 3)
+
+    def test_create_items_incremental(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "*.nc")
+        granule_hrefs = sorted(glob.glob(granule_glob))
+
+        with TemporaryDirectory() as tmp_dir:
+            cmd = ["sentinel5p", "create-items", granule_hrefs[0], tmp_dir]
+            self.run_command(cmd + ["--jobs", "1"])
+
+            cmd = ["sentinel5p", "create-items", granule_glob, tmp_dir]
+            with mock.patch(
+                "stactools.sentinel5p.stac.GranuleReader",
+                wraps=GranuleReader,
+            ) as reader:
+                result = self.run_command(cmd + ["--jobs", "1", "--incremental"])
+            self.assertEqual(result.exit_code, 0)
+            self.assertIn(f"Created {len(granule_hrefs) - 1} items", result.output)
+            self.assertIn("Skipped 1 existing items", result.output)
+            opened = [call.args[0] for call in reader.call_args_list]
+            self.assertNotIn(granule_hrefs[0], opened)
+
+            result = self.run_command(cmd + ["--jobs", "1", "--incremental", "--bloom"])
+            self.assertIn("Created 0 items", result.output)
+            self.assertIn(f"Skipped {len(granule_hrefs)} existing items", result.output)
+
+    def test_create_items_ndjson(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "*.nc")
+        granule_hrefs = sorted(glob.glob(granule_glob))
+        expected = {
+            item.id: json.loads(
+                json.dumps(item.to_dict(include_self_link=False, transform_hrefs=False))
+            )
+            for item in map(create_item, granule_hrefs)
+        }
+
+        with TemporaryDirectory() as tmp_dir:
+            for name, open_file in [
+                ("items.ndjson", open),
+                ("items.ndjson.gz", gzip.open),
+            ]:
+                with self.subTest(name):
+                    dst = os.path.join(tmp_dir, name)
+                    cmd = ["sentinel5p", "create-items", granule_glob, dst]
+                    result = self.run_command(
+                        cmd + ["--format", "ndjson", "--jobs", "2"]
+                    )
+                    self.assertEqual(result.exit_code, 0)
+                    with open_file(dst, "rt") as f:
+                        items = [json.loads(line) for line in f]
+                    self.assertEqual({item["id"]: item for item in items}, expected)
+
+            # Items are appended to the file of existing items
+            dst = os.path.join(tmp_dir, "incremental.ndjson.gz")
+            cmd = ["sentinel5p", "create-items", "--format", "ndjson", "--jobs", "1"]
+            self.run_command(cmd + [granule_hrefs[0], dst])
+            result = self.run_command(cmd + ["--incremental", granule_glob, dst])
+            self.assertIn("Skipped 1 existing items", result.output)
+            with gzip.open(dst, "rt") as f:
+                ids = [json.loads(line)["id"] for line in f]
+            self.assertEqual(sorted(ids), sorted(expected))
+
+            # Whatever the name of the file
+            for name, compress in [("items.jsonl", []), ("items", ["--gzip"])]:
+                with self.subTest(name, compress=compress):
+                    dst = os.path.join(tmp_dir, name)
+                    self.run_command(cmd + compress + [granule_hrefs[0], dst])
+                    result = self.run_command(
+                        cmd + compress + ["--incremental", granule_glob, dst]
+                    )
+                    self.assertEqual(result.exit_code, 0, result.output)
+                    self.assertIn("Skipped 1 existing items", result.output)
+                    self.assertEqual(
+                        sorted(iter_item_ids(dst, ndjson=True)), sorted(expected)
+                    )
+
+            # Appended items keep the compression of the file
+            for name, compress in [("plain.ndjson", []), ("gzip.ndjson", ["--gzip"])]:
+                with self.subTest(name, compress=compress):
+                    dst = os.path.join(tmp_dir, name)
+                    self.run_command(cmd + compress + [granule_hrefs[0], dst])
+                    with open(dst, "rb") as f:
+                        data = f.read()
+                    result = CliRunner().invoke(
+                        self.cli,
+                        cmd + ["--incremental", "--gzip", granule_glob, dst],
+                    )
+                    if compress:
+                        self.assertEqual(result.exit_code, 0, result.output)
+                    else:
+                        self.assertEqual(result.exit_code, 2, result.output)
+                        self.assertIn("not compressed", result.output)
+                        with open(dst, "rb") as f:
+                            self.assertEqual(f.read(), data)
+                    result = self.run_command(
+                        cmd + ["--incremental", granule_glob, dst]
+                    )
+                    self.assertEqual(result.exit_code, 0, result.output)
+                    self.assertEqual(
+                        sorted(iter_item_ids(dst, ndjson=True)), sorted(expected)
+                    )
+
+        cmd = ["sentinel5p", "create-items", granule_hrefs[0], "-", "--jobs", "1"]
+        result = CliRunner().invoke(self.cli, cmd + ["--format", "ndjson"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        lines = result.stdout.splitlines()
+        self.assertEqual(len(lines), 1)
+        item = json.loads(lines[0])
+        self.assertEqual(item, expected[item["id"]])
+        self.assertIn("Created 1 items", result.stderr)
+
+    def test_create_items_concurrently(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "*.nc")
+        granule_hrefs = sorted(glob.glob(granule_glob))
+
+        with TemporaryDirectory() as tmp_dir:
+            for output_format in ("json", "ndjson"):
+                with self.subTest(output_format):
+                    sync_dst = os.path.join(tmp_dir, f"sync-{output_format}")
+                    async_dst = os.path.join(tmp_dir, f"async-{output_format}")
+                    cmd = ["sentinel5p", "create-items", granule_glob]
+                    cmd += ["--format", output_format, "--jobs", "2"]
+                    self.run_command(cmd + [sync_dst])
+                    result = self.run_command(cmd + [async_dst, "--concurrency", "4"])
+                    self.assertEqual(result.exit_code, 0, result.output)
+                    self.assertIn(f"Created {len(granule_hrefs)} items", result.output)
+                    if output_format == "json":
+                        names = sorted(os.listdir(async_dst))
+                        self.assertEqual(names, sorted(os.listdir(sync_dst)))
+                        for name in names:
+                            expected = pystac.Item.from_file(
+                                os.path.join(sync_dst, name)
+                            ).to_dict(include_self_link=False)
+                            item = pystac.Item.from_file(
+                                os.path.join(async_dst, name)
+                            ).to_dict(include_self_link=False)
+                            self.assertEqual(item, expected)
+                    else:
+                        with open(sync_dst) as f:
+                            expected = sorted(f)
+                        with open(async_dst) as f:
+                            self.assertEqual(sorted(f), expected)
+
+    def test_create_items_dehydrated(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "*.nc")
+        granule_hrefs = sorted(glob.glob(granule_glob))
+
+        with TemporaryDirectory() as tmp_dir:
+            dst = os.path.join(tmp_dir, "items.ndjson")
+            bases_href = os.path.join(tmp_dir, "bases.json")
+            cmd = ["sentinel5p", "create-items", granule_glob, dst, "--jobs", "2"]
+            result = self.run_command(
+                cmd + ["--format", "ndjson", "--dehydrate", bases_href]
+            )
+            self.assertEqual(result.exit_code, 0)
+            bases = BaseItems.load(bases_href)
+            with open(dst) as f:
+                items = [bases.hydrate(json.loads(line)) for line in f]
+            self.assertEqual(len(items), len(granule_hrefs))
+            for item in items:
+                expected = create_item(
+                    next(href for href in granule_hrefs if item["id"] in href)
+                ).to_dict(include_self_link=False, transform_hrefs=False)
+                self.assertEqual(item, json.loads(json.dumps(expected)))
+
+            result = self.run_command(cmd + ["--dehydrate", bases_href])
+            self.assertEqual(result.exit_code, 2)
+
+    def test_create_items_geoparquet(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "*.nc")
+        granule_hrefs = sorted(glob.glob(granule_glob))
+
+        with TemporaryDirectory() as tmp_dir:
+            cmd = ["sentinel5p", "create-items", granule_glob, tmp_dir]
+            result = self.run_command(cmd + ["--format", "geoparquet", "--jobs", "2"])
+            self.assertEqual(result.exit_code, 0)
+            self.assertIn(f"Created {len(granule_hrefs)} items", result.output)
+            partitions = sorted(
+                os.path.relpath(path, tmp_dir)
+                for path in glob.glob(os.path.join(tmp_dir, "*", "*"))
+            )
+            self.assertIn(os.path.join("product=no2", "date=2020-03-03"), partitions)
+            ids = [
+                id
+                for path in glob.glob(os.path.join(tmp_dir, "*", "*", "*.parquet"))
+                for id in pq.read_table(path, columns=["id"]).column("id").to_pylist()
+            ]
+            self.assertEqual(
+                sorted(ids),
+                sorted(create_item(href).id for href in granule_hrefs),
+            )
+
+            # Items already in the dataset are skipped
+            result = self.run_command(
+                cmd + ["--format", "geoparquet", "--jobs", "2", "--incremental"]
+            )
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("Created 0 items", result.output)
+            self.assertIn(f"Skipped {len(granule_hrefs)} existing items", result.output)
+            paths = glob.glob(os.path.join(tmp_dir, "*", "*", "*.parquet"))
+            self.assertEqual(
+                sum(pq.ParquetFile(path).metadata.num_rows for path in paths),
+                len(granule_hrefs),
+            )
+
+    def test_create_items_cached(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "*.nc")
+        granule_count = len(glob.glob(granule_glob))
+
+        with TemporaryDirectory() as tmp_dir:
+            cache_dir = os.path.join(tmp_dir, "cache")
+            items = []
+            for run in ("cold", "warm"):
+                dst = os.path.join(tmp_dir, f"{run}.ndjson")
+                cmd = ["sentinel5p", "create-items", granule_glob, dst]
+                result = self.run_command(
+                    cmd + ["--format", "ndjson", "--jobs", "2", "--cache", cache_dir]
+                )
+                self.assertEqual(result.exit_code, 0)
+                with open(dst) as f:
+                    items.append(sorted(f))
+                hits = 0 if run == "cold" else granule_count
+                self.assertIn(
+                    f"Metadata cache: {hits} hits, {granule_count - hits} misses",
+                    result.output,
+                )
+            self.assertEqual(items[0], items[1])
+
+    def test_create_sidecars(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "*.nc")
+
+        with TemporaryDirectory() as tmp_dir:
+            granules_dir = os.path.join(tmp_dir, "granules")
+            os.mkdir(granules_dir)
+            for granule_href in glob.glob(granule_glob):
+                shutil.copy(granule_href, granules_dir)
+            sidecars_dir = os.path.join(tmp_dir, "sidecars")
+
+            cmd = ["sentinel5p", "create-sidecars", granules_dir, "-o", sidecars_dir]
+            result = self.run_command(cmd + ["--gzip", "--jobs", "2"])
+
+            self.assertEqual(result.exit_code, 0)
+            names = sorted(os.listdir(sidecars_dir))
+            self.assertEqual(
+                names,
+                sorted(
+                    os.path.basename(href).replace(".nc", ".json.gz")
+                    for href in glob.glob(granule_glob)
+                ),
+            )
+            for name in names:
+                shutil.move(os.path.join(sidecars_dir, name), granules_dir)
+                with self.subTest(name):
+                    href = os.path.join(granules_dir, name.replace(".json.gz", ".nc"))
+                    self.assertEqual(
+                        create_item(href, prefer_sidecar=True).to_dict(),
+                        create_item(href).to_dict(),
+                    )
+
+    def test_serve(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_OFFL_L2__CO_____"
+            "20200303T013547_20200303T031717_"
+            "12367_01_010302_"
+            "20200306T032410.nc"
+        )
+        requests = [
+            {"href": granule_href, "request_id": 1},
+            {"href": granule_href, "request_id": 2, "lite": False},
+            {"op": "health", "request_id": 3},
+        ]
+        cmd = ["sentinel5p", "serve", "--jobs", "1", "--lite", "--precision", "4"]
+        result = CliRunner().invoke(
+            self.cli, cmd, input="".join(json.dumps(r) + "\n" for r in requests)
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        responses = {
+            response["request_id"]: response
+            for response in map(json.loads, result.output.splitlines())
+        }
+        self.assertEqual(sorted(responses), [1, 2, 3])
+        for request_id, lite in ((1, True), (2, False)):
+            item = create_item(granule_href, lite=lite, precision=4)
+            self.assertEqual(
+                json.dumps(responses[request_id]["item"]), json.dumps(item.to_dict())
+            )
+        self.assertEqual(responses[3]["status"], "ok")
@@ -0,0 +1,98 @@
+import unittest
+from collections import Counter
+
+from stactools.sentinel5p.dedup import preferred_granules, sort_by_start_time
+
+
+def name(mode, start, collection="01", version="010302", production="20200306T053815"):
+    return (
+        f"s3://bucket/S5P_{mode}_L2__NO2____"
+        f"{start}_20200303T031717_"
+        f"12367_{collection}_{version}_"
+        f"{production}.nc"
+    )
+
+
+START = "20200303T013547"
+LATER = "20200303T013548"
+
+
+class PreferredGranulesTest(unittest.TestCase):
+    def test_default_precedence(self):
+        nrti = name("NRTI", START, "02", "020200", "20200307T000000")
+        offl = name("OFFL", START)
+        offl_02 = name("OFFL", START, "02")
+        offl_02_newer = name("OFFL", START, "02", production="20200401T000000")
+        rpro = name("RPRO", START)
+
+        cases = [
+            ([nrti, offl], offl),
+            ([offl, offl_02], offl_02),
+            ([offl_02_newer, offl_02], offl_02_newer),
+            ([offl, nrti, rpro, offl_02], rpro),
+        ]
+        for hrefs, expected in cases:
+            with self.subTest(hrefs=hrefs):
+                stats = Counter()
+                self.assertEqual(
+                    list(preferred_granules(hrefs, stats=stats)), [expected]
+                )
+                self.assertEqual(stats["duplicates_dropped"], len(hrefs) - 1)
+
+    def test_configurable_precedence(self):
+        nrti = name("NRTI", START, "02")
+        offl = name("OFFL", START, "01")
+        self.assertEqual(
+            list(preferred_granules([offl, nrti], precedence=["collection"])), [nrti]
+        )
+        self.assertEqual(
+            list(preferred_granules([offl, nrti], modes=["NRTI", "OFFL"])), [nrti]
+        )
+        # Copies that do not differ on the fields compared keep the first one
+        self.assertEqual(
+            list(preferred_granules([nrti, offl], precedence=["processor_version"])),
+            [nrti],
+        )
+        with self.assertRaises(ValueError):
+            list(preferred_granules([offl], precedence=["orbit"]))
+
+    def test_keeps_distinct_granules_in_order(self):
+        hrefs = [
+            name("OFFL", START),
+            name("OFFL", START).replace("NO2____", "CO_____"),
+            "s3://bucket/notes.txt",
+            name("OFFL", LATER),
+            name("NRTI", LATER),
+        ]
+        self.assertEqual(
+            list(preferred_granules(hrefs)), [hrefs[2], hrefs[0], hrefs[1], hrefs[3]]
+        )
+
+    def test_requires_start_time_order(self):
+        with self.assertRaises(ValueError):
+            list(preferred_granules([name("OFFL", LATER), name("OFFL", START)]))
+
+    def test_sort_by_start_time(self):
+        hrefs = [
+            name("RPRO", LATER),
+            name("OFFL", START),
+            "s3://bucket/notes.txt",
+            name("NRTI", START),
+        ]
+        self.assertEqual(
+            sort_by_start_time(hrefs), [hrefs[2], hrefs[1], hrefs[3], hrefs[0]]
+        )
+        self.assertEqual(
+            list(preferred_granules(sort_by_start_time(hrefs))),
+            [hrefs[2], hrefs[1], hrefs[0]],
+        )
+
+    def test_holds_only_one_start_time(self):
+        def hrefs():
+            for second in range(10):
+                yield name("NRTI", f"20200303T0135{second:02d}")
+                yield name("OFFL", f"20200303T0135{second:02d}")
+
+        stream = preferred_granules(hrefs())
+        # The first granule is out once the second start time is read
+        self.assertEqual(next(stream), name("OFFL", "20200303T013500"))
@@ -0,0 +1,110 @@
+import copy
+import glob
+import json
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from stactools.sentinel5p.dehydration import (
+    DO_NOT_MERGE_MARKER,
+    BaseItems,
+    base_item,
+    base_key,
+    dehydrate,
+    hydrate,
+)
+from stactools.sentinel5p.stac import create_item
+from tests import test_data
+
+
+class DehydrationTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "S5P_*")
+        cls.items = [
+            create_item(href).to_dict(include_self_link=False, transform_hrefs=False)
+            for href in sorted(glob.glob(granule_glob))
+        ]
+        # As read back from JSON, with lists rather than tuples
+        cls.items = json.loads(json.dumps(cls.items))
+
+    def test_base_key(self):
+        self.assertEqual(
+            base_key(
+                "S5P_OFFL_L2__NO2____20200303T013547_20200303T031717_12367_01_"
+                "010302_20200306T053815"
+            ),
+            "NO2_01",
+        )
+        with self.assertRaises(ValueError):
+            base_key("not-a-granule")
+
+    def test_base_item(self):
+        item = self.items[0]
+        base = base_item(item)
+        for key in ("id", "geometry", "bbox"):
+            self.assertNotIn(key, base)
+        self.assertNotIn("datetime", base["properties"])
+        self.assertEqual(
+            base["properties"]["providers"], item["properties"]["providers"]
+        )
+        for asset in base["assets"].values():
+            self.assertNotIn("href", asset)
+        self.assertIn("id", item)
+
+    def test_round_trip(self):
+        for item in self.items:
+            for base_source in self.items:
+                with self.subTest(item=item["id"], base=base_source["id"]):
+                    base = base_item(base_source)
+                    dehydrated = json.loads(json.dumps(dehydrate(base, item)))
+                    self.assertEqual(hydrate(base, dehydrated), item)
+
+    def test_dehydrate_drops_shared_values(self):
+        item = self.items[0]
+        base = base_item(item)
+        dehydrated = dehydrate(base, item)
+        self.assertEqual(
+            set(dehydrated), {"id", "geometry", "bbox", "properties", "assets"}
+        )
+        # Footprints are most of the size of items, and never shared
+        self.assertLess(
+            len(json.dumps({**dehydrated, "geometry": None})),
+            len(json.dumps({**item, "geometry": None})) / 2,
+        )
+
+    def test_missing_keys(self):
+        base = {"a": 1, "b": {"c": 2, "d": 3}, "e": [{"f": 4}, {"g": 5}]}
+        item = {"b": {"c": 2}, "e": [{"f": 4}, {"g": 6, "h": 7}], "i": 8}
+        dehydrated = dehydrate(base, item)
+        self.assertEqual(
+            dehydrated,
+            {
+                "a": DO_NOT_MERGE_MARKER,
+                "b": {"d": DO_NOT_MERGE_MARKER},
+                "e": [{}, {"g": 6, "h": 7}],
+                "i": 8,
+            },
+        )
+        self.assertEqual(hydrate(base, copy.deepcopy(dehydrated)), item)
+
+    def test_hydrate_copies_base_values(self):
+        base = {"a": {"b": [1, 2]}}
+        first = hydrate(base, {})
+        first["a"]["b"].append(3)
+        self.assertEqual(base, {"a": {"b": [1, 2]}})
+
+    def test_base_items(self):
+        bases = BaseItems()
+        dehydrated = [bases.dehydrate(item) for item in self.items]
+        self.assertEqual(len(bases.bases), len({base_key(i["id"]) for i in self.items}))
+        with TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "bases.json")
+            bases.save(path)
+            loaded = BaseItems.load(path)
+        self.assertEqual(loaded.bases, bases.bases)
+        for item, dehydrated_item in zip(self.items, dehydrated):
+            self.assertEqual(
+                loaded.hydrate(json.loads(json.dumps(dehydrated_item))), item
+            )
+        self.assertEqual(BaseItems.load(path).bases, {})
@@ -0,0 +1,87 @@
+import unittest
+
+from stactools.sentinel5p.extraction import EXTRACTION_PLANS
+from stactools.sentinel5p.granule import GranuleReader
+from stactools.sentinel5p.product_metadata import ProductMetadata
+from tests import test_data
+
+
+class ExtractionPlanTest(unittest.TestCase):
+    def test_resolves_each_group_once(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_OFFL_L2__CH4____"
+            "20200303T013547_20200303T031717_"
+            "12367_01_010302_"
+            "20200306T053811.nc"
+        )
+        plan = EXTRACTION_PLANS["L2__CH4___"]
+        with GranuleReader(granule_href) as granule:
+            plan.extract(granule)
+
+        paths = [path for path, _, _ in plan.groups]
+        self.assertIn("METADATA/ALGORITHM_SETTINGS", paths)
+        self.assertEqual(granule.stats["group_opens"], len([p for p in paths if p]))
+        self.assertEqual(
+            granule.stats["attr_reads"],
+            sum(len(attribute_names) for _, attribute_names, _ in plan.groups),
+        )
+
+    def test_json_sidecar_matches_netcdf_conventions(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_OFFL_L2__O3_TCL_"
+            "20210618T112332_20210624T120910_"
+            "19112_01_020104_"
+            "20210703T000430.json"
+        )
+        metadata = ProductMetadata(granule_href).metadata_dict
+
+        self.assertEqual(metadata["s5p:spatial_resolution"], [5500, 3500])
+        self.assertEqual(
+            metadata["o3_tcl:stratosphere_start_datetime"], "2021-06-18T11:23:32Z"
+        )
+        self.assertEqual(
+            metadata["o3_tcl:troposphere_start_datetime"], "2021-06-19T22:54Z"
+        )
+
+    def test_every_product_type_has_a_plan(self):
+        for product_type in [
+            "L2__AER_AI",
+            "L2__AER_LH",
+            "L2__CH4___",
+            "L2__CLOUD_",
+            "L2__CO____",
+            "L2__HCHO__",
+            "L2__NO2___",
+            "L2__O3____",
+            "L2__O3_TCL",
+            "L2__SO2___",
+            "L2__NP_BD3",
+            "L2__NP_BD6",
+            "L2__NP_BD7",
+        ]:
+            self.assertIn(product_type, EXTRACTION_PLANS)
+
+    def test_extract_nested_matches_extract(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_OFFL_L2__NP_BD3_"
+            "20200303T013547_20200303T031717_"
+            "12367_01_010002_"
+            "20200306T032410.nc"
+        )
+        plan = EXTRACTION_PLANS["L2__NP_BD3"]
+        self.assertEqual(plan.prefix, "npbd3")
+        with GranuleReader(granule_href) as granule:
+            flat = plan.extract(granule)
+        with GranuleReader(granule_href) as granule:
+            properties, product_properties = plan.extract_nested(granule)
+
+        self.assertTrue(product_properties)
+        nested = dict(properties)
+        nested.update(
+            (f"npbd3:{name}", value) for name, value in product_properties.items()
+        )
+        self.assertEqual(nested, flat)
+        self.assertFalse(any(key.startswith("npbd3:") for key in properties))
@@ -0,0 +1,58 @@
+import glob
+import json
+import math
+import os
+import unittest
+from unittest import mock
+
+from stactools.sentinel5p import fastjson
+from stactools.sentinel5p.stac import create_item_dict
+from tests import test_data
+
+# Values that orjson writes differently from the standard library
+TRICKY = [
+    {"a": 1e16, "b": -1.2e17, "c": 1.5e-05, "d": -9.9e-05, "e": 1e-7},
+    {"nan": math.nan, "inf": math.inf, "none": None},
+    {"text": "Sentinel-5 Précurseur ✓", "control": "\x00\x1f\x7f\t"},
+    {"big": 2**70, "keys": {1: "a", 2.5: "b"}},
+    [0.0001, 100.0, -0.0, 1e15, 9990000000000000.0, (1, 2)],
+]
+
+
+class FastJsonTest(unittest.TestCase):
+    def assertDumpsLikeJson(self, obj):
+        expected = json.dumps(obj, separators=(",", ":"))
+        self.assertEqual(fastjson.dumps(obj), expected)
+        self.assertEqual(fastjson.dumpb(obj), expected.encode("utf-8"))
+
+    def test_items_are_byte_identical(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "S5P_*")
+        for granule_href in sorted(glob.glob(granule_glob)):
+            with self.subTest(granule_href):
+                self.assertDumpsLikeJson(create_item_dict(granule_href))
+
+    def test_tricky_values(self):
+        for obj in TRICKY:
+            with self.subTest(obj=obj):
+                self.assertDumpsLikeJson(obj)
+
+    def test_loads(self):
+        sidecar_glob = os.path.join(test_data.get_path("data-files"), "S5P_*.json")
+        for sidecar_href in sorted(glob.glob(sidecar_glob)):
+            with open(sidecar_href, "rb") as f:
+                data = f.read()
+            self.assertEqual(fastjson.loads(data), json.loads(data))
+        self.assertTrue(math.isnan(fastjson.loads(b'{"a":NaN}')["a"]))
+        self.assertEqual(fastjson.loads("[%d]" % 2**70), [2**70])
+        with self.assertRaises(ValueError):
+            fastjson.loads(b"{")
+
+    def test_without_orjson(self):
+        with mock.patch.object(fastjson, "orjson", None):
+            for obj in TRICKY:
+                self.assertDumpsLikeJson(obj)
+            self.assertEqual(fastjson.loads(b'{"a":[1]}'), {"a": [1]})
+
+    def test_unserializable(self):
+        with self.assertRaises(TypeError):
+            fastjson.dumps({"a": object()})
@@ -0,0 +1,150 @@
+import glob
+import os
+import unittest
+from collections import Counter
+
+import antimeridian
+from shapely.geometry import MultiPolygon, Polygon, box, mapping, shape  # type: ignore
+
+from stactools.sentinel5p.extraction import FOOTPRINT
+from stactools.sentinel5p.footprint import (
+    parse_pos_list,
+    pos_list_footprint,
+    pos_list_polygon,
+    simplify_footprint,
+)
+from stactools.sentinel5p.granule import GranuleReader
+from stactools.sentinel5p.stac import create_item
+from tests import test_data
+
+
+class FootprintTest(unittest.TestCase):
+    def test_parse_pos_list_swaps_to_lon_lat(self):
+        coordinates = parse_pos_list("10.5 -170.25 11 -171 12 -170.25 10.5 -170.25")
+
+        self.assertEqual(
+            coordinates.tolist(),
+            [[-170.25, 10.5], [-171.0, 11.0], [-170.25, 12.0], [-170.25, 10.5]],
+        )
+
+    def test_parse_pos_list_with_commas(self):
+        self.assertEqual(
+            parse_pos_list("1,2 3,4").tolist(),
+            parse_pos_list("1 2 3 4").tolist(),
+        )
+
+    def test_parse_pos_list_rejects_odd_values(self):
+        with self.assertRaises(ValueError):
+            parse_pos_list("1 2 3")
+
+    def test_parse_pos_list_rejects_malformed_values(self):
+        with self.assertRaises(ValueError):
+            parse_pos_list("1 2 3 x 5 6")
+
+    def test_pos_list_polygon(self):
+        polygon = pos_list_polygon("0 0 0 1 1 1 1 0 0 0")
+
+        self.assertEqual(polygon.area, 1.0)
+        self.assertEqual(
+            list(polygon.exterior.coords),
+            [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0), (0.0, 0.0)],
+        )
+
+    def assert_fixes_like_antimeridian(self, pos_list, path):
+        stats = Counter()
+        footprint = pos_list_footprint(pos_list, stats)
+        expected = antimeridian.fix_polygon(
+            pos_list_polygon(pos_list), fix_winding=False
+        )
+
+        self.assertEqual(mapping(footprint), mapping(expected))
+        self.assertEqual(stats, Counter({path: 1}))
+
+    def test_footprints_match_antimeridian_fix(self):
+        fast_path = {
+            "S5P_NRTI_L2__AER_LH_",
+            "S5P_NRTI_L2__CLOUD__",
+            "S5P_NRTI_L2__CO_____",
+            "S5P_NRTI_L2__HCHO___",
+            "S5P_NRTI_L2__O3_____",
+        }
+        granule_glob = os.path.join(test_data.get_path("data-files"), "S5P_*")
+        for granule_href in sorted(glob.glob(granule_glob)):
+            if "O3_TCL" in granule_href:
+                continue
+            with self.subTest(granule_href):
+                with GranuleReader(granule_href) as granule:
+                    pos_list = granule.attr(FOOTPRINT, "gml:posList")
+                if os.path.basename(granule_href)[:20] in fast_path:
+                    path = "antimeridian_fast_path"
+                else:
+                    path = "antimeridian_fix"
+                self.assert_fixes_like_antimeridian(pos_list, path)
+
+    def test_fast_path_with_consecutive_duplicates(self):
+        self.assert_fixes_like_antimeridian(
+            "10 20 10 21 10 21 11 21 11 20 11 20.000000001 10 20",
+            "antimeridian_fast_path",
+        )
+
+    def test_footprints_crossing_the_antimeridian_or_at_it(self):
+        for pos_list in [
+            "10 179 10 -179 11 -179 11 179 10 179",
+            "10 180 10 -179 11 -179 11 180 10 180",
+            "10 170 10 179.9999999 11 179.9999999 11 170 10 170",
+        ]:
+            with self.subTest(pos_list):
+                self.assert_fixes_like_antimeridian(pos_list, "antimeridian_fix")
+
+    def test_clockwise_footprint(self):
+        # antimeridian takes clockwise polygons to cover a pole
+        self.assert_fixes_like_antimeridian(
+            "10 20 11 20 11 21 10 21 10 20", "antimeridian_fix"
+        )
+
+
+class SimplifyFootprintTest(unittest.TestCase):
+    def test_unchanged_without_options(self):
+        footprint = box(0, 0, 1, 1)
+        self.assertIs(simplify_footprint(footprint), footprint)
+
+    def test_simplify(self):
+        footprint = Polygon([(0, 0), (1, 0.001), (2, 0), (2, 1), (0, 1)])
+        simplified = simplify_footprint(footprint, tolerance=0.01)
+        self.assertEqual(len(simplified.exterior.coords), 5)
+        self.assertTrue(simplified.exterior.is_ccw)
+
+    def test_precision(self):
+        footprint = Polygon([(0.123456, 0.1), (1.987654, 0.1), (1, 1.000001)])
+        rounded = simplify_footprint(footprint, precision=3)
+        self.assertEqual(
+            list(rounded.exterior.coords),
+            [(0.123, 0.1), (1.988, 0.1), (1.0, 1.0), (0.123, 0.1)],
+        )
+
+    def test_precision_keeps_footprint_valid(self):
+        # Rounding the spike to 1 decimal place folds the ring onto itself
+        footprint = Polygon([(0, 0), (2, 0), (2, 2), (1.04, 0.02), (0, 2)])
+        rounded = simplify_footprint(footprint, precision=1)
+        self.assertTrue(rounded.is_valid)
+        self.assertFalse(rounded.is_empty)
+
+    def test_collapse(self):
+        with self.assertRaises(ValueError):
+            simplify_footprint(box(0, 0, 0.01, 0.01), precision=1)
+
+    def test_items_stay_valid_and_covered_by_bbox(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "S5P_*")
+        for granule_href in sorted(glob.glob(granule_glob)):
+            with self.subTest(granule_href):
+                expected = shape(create_item(granule_href).geometry)
+                item = create_item(granule_href, simplify_tolerance=0.01, precision=4)
+                geometry = shape(item.geometry)
+
+                self.assertTrue(geometry.is_valid)
+                self.assertEqual(
+                    isinstance(geometry, MultiPolygon),
+                    isinstance(expected, MultiPolygon),
+                )
+                self.assertTrue(box(*item.bbox).covers(geometry))
+                self.assertLessEqual(expected.hausdorff_distance(geometry), 0.0101)
@@ -0,0 +1,73 @@
+import glob
+import gzip
+import json
+import os
+import unittest
+from collections import Counter
+
+import stactools.sentinel5p
+from stactools.sentinel5p.granule import GranuleError
+from stactools.sentinel5p.product_metadata import ProductMetadataError
+from stactools.sentinel5p.stac import create_item, create_item_from_bytes
+from tests import test_data
+
+
+def _read(href):
+    with open(href, "rb") as f:
+        return f.read()
+
+
+class CreateItemFromBytesTest(unittest.TestCase):
+    def assertSameItem(self, item, expected):
+        self.assertEqual(
+            json.dumps(item.to_dict(), indent=1),
+            json.dumps(expected.to_dict(), indent=1),
+        )
+
+    def test_matches_create_item(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "S5P_*")
+        for granule_href in sorted(glob.glob(granule_glob)):
+            data = _read(granule_href)
+            expected = create_item(granule_href, simplify_tolerance=0.01)
+            for buffer in (data, memoryview(data)):
+                with self.subTest(granule_href, buffer=type(buffer).__name__):
+                    item = create_item_from_bytes(
+                        granule_href, buffer, simplify_tolerance=0.01
+                    )
+                    self.assertSameItem(item, expected)
+
+    def test_gzip_compressed_sidecar(self):
+        (sidecar_href,) = glob.glob(
+            test_data.get_path("data-files/S5P_NRTI_L2__NO2____*.json")
+        )
+        data = gzip.compress(_read(sidecar_href))
+        item = create_item_from_bytes(f"{sidecar_href}.gz", data)
+        self.assertSameItem(item, create_item(sidecar_href))
+
+    def test_name_identifies_the_scene(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_OFFL_L2__CO_____"
+            "20200303T013547_20200303T031717_"
+            "12367_01_010302_"
+            "20200306T032410.nc"
+        )
+        name = os.path.basename(granule_href)
+        stats: Counter = Counter()
+        # Nothing is read from the name, which is not a file here
+        item = create_item_from_bytes(name, _read(granule_href), stats=stats)
+        self.assertEqual(item.id, name[:-3])
+        self.assertEqual(item.properties["s5p:processing_mode"], "OFFL")
+        (asset,) = item.assets.values()
+        self.assertEqual(asset.href, name)
+        self.assertGreater(stats["attr_reads"], 0)
+
+        with self.assertRaises(ProductMetadataError):
+            create_item_from_bytes("granule.nc", _read(granule_href))
+        with self.assertRaises(GranuleError):
+            create_item_from_bytes(name[:-3] + ".h5", _read(granule_href))
+
+    def test_exported(self):
+        self.assertIs(
+            stactools.sentinel5p.create_item_from_bytes, create_item_from_bytes
+        )
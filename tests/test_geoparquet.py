@@ -0,0 +1,150 @@
+import glob
+import json
+import os
+import unittest
+from copy import deepcopy
+from datetime import datetime, timedelta
+from tempfile import TemporaryDirectory
+
+import pyarrow.parquet as pq  # type: ignore
+import shapely  # type: ignore
+from shapely.geometry import shape  # type: ignore
+
+from stactools.sentinel5p.geoparquet import (
+    GeoParquetWriter,
+    item_to_row,
+    iter_dataset_item_ids,
+    partition_path,
+)
+from stactools.sentinel5p.stac import create_item
+from tests import test_data
+
+
+def copies(item, count):
+    for i in range(count):
+        copy = deepcopy(item)
+        copy["id"] = f"{item['id']}-{i}"
+        yield copy
+
+
+class GeoParquetTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "S5P_*")
+        cls.items = {}
+        for href in sorted(glob.glob(granule_glob)):
+            item = create_item(href).to_dict(include_self_link=False)
+            cls.items[item["id"]] = item
+
+    def test_item_to_row(self):
+        item = next(
+            item
+            for item in self.items.values()
+            if item["properties"]["s5p:product_name"] == "no2"
+        )
+        row = item_to_row(item)
+        self.assertEqual(shape(item["geometry"]), shapely.from_wkb(row["geometry"]))
+        self.assertEqual(list(row["bbox"].values()), item["bbox"])
+        self.assertEqual(row["start_datetime"].utcoffset(), timedelta(0))
+        for field, value in item["properties"]["s5p:no2"].items():
+            self.assertEqual(row[f"s5p:no2.{field}"], value)
+        self.assertNotIn("s5p:no2", row)
+        self.assertEqual(row["s5p:product_type"], "L2__NO2___")
+
+    def test_partition_path(self):
+        item = self.items[
+            "S5P_OFFL_L2__NO2____20200303T013547_20200303T031717_12367_01_010302_"
+            "20200306T053815"
+        ]
+        self.assertEqual(partition_path(item), "product=no2/date=2020-03-03")
+
+    def test_write(self):
+        with TemporaryDirectory() as tmp_dir:
+            with GeoParquetWriter(tmp_dir, row_group_size=2) as writer:
+                for item in self.items.values():
+                    writer.write(item)
+
+            partitions = {partition_path(item) for item in self.items.values()}
+            paths = glob.glob(os.path.join(tmp_dir, "*", "*", "*.parquet"))
+            self.assertEqual(
+                {os.path.relpath(os.path.dirname(path), tmp_dir) for path in paths},
+                partitions,
+            )
+            ids = []
+            for path in paths:
+                metadata = json.loads(pq.read_schema(path).metadata[b"geo"])
+                self.assertEqual(metadata["primary_column"], "geometry")
+                self.assertEqual(metadata["columns"]["geometry"]["encoding"], "WKB")
+                for row in pq.read_table(path).to_pylist():
+                    item = self.items[row["id"]]
+                    ids.append(row["id"])
+                    self.assertEqual(
+                        shape(item["geometry"]), shapely.from_wkb(row["geometry"])
+                    )
+                    self.assertEqual(
+                        row["datetime"],
+                        datetime.fromisoformat(
+                            item["properties"]["datetime"].replace("Z", "+00:00")
+                        ),
+                    )
+                    self.assertEqual(row["assets"], item["assets"])
+            self.assertEqual(sorted(ids), sorted(self.items))
+            self.assertEqual(sorted(iter_dataset_item_ids(tmp_dir)), sorted(ids))
+
+    def test_row_groups(self):
+        item = next(iter(self.items.values()))
+        with TemporaryDirectory() as tmp_dir:
+            with GeoParquetWriter(tmp_dir, row_group_size=3) as writer:
+                for copy in copies(item, 10):
+                    writer.write(copy)
+            (path,) = glob.glob(os.path.join(tmp_dir, "*", "*", "*.parquet"))
+            metadata = pq.ParquetFile(path).metadata
+            self.assertEqual(metadata.num_rows, 10)
+            self.assertEqual(metadata.num_row_groups, 4)
+
+    def test_max_open_partitions(self):
+        first, second = list(self.items.values())[:2]
+        self.assertNotEqual(partition_path(first), partition_path(second))
+        with TemporaryDirectory() as tmp_dir:
+            with GeoParquetWriter(
+                tmp_dir, row_group_size=10, max_open_partitions=1
+            ) as writer:
+                for pair in zip(copies(first, 3), copies(second, 3)):
+                    for item in pair:
+                        writer.write(item)
+            self.assertEqual(writer.files_written, 6)
+            paths = glob.glob(os.path.join(tmp_dir, "*", "*", "*.parquet"))
+            self.assertEqual(
+                sum(pq.ParquetFile(path).metadata.num_rows for path in paths), 6
+            )
+
+    def test_new_columns(self):
+        item = next(iter(self.items.values()))
+        extended = deepcopy(item)
+        extended["id"] = "extended"
+        extended["properties"]["s5p:extra"] = 1
+        with TemporaryDirectory() as tmp_dir:
+            with GeoParquetWriter(tmp_dir, row_group_size=1) as writer:
+                writer.write(item)
+                writer.write(extended)
+            self.assertEqual(writer.files_written, 2)
+            tables = [
+                pq.read_table(path)
+                for path in glob.glob(os.path.join(tmp_dir, "*", "*", "*.parquet"))
+            ]
+            self.assertEqual(sorted(table.num_rows for table in tables), [1, 1])
+
+    def test_rows_with_different_columns(self):
+        item = next(iter(self.items.values()))
+        extended = deepcopy(item)
+        extended["id"] = "extended"
+        extended["properties"]["s5p:extra"] = 1
+        with TemporaryDirectory() as tmp_dir:
+            with GeoParquetWriter(tmp_dir) as writer:
+                writer.write(item)
+                writer.write(extended)
+            self.assertEqual(writer.files_written, 1)
+            (path,) = glob.glob(os.path.join(tmp_dir, "*", "*", "*.parquet"))
+            rows = {row["id"]: row for row in pq.read_table(path).to_pylist()}
+            self.assertEqual(rows["extended"]["s5p:extra"], 1)
+            self.assertIsNone(rows[item["id"]]["s5p:extra"])
@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+
+import netCDF4
+
+from stactools.sentinel5p.granule import GranuleError, GranuleReader
+from stactools.sentinel5p.product_metadata import ProductMetadata
+from stactools.sentinel5p.stac import create_item
+from tests import test_data
+
+
+class GranuleReaderTest(unittest.TestCase):
+    def test_create_item_opens_granule_once_and_closes_it(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_OFFL_L2__NO2____"
+            "20200303T013547_20200303T031717_"
+            "12367_01_010302_"
+            "20200306T053815.nc"
+        )
+        opened = []
+        real_dataset = netCDF4.Dataset
+
+        def counting_dataset(*args, **kwargs):
+            dataset = real_dataset(*args, **kwargs)
+            opened.append(dataset)
+            return dataset
+
+        with mock.patch("netCDF4.Dataset", counting_dataset):
+            create_item(granule_href)
+
+        self.assertEqual(len(opened), 1)
+        self.assertFalse(opened[0].isopen())
+
+    def test_reads_each_group_and_attribute_once(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_OFFL_L2__NO2____"
+            "20200303T013547_20200303T031717_"
+            "12367_01_010302_"
+            "20200306T053815.nc"
+        )
+        with GranuleReader(granule_href) as granule:
+            product_metadata = ProductMetadata(granule)
+            product_metadata.metadata_dict
+            stats = dict(granule.stats)
+
+            product_metadata.metadata_dict
+            product_metadata.get_datetime
+            self.assertEqual(granule.stats, stats)
+
+            path = "METADATA/GRANULE_DESCRIPTION"
+            self.assertEqual(granule.attr(path, "ProductShortName"), "L2__NO2___")
+            self.assertEqual(granule.stats, stats)
+
+    def test_reads_json_sidecar(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_NRTI_L2__NO2____"
+            "20210827T012135_20210827T012635_"
+            "20056_02_020200_"
+            "20210827T021525.json"
+        )
+        with GranuleReader(granule_href) as granule:
+            self.assertFalse(granule.is_netcdf)
+            self.assertEqual(granule.root["orbit"], 20056)
+
+    def test_rejects_unsupported_format(self):
+        with self.assertRaises(GranuleError):
+            GranuleReader("S5P_OFFL_L2__NO2____granule.h5")
@@ -0,0 +1,79 @@
+import subprocess
+import sys
+import textwrap
+import unittest
+from typing import Dict
+
+# Loaded by the commands that read granules and build items, never by stactools
+# creating the commands of the plugin
+HEAVY_MODULES = (
+    "antimeridian",
+    "fsspec",
+    "h5netcdf",
+    "netCDF4",
+    "numpy",
+    "pyarrow",
+    "pystac",
+    "shapely",
+    "stactools.core",
+)
+
+REGISTER_PLUGIN = """
+import click
+
+import stactools.sentinel5p
+
+
+class Registry:
+    def register_subcommand(self, create_command):
+        create_command(click.Group())
+
+
+stactools.sentinel5p.register_plugin(Registry())
+"""
+
+
+def import_times(code: str) -> Dict[str, int]:
+    """Runs code with ``python -X importtime``, and returns the cumulative
+    import time, in microseconds, of each module it imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", textwrap.dedent(code)],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class ImportTest(unittest.TestCase):
+    def test_register_plugin_imports_no_heavy_modules(self):
+        times = import_times(REGISTER_PLUGIN)
+        self.assertIn("stactools.sentinel5p.commands", times)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, times)
+
+    def test_create_item_is_imported_on_first_use(self):
+        times = import_times(
+            """
+            import sys
+
+            import stactools.sentinel5p
+
+            assert "stactools.sentinel5p.stac" not in sys.modules
+            stactools.sentinel5p.create_item
+
+            from pystac import StacIO
+            from stactools.core.io import FsspecStacIO
+
+            assert isinstance(StacIO.default(), FsspecStacIO)
+            """
+        )
+        self.assertIn("stactools.sentinel5p.stac", times)
+        self.assertIn("netCDF4", times)
@@ -0,0 +1,83 @@
+import gzip
+import json
+import os
+import unittest
+from collections import Counter
+from tempfile import TemporaryDirectory
+
+from stactools.sentinel5p.incremental import (
+    BloomFilter,
+    ItemIdSet,
+    item_id,
+    iter_item_ids,
+    load_item_ids,
+    skip_existing,
+)
+from stactools.sentinel5p.index import build_index
+
+NAMES = [
+    f"S5P_OFFL_L2__NO2____20200303T013547_20200303T031717_{orbit:05d}_01_010302_"
+    "20200306T053815"
+    for orbit in range(100)
+]
+
+
+class ItemIdsTest(unittest.TestCase):
+    def test_item_id(self):
+        self.assertEqual(item_id(f"s3://bucket/{NAMES[0]}.nc"), NAMES[0])
+        self.assertEqual(item_id(f"/data/{NAMES[0]}.json.gz"), NAMES[0])
+
+    def test_item_id_set(self):
+        ids = ItemIdSet(NAMES[:50] + NAMES[:10])
+        self.assertEqual(len(ids), 50)
+        for name in NAMES[:50]:
+            self.assertIn(name, ids)
+        for name in NAMES[50:]:
+            self.assertNotIn(name, ids)
+        self.assertNotIn(None, ids)
+        self.assertNotIn(NAMES[0], ItemIdSet([]))
+
+    def test_bloom_filter(self):
+        ids = BloomFilter(50, error_rate=1e-3)
+        for name in NAMES[:50]:
+            ids.add(name)
+        self.assertEqual(len(ids), 50)
+        for name in NAMES[:50]:
+            self.assertIn(name, ids)
+        false_positives = sum(name in ids for name in NAMES[50:])
+        self.assertLessEqual(false_positives, 1)
+
+    def test_iter_item_ids(self):
+        with TemporaryDirectory() as tmp_dir:
+            items_dir = os.path.join(tmp_dir, "items")
+            os.mkdir(items_dir)
+            for name in NAMES[:3]:
+                with open(os.path.join(items_dir, f"{name}.json"), "w") as f:
+                    json.dump({"id": name}, f)
+            with open(os.path.join(items_dir, "notes.txt"), "w") as f:
+                f.write("not an item")
+            ndjson = os.path.join(tmp_dir, "items.ndjson.gz")
+            with gzip.open(ndjson, "wt") as f:
+                for name in NAMES[3:6]:
+                    f.write(json.dumps({"type": "Feature", "id": name}) + "\n")
+            index = os.path.join(tmp_dir, "index.sqlite")
+            build_index([f"s3://bucket/{name}.nc" for name in NAMES[6:9]], index)
+
+            self.assertEqual(sorted(iter_item_ids(items_dir)), NAMES[:3])
+            self.assertEqual(list(iter_item_ids(ndjson)), NAMES[3:6])
+            self.assertEqual(sorted(iter_item_ids(index)), NAMES[6:9])
+
+            missing = os.path.join(tmp_dir, "missing.ndjson")
+            for bloom in (False, True):
+                with self.subTest(bloom=bloom):
+                    ids = load_item_ids(
+                        [items_dir, ndjson, index, missing], bloom=bloom
+                    )
+                    self.assertEqual(len(ids), 9)
+
+    def test_skip_existing(self):
+        ids = ItemIdSet(NAMES[:50])
+        hrefs = [f"s3://bucket/{name}.nc" for name in NAMES]
+        stats = Counter()
+        self.assertEqual(list(skip_existing(hrefs, ids, stats)), hrefs[50:])
+        self.assertEqual(stats["skipped_existing"], 50)
@@ -0,0 +1,106 @@
+import glob
+import os
+import sqlite3
+import unittest
+from datetime import datetime, timezone
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from stactools.sentinel5p import index
+from stactools.sentinel5p.index import build_index, parse_granule_name, query_index
+from tests import test_data
+
+NO2_NAME = (
+    "S5P_OFFL_L2__NO2____"
+    "20200303T013547_20200303T031717_"
+    "12367_01_010302_"
+    "20200306T053815.nc"
+)
+
+
+class GranuleIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.index = os.path.join(self.tmp_dir.name, "index.sqlite")
+        granule_glob = os.path.join(test_data.get_path("data-files"), "S5P_*")
+        self.hrefs = sorted(glob.glob(granule_glob))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_parse_granule_name(self):
+        record = parse_granule_name(f"s3://bucket/{NO2_NAME}")
+        self.assertEqual(record.href, f"s3://bucket/{NO2_NAME}")
+        self.assertEqual(record.id, NO2_NAME[:-3])
+        self.assertEqual(record.product, "NO2")
+        self.assertEqual(record.mode, "OFFL")
+        self.assertEqual(record.orbit, 12367)
+        self.assertEqual(record.start_datetime, "2020-03-03T01:35:47Z")
+        self.assertEqual(record.end_datetime, "2020-03-03T03:17:17Z")
+        self.assertEqual(record.collection, "01")
+        self.assertEqual(record.processor_version, "010302")
+        self.assertEqual(record.production_datetime, "2020-03-06T05:38:15Z")
+        self.assertIsNone(parse_granule_name("s3://bucket/notes.txt"))
+
+    def test_build_and_query(self):
+        indexed, skipped = build_index(self.hrefs + ["README.md"], self.index)
+        self.assertEqual((indexed, skipped), (len(self.hrefs), 1))
+
+        records = list(query_index(self.index))
+        self.assertEqual(sorted(record.href for record in records), self.hrefs)
+        starts = [record.start_datetime for record in records]
+        self.assertEqual(starts, sorted(starts))
+
+        (no2,) = query_index(self.index, product="no2", mode="offl")
+        self.assertEqual(os.path.basename(no2.href), NO2_NAME)
+
+        ch4 = query_index(self.index, product="CH4", orbits=(20000, 30000))
+        self.assertEqual([record.orbit for record in ch4], [20333])
+
+        o3_tcl = query_index(
+            self.index,
+            product="O3_TCL",
+            start=datetime(2020, 3, 9, 12, tzinfo=timezone.utc),
+            end=datetime(2020, 3, 10),
+        )
+        self.assertEqual([record.orbit for record in o3_tcl], [12373])
+
+        self.assertEqual(
+            len(list(query_index(self.index, start=datetime(2020, 3, 10)))), 13
+        )
+        self.assertEqual(
+            len(list(query_index(self.index, end=datetime(2020, 3, 3, 2)))), 12
+        )
+
+    def test_build_adds_to_index(self):
+        build_index(self.hrefs[:5], self.index)
+        indexed, _ = build_index(self.hrefs[3:] + self.hrefs[3:], self.index)
+        self.assertEqual(indexed, 2 * len(self.hrefs[3:]))
+
+        hrefs = [record.href for record in query_index(self.index)]
+        self.assertEqual(sorted(hrefs), self.hrefs)
+
+    def test_build_journals_existing_indexes(self):
+        connect = index.connect
+        statements = []
+
+        def tracing_connect(path):
+            connection = connect(path)
+            connection.set_trace_callback(statements.append)
+            return connection
+
+        with mock.patch.object(index, "connect", tracing_connect):
+            build_index(self.hrefs[:5], self.index)
+            self.assertIn("PRAGMA journal_mode = OFF", statements)
+            statements.clear()
+            build_index(self.hrefs[5:], self.index)
+            self.assertFalse([s for s in statements if s.startswith("PRAGMA")])
+        with sqlite3.connect(self.index) as connection:
+            (count,) = connection.execute("SELECT count(*) FROM granules").fetchone()
+        self.assertEqual(count, len(self.hrefs))
+
+    def test_build_drops_repeated_hrefs(self):
+        build_index(self.hrefs + self.hrefs[:2], self.index)
+        with sqlite3.connect(self.index) as connection:
+            (count,) = connection.execute("SELECT count(*) FROM granules").fetchone()
+        self.assertEqual(count, len(self.hrefs))
@@ -0,0 +1,43 @@
+import glob
+import json
+import os
+import unittest
+from collections import Counter
+
+from stactools.sentinel5p.stac import create_item, create_item_dict
+from tests import test_data
+
+
+class ItemDictTest(unittest.TestCase):
+    def assertSameItem(self, item_dict, expected):
+        # Compared as JSON, so that key order and tuples count
+        self.assertEqual(
+            json.dumps(item_dict, indent=1), json.dumps(expected, indent=1)
+        )
+
+    def test_matches_create_item(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "S5P_*")
+        for granule_href in sorted(glob.glob(granule_glob)):
+            for kwargs in (
+                {},
+                {"lite": True},
+                {"simplify_tolerance": 0.01, "precision": 4},
+            ):
+                with self.subTest(granule_href, **kwargs):
+                    self.assertSameItem(
+                        create_item_dict(granule_href, **kwargs),
+                        create_item(granule_href, **kwargs).to_dict(),
+                    )
+
+    def test_counts_reads(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_OFFL_L2__CO_____"
+            "20200303T013547_20200303T031717_"
+            "12367_01_010302_"
+            "20200306T032410.nc"
+        )
+        stats: Counter = Counter()
+        item_dict = create_item_dict(granule_href, stats=stats)
+        self.assertEqual(item_dict["id"], os.path.basename(granule_href)[:-3])
+        self.assertGreater(stats["attr_reads"], 0)
@@ -0,0 +1,66 @@
+import glob
+import os
+import unittest
+from datetime import timedelta, timezone
+from unittest import mock
+
+from stactools.sentinel5p.constants import LITE_PROPERTY
+from stactools.sentinel5p.stac import create_item
+from tests import test_data
+
+# Properties read from the granule that the name does not tell
+GRANULE_ONLY = {"start_datetime", "end_datetime", "datetime", "s5p:shape"}
+
+
+class LiteItemTest(unittest.TestCase):
+    def test_lite_items_match_full_items(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "S5P_*")
+        for granule_href in sorted(glob.glob(granule_glob)):
+            with self.subTest(granule_href):
+                expected = create_item(granule_href)
+                with mock.patch("stactools.sentinel5p.stac.GranuleReader") as reader:
+                    item = create_item(granule_href, lite=True)
+                reader.assert_not_called()
+
+                self.assertEqual(item.id, expected.id)
+                self.assertIs(item.properties[LITE_PROPERTY], True)
+                self.assertNotIn(LITE_PROPERTY, expected.properties)
+                for key, value in expected.properties.items():
+                    if key in item.properties and key not in GRANULE_ONLY:
+                        self.assertEqual(item.properties[key], value, key)
+                # Names give the sensing times to within minutes
+                self.assertLess(
+                    abs(item.datetime - expected.datetime.replace(tzinfo=timezone.utc)),
+                    timedelta(minutes=5),
+                )
+                self.assertEqual(item.assets.keys(), expected.assets.keys())
+                for key, asset in item.assets.items():
+                    self.assertEqual(asset.href, expected.assets[key].href)
+                    self.assertEqual(asset.title, expected.assets[key].title)
+                self.assertEqual(
+                    [link.target for link in item.links],
+                    [link.target for link in expected.links],
+                )
+                item.validate()
+
+    def test_lite_item_of_missing_granule(self):
+        item = create_item(
+            "s3://bucket/S5P_NRTI_L2__CO_____"
+            "20210326T030103_20210326T030603_"
+            "17892_01_010400_"
+            "20210326T034320.nc",
+            lite=True,
+        )
+        self.assertEqual(item.properties["sat:absolute_orbit"], 17892)
+        self.assertEqual(item.properties["s5p:processing_mode"], "NRTI")
+        self.assertEqual(item.properties["s5p:processor_version"], "010400")
+        self.assertEqual(
+            item.properties["s5p:production_datetime"], "2021-03-26T03:43:20Z"
+        )
+        self.assertEqual(item.properties["start_datetime"], "2021-03-26T03:01:03Z")
+        self.assertEqual(item.properties["end_datetime"], "2021-03-26T03:06:03Z")
+        self.assertEqual(item.bbox, [-180.0, -90.0, 180.0, 90.0])
+
+    def test_lite_item_of_bad_name(self):
+        with self.assertRaises(ValueError):
+            create_item("S5P_bad.nc", lite=True)
@@ -0,0 +1,82 @@
+import importlib.util
+import os
+import unittest
+import uuid
+
+import fsspec  # type: ignore
+
+from stactools.sentinel5p.granule import GranuleReader
+from stactools.sentinel5p.stac import create_item
+from tests import test_data
+
+NO2_GRANULE = (
+    "data-files/"
+    "S5P_OFFL_L2__NO2____"
+    "20200303T013547_20200303T031717_"
+    "12367_01_010302_"
+    "20200306T053815.nc"
+)
+
+
+def _asset_names(item_dict):
+    return {
+        key: {**asset, "href": os.path.basename(asset["href"])}
+        for key, asset in item_dict["assets"].items()
+    }
+
+
+@unittest.skipIf(
+    importlib.util.find_spec("h5netcdf") is None, "h5netcdf is not installed"
+)
+class RemoteGranuleTest(unittest.TestCase):
+    def test_create_item_from_local_url(self):
+        for name in [
+            NO2_GRANULE,
+            "data-files/"
+            "S5P_OFFL_L2__NP_BD3_"
+            "20200303T013547_20200303T031717_"
+            "12367_01_010002_"
+            "20200306T032410.nc",
+            "data-files/"
+            "S5P_OFFL_L2__O3_TCL_"
+            "20200303T120623_20200309T125248_"
+            "12373_01_010108_"
+            "20200318T000106.nc",
+        ]:
+            with self.subTest(name=name):
+                granule_href = test_data.get_path(name)
+                expected = create_item(granule_href).to_dict()
+                item = create_item(f"file://{granule_href}").to_dict()
+
+                self.assertEqual(_asset_names(item), _asset_names(expected))
+                del item["assets"], expected["assets"]
+                self.assertEqual(item, expected)
+
+    def test_reads_only_the_metadata_byte_ranges(self):
+        granule_href = test_data.get_path(NO2_GRANULE)
+        with open(granule_href, "rb") as f:
+            data = f.read()
+        url = f"memory://{uuid.uuid4().hex}/{os.path.basename(granule_href)}"
+        fs = fsspec.filesystem("memory")
+        fs.pipe(url, data)
+        try:
+            with GranuleReader(url, block_size=4096) as granule:
+                self.assertEqual(granule.attr("", "orbit"), 12367)
+                bytes_read = granule.stats["bytes_read"]
+                self.assertGreater(bytes_read, 0)
+                self.assertLess(bytes_read, len(data) / 2)
+                self.assertEqual(bytes_read, 4096 * granule.stats["range_requests"])
+        finally:
+            fs.rm(url)
+
+    def test_reads_json_sidecar_from_url(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_NRTI_L2__NO2____"
+            "20210827T012135_20210827T012635_"
+            "20056_02_020200_"
+            "20210827T021525.json"
+        )
+        with GranuleReader(f"file://{granule_href}") as granule:
+            self.assertEqual(granule.attr("", "orbit"), 20056)
+            self.assertEqual(granule.stats["bytes_read"], os.path.getsize(granule_href))
@@ -0,0 +1,226 @@
+import glob
+import json
+import os
+import socket
+import threading
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from stactools.sentinel5p.batch import create_item_json
+from stactools.sentinel5p.cache import MetadataCache
+from stactools.sentinel5p.serve import ItemServer, SocketServer
+from stactools.sentinel5p.stac import create_item_dict
+from tests import test_data
+
+GRANULE_HREF = test_data.get_path(
+    "data-files/"
+    "S5P_OFFL_L2__CO_____"
+    "20200303T013547_20200303T031717_"
+    "12367_01_010302_"
+    "20200306T032410.nc"
+)
+
+
+def crash_or_create_item_json(href, *args, **kwargs):
+    # Kills the worker process, as a segfault reading a corrupt granule would
+    if href == "crash.nc":
+        os._exit(1)
+    return create_item_json(href, *args, **kwargs)
+
+
+def serve(item_server, *requests):
+    """Returns the responses of an item server to requests, in the order
+    they came."""
+    lines = [
+        request if isinstance(request, str) else json.dumps(request)
+        for request in requests
+    ]
+    responses = []
+    item_server.serve_lines(lines, responses.append)
+    return [json.loads(response) for response in responses]
+
+
+class ItemServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.item_server = ItemServer(jobs=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.item_server.close()
+
+    def test_creates_items(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "S5P_*")
+        hrefs = sorted(glob.glob(granule_glob))
+        responses = serve(
+            self.item_server,
+            *({"href": href, "request_id": i} for i, href in enumerate(hrefs)),
+        )
+        self.assertEqual(len(responses), len(hrefs))
+        for response in responses:
+            href = hrefs[response["request_id"]]
+            with self.subTest(href):
+                self.assertEqual(response["href"], href)
+                self.assertEqual(
+                    json.dumps(response["item"]), json.dumps(create_item_dict(href))
+                )
+
+    def test_request_options(self):
+        options = {"lite": True, "simplify_tolerance": 0.01, "precision": 4}
+        (response,) = serve(self.item_server, {"href": GRANULE_HREF, **options})
+        self.assertIsNone(response["request_id"])
+        self.assertEqual(
+            json.dumps(response["item"]),
+            json.dumps(create_item_dict(GRANULE_HREF, **options)),
+        )
+
+    def test_defaults(self):
+        with ItemServer(jobs=1, lite=True) as item_server:
+            responses = serve(
+                item_server,
+                {"href": GRANULE_HREF, "request_id": "lite"},
+                {"href": GRANULE_HREF, "request_id": "full", "lite": False},
+            )
+        items = {response["request_id"]: response["item"] for response in responses}
+        self.assertTrue(items["lite"]["properties"]["s5p:lite"])
+        self.assertNotIn("s5p:lite", items["full"]["properties"])
+
+    def test_errors(self):
+        responses = serve(
+            self.item_server,
+            "not json",
+            "[]",
+            {"request_id": 1},
+            {"href": GRANULE_HREF, "request_id": 2, "tolerance": 1},
+            {"op": "restart", "request_id": 3},
+            {"href": "missing.nc", "request_id": 4},
+        )
+        self.assertEqual(len(responses), 6)
+        for response in responses:
+            self.assertNotIn("item", response)
+        errors = {response["request_id"]: response["error"] for response in responses}
+        self.assertEqual(errors[1], "Requests must have an href")
+        self.assertEqual(errors[2], "Unknown options: tolerance")
+        self.assertEqual(errors[3], "Unknown op: restart")
+        self.assertIn("missing.nc", errors[4])
+        # The message of the JSON parser depends on whether orjson is installed
+        invalid, not_object = sorted(
+            r["error"] for r in responses if r["request_id"] is None
+        )
+        self.assertTrue(invalid.startswith("Invalid JSON: "), invalid)
+        self.assertEqual(not_object, "Requests must be JSON objects")
+
+    def test_health_and_stats(self):
+        with ItemServer(jobs=1) as item_server:
+            responses = serve(
+                item_server,
+                {"href": GRANULE_HREF},
+                {"href": "missing.nc"},
+                "",
+            )
+            self.assertEqual(len(responses), 2)
+            health, stats = serve(
+                item_server,
+                {"op": "health", "request_id": 1},
+                {"op": "stats", "request_id": 2},
+            )
+        self.assertEqual(health["request_id"], 1)
+        self.assertEqual(health["status"], "ok")
+        self.assertEqual(health["workers"], 1)
+        self.assertEqual(health["pending"], 0)
+        self.assertEqual(stats["request_id"], 2)
+        self.assertEqual(stats["stats"]["requests"], 2)
+        self.assertEqual(stats["stats"]["items"], 1)
+        self.assertEqual(stats["stats"]["errors"], 1)
+        self.assertGreater(stats["stats"]["attr_reads"], 0)
+
+    def test_cache(self):
+        with TemporaryDirectory() as tmp_dir:
+            with ItemServer(jobs=1, cache=MetadataCache(tmp_dir)) as item_server:
+                serve(item_server, {"href": GRANULE_HREF})
+                (response,) = serve(item_server, {"href": GRANULE_HREF})
+                (stats,) = serve(item_server, {"op": "stats"})
+        self.assertEqual(
+            json.dumps(response["item"]), json.dumps(create_item_dict(GRANULE_HREF))
+        )
+        self.assertEqual(stats["stats"]["cache_misses"], 1)
+        self.assertEqual(stats["stats"]["cache_hits"], 1)
+
+    def test_option_types(self):
+        responses = serve(
+            self.item_server,
+            {"href": GRANULE_HREF, "request_id": 1, "lite": "false"},
+            {"href": GRANULE_HREF, "request_id": 2, "prefer_sidecar": 1},
+            {"href": GRANULE_HREF, "request_id": 3, "precision": 1.5},
+            {"href": GRANULE_HREF, "request_id": 4, "simplify_tolerance": -1},
+            {"href": GRANULE_HREF, "request_id": 5, "simplify_tolerance": True},
+            {"href": GRANULE_HREF, "request_id": 6, "precision": None},
+        )
+        errors = {r["request_id"]: r.get("error") for r in responses}
+        self.assertEqual(errors[1], "lite must be true or false")
+        self.assertEqual(errors[2], "prefer_sidecar must be true or false")
+        self.assertEqual(
+            errors[3], "precision must be an integer of at least 0, or null"
+        )
+        self.assertEqual(
+            errors[4], "simplify_tolerance must be a number of at least 0, or null"
+        )
+        self.assertEqual(errors[4], errors[5])
+        self.assertIsNone(errors[6])
+
+    def test_recovers_from_a_worker_crash(self):
+        with mock.patch(
+            "stactools.sentinel5p.serve.create_item_json", crash_or_create_item_json
+        ), ItemServer(jobs=1) as item_server:
+            responses = serve(item_server, {"href": "crash.nc", "request_id": 1})
+            self.assertIn("BrokenProcessPool", responses[0]["error"])
+            responses = serve(
+                item_server,
+                {"href": GRANULE_HREF, "request_id": 2},
+                {"href": GRANULE_HREF, "request_id": 3},
+            )
+            items = [r for r in responses if "item" in r]
+            self.assertEqual(len(items), 2, responses)
+            (stats,) = serve(item_server, {"op": "stats"})
+        self.assertEqual(stats["stats"]["pending"], 0)
+        self.assertEqual(stats["stats"]["restarts"], 1)
+        self.assertEqual(stats["stats"]["errors"], 1)
+        self.assertEqual(stats["stats"]["items"], 2)
+
+    def test_unknown_default(self):
+        with self.assertRaises(TypeError):
+            ItemServer(jobs=1, tolerance=1)
+
+
+class SocketServerTest(unittest.TestCase):
+    def test_serves_connections(self):
+        with TemporaryDirectory() as tmp_dir, ItemServer(jobs=1) as item_server:
+            path = os.path.join(tmp_dir, "sentinel5p.sock")
+            server = SocketServer(path, item_server)
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                for _ in range(2):
+                    with socket.socket(socket.AF_UNIX) as connection:
+                        connection.connect(path)
+                        connection.sendall(
+                            b'{"href": "%s", "request_id": 1}\n{"op": "health"}\n'
+                            % GRANULE_HREF.encode("utf-8")
+                        )
+                        connection.shutdown(socket.SHUT_WR)
+                        with connection.makefile("rb") as f:
+                            responses = [json.loads(line) for line in f]
+                    self.assertEqual(
+                        sorted(response["request_id"] or 0 for response in responses),
+                        [0, 1],
+                    )
+                    item = next(r["item"] for r in responses if "item" in r)
+                    self.assertEqual(
+                        json.dumps(item), json.dumps(create_item_dict(GRANULE_HREF))
+                    )
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+            self.assertFalse(os.path.exists(path))
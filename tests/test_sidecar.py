@@ -0,0 +1,89 @@
+import glob
+import gzip
+import json
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from stactools.sentinel5p.sidecar import (
+    find_sidecar,
+    netcdf_href,
+    sidecar_href,
+    write_sidecar,
+)
+from stactools.sentinel5p.stac import create_item
+from tests import test_data
+
+
+class SidecarTest(unittest.TestCase):
+    def test_items_from_sidecars_match_netcdf(self):
+        granule_glob = os.path.join(test_data.get_path("data-files"), "*.nc")
+        with TemporaryDirectory() as tmp_dir:
+            for granule_href in sorted(glob.glob(granule_glob)):
+                href = shutil.copy(granule_href, tmp_dir)
+                expected = create_item(href).to_dict()
+                for compact, compress in [(False, False), (True, False), (True, True)]:
+                    with self.subTest(granule_href, compact=compact, compress=compress):
+                        sidecar = write_sidecar(
+                            href, compact=compact, compress=compress
+                        )
+                        self.assertEqual(sidecar, sidecar_href(href, compress))
+                        self.assertEqual(find_sidecar(href), sidecar)
+                        with mock.patch("netCDF4.Dataset") as dataset:
+                            item = create_item(href, prefer_sidecar=True).to_dict()
+                        dataset.assert_not_called()
+
+                        self.assertEqual(item, expected)
+                        os.remove(sidecar)
+
+    def test_compact_sidecar_holds_only_item_metadata(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_OFFL_L2__CH4____"
+            "20200303T013547_20200303T031717_"
+            "12367_01_010302_"
+            "20200306T053811.nc"
+        )
+        with TemporaryDirectory() as tmp_dir:
+            sidecar = write_sidecar(
+                granule_href,
+                os.path.join(tmp_dir, "sidecar.json.gz"),
+                compress=True,
+            )
+            with gzip.open(sidecar, "rt") as f:
+                metadata = json.load(f)
+
+        self.assertEqual(metadata["orbit"], 12367)
+        self.assertEqual(
+            metadata["PRODUCT"], {"dimensions": {"scanline": 4172, "ground_pixel": 215}}
+        )
+        self.assertEqual(
+            sorted(metadata["METADATA"]["ALGORITHM_SETTINGS"]),
+            sorted(
+                [f"input.{i}.type" for i in range(1, 8)]
+                + ["input.1.irrType", "input.3.irrType"]
+            ),
+        )
+        self.assertNotIn("QA_STATISTICS", metadata["METADATA"])
+
+    def test_netcdf_href(self):
+        self.assertEqual(netcdf_href("/data/S5P_granule.json"), "/data/S5P_granule.nc")
+        self.assertEqual(
+            netcdf_href("/data/S5P_granule.json.gz"), "/data/S5P_granule.nc"
+        )
+
+    def test_falls_back_to_netcdf(self):
+        granule_href = test_data.get_path(
+            "data-files/"
+            "S5P_OFFL_L2__NO2____"
+            "20200303T013547_20200303T031717_"
+            "12367_01_010302_"
+            "20200306T053815.nc"
+        )
+        self.assertIsNone(find_sidecar(granule_href))
+        self.assertEqual(
+            create_item(granule_href, prefer_sidecar=True).to_dict(),
+            create_item(granule_href).to_dict(),
+        )
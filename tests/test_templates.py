@@ -0,0 +1,28 @@
+import unittest
+
+from stactools.sentinel5p.constants import SENTINEL_PROVIDER
+from stactools.sentinel5p.templates import item_template
+
+
+class ItemTemplateTest(unittest.TestCase):
+    def test_keys(self):
+        template = item_template("L2__NP_BD3")
+        self.assertEqual(template.asset_id, "np-bd3")
+        self.assertEqual(template.product_key, "s5p:npbd3")
+        self.assertEqual(item_template("L2__NO2___").product_key, "s5p:no2")
+        self.assertIs(item_template("L2__NP_BD3"), template)
+        with self.assertRaises(KeyError):
+            item_template("L2__XYZ___")
+
+    def test_new_parts_are_not_shared(self):
+        template = item_template("L2__CH4___")
+        providers = template.new_providers()
+        self.assertEqual(providers, [SENTINEL_PROVIDER.to_dict()])
+        providers[0]["name"] = "changed"
+        self.assertEqual(template.new_providers(), [SENTINEL_PROVIDER.to_dict()])
+
+        asset = template.new_asset("granule.nc", "description")
+        self.assertEqual(asset.roles, ["data"])
+        asset.roles.append("metadata")
+        self.assertEqual(template.new_asset("granule.nc").roles, ["data"])
+        self.assertEqual(template.new_about_link().rel, "about")